@@ -0,0 +1,90 @@
+"""
+Autenticación por token con caché y vencimiento.
+
+TokenAuthentication de DRF busca Token + User en la base en cada request. Acá el resultado
+queda en la caché (settings.AUTH_TOKEN_CACHE) como mucho AUTH_TOKEN_CACHE_TIMEOUT
+segundos, y nunca más allá del vencimiento del token. Las señales de accounts/signals.py
+borran la entrada al cerrar sesión, rotar el token o modificar el usuario, así que un
+token revocado deja de valer en el acto en este proceso y, con una caché compartida
+(Redis, Memcached), en todos.
+
+En la caché no se guarda el usuario entero (hash de la contraseña incluido): solo los
+campos que hacen falta para autorizar (CACHED_USER_FIELDS). El resto se carga de la base
+recién si una vista lo lee, como un campo diferido de .only().
+
+Los tokens vencen AUTH_TOKEN_TTL después de emitidos (None: no vencen).
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+CACHE_PREFIX = 'auth-token'
+CACHED_USER_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+
+def cache():
+    return caches[settings.AUTH_TOKEN_CACHE]
+
+
+def cache_key(token_key):
+    # La clave guardada en la caché no es el token: no sirve para autenticarse si se filtra
+    return f'{CACHE_PREFIX}:{hashlib.sha256(token_key.encode()).hexdigest()}'
+
+
+def expires_at(token):
+    if settings.AUTH_TOKEN_TTL is None:
+        return None
+    return token.created + settings.AUTH_TOKEN_TTL
+
+
+def is_expired(token, now=None):
+    expiry = expires_at(token)
+    return expiry is not None and expiry <= (now or timezone.now())
+
+
+def forget(token_key):
+    cache().delete(cache_key(token_key))
+
+
+def cached_user_fields():
+    # En el orden de los campos del modelo, como lo espera from_db()
+    model = get_user_model()
+    wanted = {*CACHED_USER_FIELDS, model.USERNAME_FIELD}
+    return tuple(field.attname for field in model._meta.concrete_fields if field.attname in wanted)
+
+
+def light_user(values):
+    """Usuario con solo `values` cargados; los demás campos quedan diferidos."""
+    return get_user_model().from_db(None, cached_user_fields(), values)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        now = timezone.now()
+        entry = cache().get(cache_key(key))
+        if entry is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Token inválido.')
+            user_values = tuple(getattr(token.user, field) for field in cached_user_fields())
+            entry = (user_values, expires_at(token))
+            timeout = settings.AUTH_TOKEN_CACHE_TIMEOUT
+            if entry[1] is not None:
+                timeout = min(timeout, max(int((entry[1] - now).total_seconds()), 0))
+            if timeout > 0:
+                cache().set(cache_key(key), entry, timeout)
+
+        user_values, expiry = entry
+        user = light_user(user_values)
+        if expiry is not None and expiry <= now:
+            raise exceptions.AuthenticationFailed('Token vencido: volvé a iniciar sesión.')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('Usuario inactivo o eliminado.')
+        return user, key
@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import forget
+
+
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    forget(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_user_tokens(sender, instance, created=False, **kwargs):
+    # El usuario cacheado quedó viejo (p. ej. se desactivó la cuenta)
+    if not created:
+        for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+            forget(key)
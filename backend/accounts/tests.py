@@ -1,3 +1,68 @@
-from django.test import TestCase
+import datetime
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from . import authentication
 
-# Create your tests here.
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/api/auth/login/', {'username': 'fono', 'password': 'secret'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {response.data["token"]}')
+        return response.data
+
+    def test_second_request_skips_token_lookup(self):
+        self.login()
+        self.assertEqual(self.client.get('/api/appointments/').status_code, 200)
+        # Solo la consulta del listado: token y usuario salen de la caché
+        # (turnos y no pacientes: el listado de pacientes también sale del cache de respuestas)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/appointments/').status_code, 200)
+
+    def test_cache_holds_no_password_hash(self):
+        token = self.login()['token']
+        self.client.get('/api/appointments/')
+        cached = cache.get(authentication.cache_key(token))
+        self.assertNotIn(self.user.password, repr(cached))
+        user = authentication.CachedTokenAuthentication().authenticate_credentials(token)[0]
+        self.assertEqual((user.pk, user.username, user.is_active), (self.user.pk, 'fono', True))
+        # Lo que no está en la caché se carga de la base al leerlo
+        with self.assertNumQueries(1):
+            self.assertEqual(user.password, self.user.password)
+
+    def test_logout_and_rotation_invalidate_cached_token(self):
+        self.login()
+        self.client.get('/api/patients/')
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 204)
+        self.assertEqual(self.client.get('/api/patients/').status_code, 401)
+
+        old = self.login()['token']
+        new = self.client.post('/api/auth/token/rotate/').data['token']
+        self.assertNotEqual(old, new)
+        self.assertEqual(self.client.get('/api/patients/').status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {new}')
+        self.assertEqual(self.client.get('/api/patients/').status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        self.login()
+        self.client.get('/api/patients/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/patients/').status_code, 401)
+
+    @override_settings(AUTH_TOKEN_TTL=datetime.timedelta(hours=1))
+    def test_expired_token_is_replaced_on_login(self):
+        token = self.login()['token']
+        Token.objects.filter(key=token).update(created=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+        cache.clear()
+        self.assertEqual(self.client.get('/api/patients/').status_code, 401)
+        self.assertNotEqual(self.login()['token'], token)
+        self.assertEqual(self.client.get('/api/patients/').status_code, 200)
@@ -1,9 +1,24 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.views import APIView
 from django.contrib.auth.models import User
+from django.db import transaction
+from .authentication import expires_at, is_expired
 from .serializers import RegisterSerializer
 from rest_framework.authtoken.models import Token
+from rest_framework.authtoken.views import ObtainAuthToken
+
+
+def token_response(token, status_code=status.HTTP_200_OK):
+    return Response({'token': token.key, 'expires_at': expires_at(token)}, status=status_code)
+
+
+def rotate_token(user):
+    """Reemplaza el token del usuario por uno nuevo; el anterior deja de valer (ver accounts/signals.py)."""
+    with transaction.atomic():
+        Token.objects.filter(user=user).delete()
+        return Token.objects.create(user=user)
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -24,3 +39,32 @@ class RegisterView(generics.CreateAPIView):
             },
             "token": token.key
         }, status=status.HTTP_201_CREATED)
+
+
+class LoginView(ObtainAuthToken):
+    """Como obtain_auth_token, pero si el token del usuario venció entrega uno nuevo."""
+    # Un token viejo o vencido en el header no tiene que impedir volver a entrar
+    authentication_classes = ()
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        token, created = Token.objects.get_or_create(user=user)
+        if not created and is_expired(token):
+            token = rotate_token(user)
+        return token_response(token)
+
+class LogoutView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        Token.objects.filter(user=request.user).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class RotateTokenView(APIView):
+    """Entrega un token nuevo (con el vencimiento renovado) e invalida el actual."""
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        return token_response(rotate_token(request.user), status.HTTP_201_CREATED)
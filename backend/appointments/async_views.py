@@ -0,0 +1,28 @@
+from django.http import Http404
+
+from config.asyncapi import authenticated_request, json_response, viewset_for
+from .models import Session
+from .views import AppointmentViewSet, SessionViewSet
+
+
+async def calendar_window(request):
+    """GET /api/appointments/?view=calendar&start=...&end=... (la semana o el mes visible)."""
+    params = request.GET
+    if params.get('view') != 'calendar' or not (params.get('start') and params.get('end')):
+        return None  # los demás listados (paginados) siguen en AppointmentViewSet
+    drf_request = await authenticated_request(request)
+    view = viewset_for(AppointmentViewSet, drf_request, 'list')
+    appointments = [appointment async for appointment in view.get_queryset()]
+    return json_response(view.get_serializer(appointments, many=True).data)
+
+
+async def session_detail(request, pk):
+    """GET /api/sessions/{id}/"""
+    drf_request = await authenticated_request(request)
+    view = viewset_for(SessionViewSet, drf_request, 'retrieve', pk=pk)
+    try:
+        session = await view.get_queryset().aget(pk=pk)
+    except Session.DoesNotExist:
+        raise Http404
+    # El serializer no consulta la base: evaluations_count viene anotado en el queryset
+    return json_response(view.get_serializer(session).data)
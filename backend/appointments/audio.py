@@ -0,0 +1,141 @@
+"""
+Procesamiento de audio de las notas de voz con ffmpeg (binario externo).
+
+- transcode(): comprime a Opus mono, pensado para voz (~24 kbit/s contra ~700 kbit/s del WAV).
+- analyze(): duración y picos de amplitud para la forma de onda, leyendo PCM en streaming
+  desde ffmpeg, así una grabación de una hora no se carga entera en memoria.
+- speech_segments(): tramos con voz, para transcribir solo eso.
+"""
+import array
+import math
+import subprocess
+import sys
+
+from django.conf import settings
+
+# Frecuencia a la que se decodifica para el análisis: alcanza para la envolvente de la voz
+ANALYSIS_SAMPLE_RATE = 8000
+# Ventana de cada pico antes de reducir a AUDIO_WAVEFORM_PEAKS (100 ms)
+ANALYSIS_WINDOW = ANALYSIS_SAMPLE_RATE // 10
+FULL_SCALE = 32768
+
+
+class AudioProcessingError(Exception):
+    pass
+
+
+if sys.version_info >= (3, 12):
+    def _rms(samples):
+        # sumprod recorre el array en C: nada de bucle Python por muestra
+        return math.sqrt(math.sumprod(samples, samples) / len(samples))
+else:
+    import audioop
+
+    def _rms(samples):
+        return audioop.rms(samples, samples.itemsize)
+
+
+def _run(args, **kwargs):
+    try:
+        return subprocess.run(args, check=True, capture_output=True, **kwargs)
+    except FileNotFoundError:
+        raise AudioProcessingError(f'No se encontró {args[0]!r}; instalar ffmpeg o configurar AUDIO_FFMPEG_BINARY.')
+    except subprocess.CalledProcessError as e:
+        raise AudioProcessingError(e.stderr.decode(errors='replace')[-2000:])
+
+
+def transcode(source_path, target_path):
+    """Convierte `source_path` a Opus (contenedor Ogg) en `target_path`."""
+    _run([
+        settings.AUDIO_FFMPEG_BINARY, '-nostdin', '-y', '-i', source_path,
+        '-vn', '-ac', '1', '-c:a', 'libopus', '-b:a', settings.AUDIO_OPUS_BITRATE,
+        '-application', 'voip', target_path,
+    ])
+
+
+def _pcm_windows(path):
+    """
+    Decodifica `path` con ffmpeg a PCM mono de 16 bits y lo entrega en ventanas de 100 ms
+    (arrays de muestras), leyendo del pipe de a una ventana.
+    """
+    try:
+        process = subprocess.Popen(
+            [settings.AUDIO_FFMPEG_BINARY, '-nostdin', '-i', path, '-vn', '-ac', '1',
+             '-ar', str(ANALYSIS_SAMPLE_RATE), '-f', 's16le', '-'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+    except FileNotFoundError:
+        raise AudioProcessingError(f'No se encontró {settings.AUDIO_FFMPEG_BINARY!r}; instalar ffmpeg.')
+
+    with process.stdout:
+        while True:
+            raw = process.stdout.read(ANALYSIS_WINDOW * 2)
+            if not raw:
+                break
+            samples = array.array('h')
+            samples.frombytes(raw[:len(raw) - len(raw) % 2])
+            if sys.byteorder == 'big':
+                samples.byteswap()
+            if samples:
+                yield samples
+    if process.wait() != 0:
+        raise AudioProcessingError(f'ffmpeg no pudo decodificar {path}.')
+
+
+def analyze(path, peaks=None):
+    """
+    Devuelve (duración en segundos, lista de `peaks` picos entre 0 y 1).
+    """
+    peaks = peaks or settings.AUDIO_WAVEFORM_PEAKS
+    windows = []
+    total_samples = 0
+    for samples in _pcm_windows(path):
+        total_samples += len(samples)
+        # max/min de array son de C: no hay bucle Python por muestra
+        windows.append(max(max(samples), -min(samples)) / FULL_SCALE)
+    return total_samples / ANALYSIS_SAMPLE_RATE, downsample_peaks(windows, peaks)
+
+
+def speech_segments(path, ratio=3.0, min_level=0.003, max_gap=0.5, min_length=0.3, padding=0.2):
+    """
+    Tramos con voz de la grabación, como lista de (inicio, fin) en segundos.
+
+    Detector por energía: el piso de ruido es el percentil 10 del RMS de las ventanas de
+    100 ms; hay voz donde el RMS lo supera `ratio` veces. Se unen los tramos separados por
+    menos de `max_gap` segundos y se descartan los más cortos que `min_length`.
+    """
+    window = ANALYSIS_WINDOW / ANALYSIS_SAMPLE_RATE
+    levels = [_rms(samples) / FULL_SCALE for samples in _pcm_windows(path)]
+    if not levels:
+        return []
+    floor = sorted(levels)[len(levels) // 10]
+    threshold = max(floor * ratio, min_level)
+
+    segments = []
+    for index, level in enumerate(levels):
+        if level <= threshold:
+            continue
+        start, end = index * window, (index + 1) * window
+        if segments and start - segments[-1][1] <= max_gap:
+            segments[-1][1] = end
+        else:
+            segments.append([start, end])
+
+    duration = len(levels) * window
+    return [
+        (round(max(start - padding, 0), 3), round(min(end + padding, duration), 3))
+        for start, end in segments if end - start >= min_length
+    ]
+
+
+def downsample_peaks(values, count):
+    """Reduce `values` a `count` picos tomando el máximo de cada tramo."""
+    if len(values) <= count:
+        return [round(v, 3) for v in values]
+    result = []
+    for i in range(count):
+        start = i * len(values) // count
+        end = (i + 1) * len(values) // count
+        result.append(round(max(values[start:end]), 3))
+    return result
+
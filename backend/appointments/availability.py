@@ -0,0 +1,150 @@
+"""
+Disponibilidad de cada profesional: horario de atención menos turnos ocupados.
+
+Los intervalos libres se calculan por semana (lunes a domingo, en la zona horaria activa)
+y se guardan en el cache de Django. Las señales de appointments.signals invalidan solo
+las semanas afectadas cuando cambia un turno, o todas las del profesional cuando cambia
+su horario de atención. Esa invalidación solo llega a otros workers con un cache
+compartido; con uno por proceso cada semana se guarda como mucho LOCAL_CACHE_TIMEOUT
+(ver config/caching.py).
+"""
+import datetime
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.utils import timezone
+
+from config import caching
+
+from .conflicts import FREE_STATUSES, appointment_end
+from .models import Appointment, WorkingHours
+
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# Cuántas semanas hacia adelante se buscan huecos antes de rendirse
+SEARCH_HORIZON_WEEKS = 26
+# Los huecos ofrecidos arrancan en múltiplos de estos minutos (16:00, 16:15, ...)
+SLOT_ALIGNMENT_MINUTES = 15
+
+
+def week_start(value):
+    """Lunes de la semana que contiene a `value` (date o datetime aware)."""
+    if isinstance(value, datetime.datetime):
+        value = timezone.localdate(value)
+    return value - datetime.timedelta(days=value.weekday())
+
+
+def _generation_key(user_id):
+    return f'availability:{user_id}:generation'
+
+
+def _week_key(user_id, monday):
+    generation = cache.get_or_set(_generation_key(user_id), 0, None)
+    return f'availability:{user_id}:{generation}:{monday.isoformat()}'
+
+
+def invalidate_week(user_id, monday):
+    cache.delete(_week_key(user_id, monday))
+
+
+def invalidate_dates(user_id, datetimes):
+    """Invalida las semanas que contienen a `datetimes` (para escrituras masivas sin señales)."""
+    for monday in {week_start(value) for value in datetimes}:
+        invalidate_week(user_id, monday)
+
+
+def invalidate_user(user_id):
+    """Descarta todas las semanas cacheadas de un profesional (cambió su horario)."""
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        cache.set(_generation_key(user_id), 1, None)
+
+
+def subtract_intervals(free, busy):
+    """
+    Resta `busy` de `free`. Ambas listas deben venir ordenadas por inicio;
+    `free` sin superposiciones. Devuelve los intervalos libres que quedan, ordenados.
+    """
+    result = []
+    j = 0
+    for start, end in free:
+        # Los ocupados que terminan antes de este hueco ya no afectan a los siguientes
+        while j < len(busy) and busy[j][1] <= start:
+            j += 1
+        cursor = start
+        k = j
+        while k < len(busy) and busy[k][0] < end:
+            busy_start, busy_end = busy[k]
+            if busy_start > cursor:
+                result.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            k += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+def working_intervals(user, monday):
+    tz = timezone.get_current_timezone()
+    intervals = []
+    for hours in WorkingHours.objects.filter(user=user):
+        day = monday + datetime.timedelta(days=hours.weekday)
+        intervals.append((
+            timezone.make_aware(datetime.datetime.combine(day, hours.start_time), tz),
+            timezone.make_aware(datetime.datetime.combine(day, hours.end_time), tz),
+        ))
+    intervals.sort()
+    # Unir franjas solapadas o contiguas cargadas por separado
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def compute_week(user, monday):
+    working = working_intervals(user, monday)
+    if not working:
+        return []
+    busy = [
+        (appointment.date_time, appointment_end(appointment))
+        for appointment in Appointment.objects.filter(
+            user=user, date_time__gte=working[0][0] - datetime.timedelta(days=1), date_time__lt=working[-1][1]
+        ).exclude(status__in=FREE_STATUSES).only('date_time', 'duration_minutes').order_by('date_time')
+    ]
+    return subtract_intervals(working, busy)
+
+
+def free_intervals(user, monday):
+    """Intervalos libres de la semana que empieza en `monday`, desde el cache si está."""
+    key = _week_key(user.id, monday)
+    intervals = cache.get(key)
+    if intervals is None:
+        intervals = compute_week(user, monday)
+        cache.set(key, intervals, caching.timeout(DEFAULT_CACHE_ALIAS, CACHE_TIMEOUT))
+    return intervals
+
+
+def _round_up(value, minutes=SLOT_ALIGNMENT_MINUTES):
+    step = datetime.timedelta(minutes=minutes)
+    remainder = (value - value.replace(hour=0, minute=0, second=0, microsecond=0)) % step
+    return value + (step - remainder) if remainder else value
+
+
+def next_free_slots(user, count, duration_minutes=60, after=None):
+    """Primeros `count` huecos de `duration_minutes` a partir de `after` (por defecto, ahora)."""
+    after = _round_up(timezone.localtime(after or timezone.now()))
+    duration = datetime.timedelta(minutes=duration_minutes)
+    monday = week_start(after)
+    slots = []
+    for _ in range(SEARCH_HORIZON_WEEKS):
+        for start, end in free_intervals(user, monday):
+            cursor = max(start, after)
+            while cursor + duration <= end:
+                slots.append((cursor, cursor + duration))
+                if len(slots) >= count:
+                    return slots
+                cursor += duration
+        monday += datetime.timedelta(weeks=1)
+    return slots
@@ -0,0 +1,109 @@
+"""
+Detección de superposición de turnos para un profesional.
+
+Carga en una sola consulta los turnos existentes que pueden chocar con los nuevos y los cruza
+con un barrido ordenado (sweep line), en lugar de hacer una consulta por cada turno nuevo.
+"""
+import datetime
+import heapq
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import Appointment
+
+# Los turnos que ya no ocupan el horario
+FREE_STATUSES = ('cancelled', 'rescheduled')
+
+# Ningún turno dura más que esto; acota cuánto antes de la ventana hay que buscar
+MAX_APPOINTMENT_SPAN = datetime.timedelta(days=1)
+
+CONFLICT_POLICIES = ('reject', 'skip', 'allow')
+
+
+class ScheduleConflict(APIException):
+    """El turno se superpone con otro: 409, igual que los lotes y la recurrencia."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'El horario se superpone con otro turno.'
+    default_code = 'conflict'
+
+
+def appointment_end(appointment):
+    return appointment.date_time + datetime.timedelta(minutes=appointment.duration_minutes)
+
+
+def find_conflicts(user, slots, exclude_ids=()):
+    """
+    Busca los turnos de `user` que se superponen con `slots`.
+
+    slots: lista de (inicio, fin) de los turnos a crear, en cualquier orden.
+    exclude_ids: turnos a ignorar (por ejemplo, el que se está editando).
+
+    Devuelve {índice del slot: [Appointment, ...]} solo para los slots con conflicto.
+    Dos turnos chocan si uno empieza antes de que termine el otro; turnos consecutivos
+    (uno termina 16:00 y el otro empieza 16:00) no chocan.
+    """
+    if not slots:
+        return {}
+
+    window_start = min(start for start, _ in slots) - MAX_APPOINTMENT_SPAN
+    window_end = max(end for _, end in slots)
+    existing = list(
+        Appointment.objects.filter(user=user, date_time__gte=window_start, date_time__lt=window_end)
+        .exclude(status__in=FREE_STATUSES)
+        .exclude(id__in=exclude_ids)
+        .select_related('patient')
+        .order_by('date_time')
+    )
+
+    conflicts = {}
+    active = []  # heap de (fin, id, turno) de los existentes que empezaron antes del slot actual
+    j = 0
+    for index in sorted(range(len(slots)), key=lambda i: slots[i][0]):
+        start, end = slots[index]
+        while j < len(existing) and existing[j].date_time < end:
+            heapq.heappush(active, (appointment_end(existing[j]), existing[j].id, existing[j]))
+            j += 1
+        # Los slots se recorren por inicio creciente: lo que terminó antes de este ya no choca con ninguno
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        overlapping = [appointment for _, _, appointment in active if appointment.date_time < end]
+        if overlapping:
+            conflicts[index] = sorted(overlapping, key=lambda a: a.date_time)
+    return conflicts
+
+
+def batch_overlaps(slots):
+    """
+    Superposiciones dentro de un mismo lote: {índice: [índices anteriores con los que choca]}.
+    "Anterior" es por horario de inicio; así cada choque se informa una sola vez.
+    """
+    overlaps = {}
+    active = []  # heap de (fin, índice)
+    for index in sorted(range(len(slots)), key=lambda i: slots[i][0]):
+        start, end = slots[index]
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        if active:
+            overlaps[index] = sorted(other for _, other in active)
+        heapq.heappush(active, (end, index))
+    return overlaps
+
+
+def describe_conflicts(slots, conflicts):
+    """Arma la representación JSON de los conflictos para la respuesta."""
+    return [
+        {
+            'date_time': slots[index][0].isoformat(),
+            'conflicts_with': [
+                {
+                    'id': appointment.id,
+                    'date_time': appointment.date_time.isoformat(),
+                    'duration_minutes': appointment.duration_minutes,
+                    'patient_name': f"{appointment.patient.first_name} {appointment.patient.last_name}",
+                }
+                for appointment in appointments
+            ],
+        }
+        for index, appointments in sorted(conflicts.items())
+    ]
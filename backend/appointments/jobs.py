@@ -0,0 +1,192 @@
+"""
+Cola de trabajos de audio respaldada por la base de datos (modelo AudioJob).
+
+Las requests solo insertan una fila con enqueue(); el worker (`manage.py process_audio_jobs`)
+toma los trabajos pendientes, los marca como tomados con un UPDATE condicional (funciona
+igual en SQLite y en Postgres, con uno o varios workers) y ejecuta el handler de su tipo.
+"""
+import datetime
+import logging
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from sync.changes import record_changes
+from . import audio, transcription
+from .models import AudioJob, Session
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+# Espera antes de reintentar: 1, 4, 9... minutos
+RETRY_BACKOFF = datetime.timedelta(minutes=1)
+# Un trabajo "running" más viejo que esto se considera abandonado (el worker murió)
+STALE_AFTER = datetime.timedelta(hours=1)
+
+
+TRANSCODED_SUFFIX = '.opus.ogg'
+
+
+def is_transcoded(name):
+    return name.endswith(TRANSCODED_SUFFIX)
+
+
+def enqueue(session, kind):
+    """Encola un trabajo al confirmar la transacción actual. Evita duplicar pendientes."""
+    def create():
+        if not AudioJob.objects.filter(session=session, kind=kind, status='pending').exists():
+            AudioJob.objects.create(session=session, kind=kind, run_after=timezone.now())
+    transaction.on_commit(create)
+
+
+def claim_next(kinds=None):
+    """Toma el próximo trabajo pendiente, o None si no hay. Seguro con varios workers."""
+    now = timezone.now()
+    # Rescatar trabajos de workers que murieron a mitad de camino. run() no llegó a guardar
+    # el intento, así que se cuenta acá: uno que siempre tumba al worker termina en failed
+    stale = AudioJob.objects.filter(status='running', started_at__lt=now - STALE_AFTER)
+    stale.filter(attempts__gte=MAX_ATTEMPTS - 1).update(
+        status='failed', attempts=F('attempts') + 1, finished_at=now,
+        error='El worker se interrumpió mientras procesaba este trabajo.',
+    )
+    stale.update(status='pending', attempts=F('attempts') + 1)
+
+    queryset = AudioJob.objects.filter(status='pending', run_after__lte=now)
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    for job_id in queryset.order_by('run_after', 'id').values_list('id', flat=True)[:10]:
+        claimed = AudioJob.objects.filter(id=job_id, status='pending').update(
+            status='running', started_at=now
+        )
+        if claimed:
+            return AudioJob.objects.select_related('session').get(id=job_id)
+    return None
+
+
+def run(job):
+    job.attempts += 1
+    try:
+        HANDLERS[job.kind](job.session)
+    except Exception as e:
+        logger.exception('Falló %s', job)
+        job.error = ''.join(traceback.format_exception_only(type(e), e)).strip()
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = 'failed'
+        else:
+            job.status = 'pending'
+            job.run_after = timezone.now() + RETRY_BACKOFF * job.attempts ** 2
+    else:
+        job.status = 'done'
+        job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'attempts', 'error', 'run_after', 'finished_at'])
+    return job
+
+
+def transcode_voice_note(session):
+    """
+    Comprime la nota de voz a Opus y calcula duración y forma de onda.
+    El original se borra solo después de guardar el nuevo archivo.
+    """
+    original = session.voice_note
+    if not original:
+        return
+    if is_transcoded(original.name):
+        # Ya procesado (p. ej. un reintento después de un corte): solo falta el análisis
+        duration, peaks = audio.analyze(original.path)
+        Session.objects.filter(pk=session.pk).update(voice_note_duration=duration, voice_note_peaks=peaks)
+        record_changes(session.appointment.user_id, 'session', [session.pk])
+        enqueue_transcription(session)
+        return
+
+    base, _ = os.path.splitext(original.name)
+    target_name = default_storage.get_available_name(base + TRANSCODED_SUFFIX)
+    target_path = default_storage.path(target_name)
+    audio.transcode(original.path, target_path)
+    try:
+        duration, peaks = audio.analyze(target_path)
+    except audio.AudioProcessingError:
+        os.remove(target_path)
+        raise
+
+    # update() en lugar de save(): no vuelve a disparar las señales que encolan trabajos,
+    # y solo reemplaza el archivo si nadie subió otra grabación mientras tanto
+    replaced = Session.objects.filter(pk=session.pk, voice_note=original.name).update(
+        voice_note=target_name, voice_note_duration=duration, voice_note_peaks=peaks
+    )
+    if replaced:
+        default_storage.delete(original.name)
+        record_changes(session.appointment.user_id, 'session', [session.pk])
+        enqueue_transcription(session)
+    else:
+        default_storage.delete(target_name)
+
+
+def enqueue_transcription(session):
+    if settings.TRANSCRIPTION_ENABLED:
+        enqueue(session, 'transcribe')
+
+
+def transcription_workers():
+    return settings.TRANSCRIPTION_WORKERS or os.cpu_count() or 1
+
+
+def transcribe_session(session):
+    """
+    Transcribe la nota de voz con el motor local configurado.
+
+    Solo se transcriben los tramos con voz (audio.speech_segments), partidos en pedazos de
+    TRANSCRIPTION_CHUNK_SECONDS que se reparten entre procesos. El texto y el progreso se
+    guardan a medida que llegan los pedazos, en orden, así el cliente puede mostrar avance.
+    """
+    session.refresh_from_db(fields=['voice_note'])
+    if not session.voice_note:
+        return
+    path = session.voice_note.path
+    chunks = transcription.plan_chunks(audio.speech_segments(path), settings.TRANSCRIPTION_CHUNK_SECONDS)
+    sessions = Session.objects.filter(pk=session.pk)
+    sessions.update(transcript='', transcript_progress=0.0)
+    if not chunks:
+        sessions.update(transcript_progress=1.0)
+        save_transcript(session)
+        return
+
+    engine, options = settings.TRANSCRIPTION_ENGINE, settings.TRANSCRIPTION_ENGINE_OPTIONS
+    tasks = [(engine, options, path, start, end) for start, end in chunks]
+    workers = min(transcription_workers(), len(tasks))
+    texts = []
+
+    def collect(results):
+        for text in results:
+            texts.append(text)
+            sessions.update(
+                transcript=' '.join(t for t in texts if t),
+                transcript_progress=len(texts) / len(tasks),
+            )
+
+    if workers <= 1:
+        collect(map(transcription.transcribe_chunk, tasks))
+    else:
+        # map() entrega los resultados en el orden de los pedazos aunque terminen desordenados
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            collect(pool.map(transcription.transcribe_chunk, tasks))
+
+    save_transcript(session)
+
+
+def save_transcript(session):
+    # update() no dispara señales: un save() final para que se entere quien escucha (p. ej. la búsqueda)
+    session.refresh_from_db(fields=['transcript', 'transcript_progress'])
+    session.save(update_fields=['transcript', 'transcript_progress'])
+
+
+HANDLERS = {
+    'transcode': transcode_voice_note,
+    'transcribe': transcribe_session,
+}
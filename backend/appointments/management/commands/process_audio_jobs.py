@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from appointments import jobs, voice_notes
+
+# Cada cuántos segundos se buscan subidas de notas de voz abandonadas
+PURGE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Procesa la cola de trabajos de audio (compresión de notas de voz, etc.) y descarta '
+        'las subidas de notas de voz abandonadas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesa lo pendiente y termina.')
+        parser.add_argument('--sleep', type=float, default=5.0, help='Segundos de espera cuando la cola está vacía.')
+        parser.add_argument('--kind', action='append', dest='kinds', help='Procesar solo este tipo (repetible).')
+
+    def handle(self, *args, **options):
+        processed = 0
+        next_purge = 0
+        while True:
+            if time.monotonic() >= next_purge:
+                purged = voice_notes.purge_stale_uploads()
+                if purged:
+                    self.stdout.write(f'{purged} subida(s) abandonada(s) descartada(s).')
+                next_purge = time.monotonic() + PURGE_INTERVAL
+            job = jobs.claim_next(options['kinds'])
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            jobs.run(job)
+            processed += 1
+            self.stdout.write(f'{job}: {job.error or "ok"}')
+        self.stdout.write(self.style.SUCCESS(f'{processed} trabajo(s) procesado(s).'))
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_session'),
+        ('patients', '0002_patient_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['user', 'date_time'], name='appt_user_datetime_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_voicenoteupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='voice_note_duration',
+            field=models.FloatField(blank=True, help_text='Duración de la grabación en segundos', null=True),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='voice_note_peaks',
+            field=models.JSONField(blank=True, default=list, help_text='Picos de amplitud (0-1) para dibujar la forma de onda'),
+        ),
+        migrations.CreateModel(
+            name='AudioJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('transcode', 'Compresión a Opus')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En proceso'), ('done', 'Terminado'), ('failed', 'Fallido')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('run_after', models.DateTimeField(help_text='No se toma antes de esta fecha (reintentos con espera)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audio_jobs', to='appointments.session')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='audiojob_queue_idx')],
+            },
+        ),
+    ]
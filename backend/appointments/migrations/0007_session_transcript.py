@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_audiojob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='transcript',
+            field=models.TextField(blank=True, help_text='Transcripción automática de la nota de voz'),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='transcript_progress',
+            field=models.FloatField(blank=True, help_text='Avance de la transcripción (0-1)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='audiojob',
+            name='kind',
+            field=models.CharField(choices=[('transcode', 'Compresión a Opus'), ('transcribe', 'Transcripción')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0007_session_transcript'),
+        ('patients', '0003_patient_name_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['patient', 'date_time'], name='appt_patient_datetime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treatmentplan',
+            index=models.Index(fields=['patient', 'status'], name='plan_patient_status_idx'),
+        ),
+    ]
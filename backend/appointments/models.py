@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.conf import settings
 from patients.models import Patient
@@ -28,6 +29,12 @@ class TreatmentPlan(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Directorio de pacientes: ¿tiene un plan activo?
+            models.Index(fields=['patient', 'status'], name='plan_patient_status_idx'),
+        ]
+
     def __str__(self):
         return f"Plan: {self.patient} - {self.duration_months} meses ({self.status})"
 
@@ -50,6 +57,14 @@ class Appointment(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Ventanas del calendario: filtra por profesional y rango de fechas
+            models.Index(fields=['user', 'date_time'], name='appt_user_datetime_idx'),
+            # Última visita de cada paciente (directorio): un salto al final de su rango
+            models.Index(fields=['patient', 'date_time'], name='appt_patient_datetime_idx'),
+        ]
+
     def __str__(self):
         return f"Cita: {self.patient} el {self.date_time.strftime('%Y-%m-%d %H:%M')}"
 
@@ -65,8 +80,78 @@ class Session(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     written_notes = models.TextField(blank=True, help_text="Observaciones clínicas de la sesión")
     voice_note = models.FileField(upload_to='voice_notes/%Y/%m/', null=True, blank=True, help_text="Grabación de voz de la sesión")
+    voice_note_duration = models.FloatField(null=True, blank=True, help_text="Duración de la grabación en segundos")
+    voice_note_peaks = models.JSONField(default=list, blank=True, help_text="Picos de amplitud (0-1) para dibujar la forma de onda")
+    transcript = models.TextField(blank=True, help_text="Transcripción automática de la nota de voz")
+    transcript_progress = models.FloatField(null=True, blank=True, help_text="Avance de la transcripción (0-1)")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Sesión de {self.appointment.patient} ({self.get_status_display()})"
+
+class AudioJob(models.Model):
+    """
+    Trabajo en segundo plano sobre la nota de voz de una sesión.
+    La cola vive en la base de datos y la procesa `manage.py process_audio_jobs`.
+    """
+    KIND_CHOICES = (
+        ('transcode', 'Compresión a Opus'),
+        ('transcribe', 'Transcripción'),
+    )
+
+    STATUS_CHOICES = (
+        ('pending', 'Pendiente'),
+        ('running', 'En proceso'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+    )
+
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='audio_jobs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    run_after = models.DateTimeField(help_text="No se toma antes de esta fecha (reintentos con espera)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='audiojob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - sesión {self.session_id} ({self.get_status_display()})"
+
+class VoiceNoteUpload(models.Model):
+    """
+    Subida por partes (reanudable) de la grabación de una sesión.
+    Los bytes se escriben directo a un archivo `.part` en disco; al completarse `size`
+    el archivo se mueve al `voice_note` de la sesión.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='voice_note_uploads')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='voice_note_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Tamaño total esperado en bytes")
+    offset = models.PositiveBigIntegerField(default=0, help_text="Bytes recibidos hasta ahora")
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Subida {self.id} ({self.offset}/{self.size} bytes)"
+
+class WorkingHours(models.Model):
+    """Franja de atención de un profesional. Puede haber varias por día (turno mañana y tarde)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='working_hours')
+    weekday = models.PositiveSmallIntegerField(choices=[(int(k), v) for k, v in TreatmentPlan.DAYS_OF_WEEK])
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        ordering = ('weekday', 'start_time')
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
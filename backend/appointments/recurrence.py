@@ -0,0 +1,66 @@
+"""
+Motor de recurrencia para los planes de tratamiento.
+
+Calcula las fechas de cada turno a partir de una regla estilo RRULE (RFC 5545, FREQ=WEEKLY)
+sin recorrer el calendario día por día: para cada día de la semana elegido se salta directo
+a su primera ocurrencia y de ahí en pasos de `7 * interval` días.
+"""
+import datetime
+import heapq
+
+from django.utils import timezone
+
+WEEK = datetime.timedelta(weeks=1)
+
+
+def weekly_occurrences(start_date, weekdays, interval=1, count=None, until=None, exclude=()):
+    """
+    Genera (en orden) las fechas de una regla semanal.
+
+    start_date: primer día posible (DTSTART). Las semanas se cuentan desde la semana
+        (lunes a domingo) que contiene a start_date, igual que WKST=MO.
+    weekdays: días de la semana según date.weekday() (0 = Lunes).
+    interval: cada cuántas semanas se repite (INTERVAL).
+    count: cantidad de ocurrencias (COUNT). Las fechas excluidas cuentan, como EXDATE.
+    until: última fecha posible, inclusive (UNTIL).
+    exclude: fechas a omitir (EXDATE), por ejemplo feriados.
+    """
+    if count is None and until is None:
+        raise ValueError('La regla necesita count o until.')
+    if interval < 1:
+        raise ValueError('interval debe ser mayor o igual a 1.')
+    weekdays = sorted(set(weekdays))
+    if not weekdays or not all(0 <= d <= 6 for d in weekdays):
+        raise ValueError('days_of_week debe contener valores entre 0 (Lunes) y 6 (Domingo).')
+
+    step = WEEK * interval
+    week_start = start_date - datetime.timedelta(days=start_date.weekday())
+    # Primera ocurrencia de cada día; en la semana inicial se descartan los días previos a start_date
+    firsts = []
+    for day in weekdays:
+        first = week_start + datetime.timedelta(days=day)
+        if first < start_date:
+            first += step
+        firsts.append(first)
+
+    # Cada día avanza en su propia progresión aritmética; heapq.merge las intercala en orden
+    streams = [_progression(first, step, until) for first in firsts]
+    excluded = set(exclude)
+    for emitted, date in enumerate(heapq.merge(*streams)):
+        if count is not None and emitted >= count:
+            return
+        if date not in excluded:
+            yield date
+
+
+def _progression(first, step, until):
+    date = first
+    while until is None or date <= until:
+        yield date
+        date += step
+
+
+def occurrence_datetimes(dates, time_obj):
+    """Combina cada fecha con el horario del turno en la zona horaria activa."""
+    tz = timezone.get_current_timezone()
+    return [timezone.make_aware(datetime.datetime.combine(date, time_obj), tz) for date in dates]
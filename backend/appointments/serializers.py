@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import TreatmentPlan, Appointment, Session
+from config.bulk import PrefetchedPrimaryKeyRelatedField
+from . import voice_notes
+from .models import TreatmentPlan, Appointment, Session, WorkingHours
 from patients.serializers import PatientSerializer
 
 class TreatmentPlanSerializer(serializers.ModelSerializer):
@@ -11,6 +13,8 @@ class TreatmentPlanSerializer(serializers.ModelSerializer):
 class AppointmentSerializer(serializers.ModelSerializer):
     # En lectura, retornamos un breve resumen del paciente para el Calendario
     patient_name = serializers.SerializerMethodField()
+    # En los lotes, paciente y plan se buscan una vez para todos los ítems
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
 
     class Meta:
         model = Appointment
@@ -20,14 +24,48 @@ class AppointmentSerializer(serializers.ModelSerializer):
     def get_patient_name(self, obj):
         return f"{obj.patient.first_name} {obj.patient.last_name}"
 
+class CalendarAppointmentSerializer(serializers.ModelSerializer):
+    # Representación compacta: solo lo que dibuja el calendario
+    patient_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Appointment
+        fields = ('id', 'date_time', 'duration_minutes', 'status', 'patient_name')
+        read_only_fields = fields
+
+    def get_patient_name(self, obj):
+        return f"{obj.patient.first_name} {obj.patient.last_name}"
+
 class SessionSerializer(serializers.ModelSerializer):
     # To view evaluations tied to this session
     evaluations_count = serializers.SerializerMethodField()
+    # URL firmada para el <audio>: pasa por el endpoint autenticado con soporte de Range
+    voice_note_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Session
         fields = '__all__'
-        read_only_fields = ('created_at', 'updated_at')
+        read_only_fields = (
+            'created_at', 'updated_at', 'voice_note_duration', 'voice_note_peaks', 'transcript', 'transcript_progress',
+        )
 
     def get_evaluations_count(self, obj):
+        # SessionViewSet lo anota en la consulta; fuera del listado contamos directo
+        if hasattr(obj, 'evaluations_total'):
+            return obj.evaluations_total
         return obj.evaluations.count()
+
+    def get_voice_note_url(self, obj):
+        return voice_notes.playback_url(obj) if obj.voice_note else None
+
+class WorkingHoursSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WorkingHours
+        fields = ('id', 'weekday', 'start_time', 'end_time')
+
+    def validate(self, attrs):
+        start = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if start and end and start >= end:
+            raise serializers.ValidationError('La hora de inicio debe ser anterior a la de fin.')
+        return attrs
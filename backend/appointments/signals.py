@@ -0,0 +1,55 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from config import response_cache
+from . import availability, jobs
+from .models import Appointment, Session, TreatmentPlan, WorkingHours
+
+
+@receiver(post_init, sender=Appointment)
+def remember_original_slot(sender, instance, **kwargs):
+    # Si el turno se mueve de semana hay que invalidar también la semana anterior.
+    # Se lee __dict__ para no disparar consultas en instancias cargadas con .only()
+    values = instance.__dict__
+    instance._original_slot = (values.get('user_id'), values.get('date_time')) if instance.pk else None
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_appointment_week(sender, instance, **kwargs):
+    current = (instance.__dict__.get('user_id'), instance.__dict__.get('date_time'))
+    for user_id, date_time in {current, getattr(instance, '_original_slot', None) or current}:
+        if user_id is not None and date_time is not None:
+            availability.invalidate_week(user_id, availability.week_start(date_time))
+    instance._original_slot = current
+
+
+@receiver(post_save, sender=WorkingHours)
+@receiver(post_delete, sender=WorkingHours)
+def invalidate_working_hours(sender, instance, **kwargs):
+    availability.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=TreatmentPlan)
+@receiver(post_delete, sender=TreatmentPlan)
+def invalidate_treatment_plan_list(sender, instance, **kwargs):
+    response_cache.invalidate('treatment_plans', instance.user_id)
+
+
+def _voice_note_name(instance):
+    value = instance.__dict__.get('voice_note')
+    return getattr(value, 'name', value) or None
+
+
+@receiver(post_init, sender=Session)
+def remember_voice_note(sender, instance, **kwargs):
+    instance._original_voice_note = _voice_note_name(instance)
+
+
+@receiver(post_save, sender=Session)
+def enqueue_voice_note_processing(sender, instance, **kwargs):
+    # La compresión corre en el worker: la request que subió el audio no espera
+    name = _voice_note_name(instance)
+    if name and name != instance._original_voice_note and not jobs.is_transcoded(name):
+        jobs.enqueue(instance, 'transcode')
+    instance._original_voice_note = name
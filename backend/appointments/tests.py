@@ -1,3 +1,622 @@
-from django.test import TestCase
+import datetime
+import array
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from config.pagination import ViewCursorPagination
+from evaluations.models import TestTemplate, Evaluation
+from patients.models import Patient
+from search.models import SearchDocument
+from .models import TreatmentPlan, Appointment, Session, VoiceNoteUpload, WorkingHours, AudioJob
+from . import audio, availability, jobs, transcription, voice_notes
+from .conflicts import find_conflicts
+from .recurrence import weekly_occurrences
 
-# Create your tests here.
+
+class AppointmentTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(user=self.user, first_name='Ana', last_name='Pérez', dni='30111222')
+
+    def make_appointment(self, when, **kwargs):
+        kwargs.setdefault('patient', self.patient)
+        return Appointment.objects.create(user=self.user, date_time=when, **kwargs)
+
+
+class CalendarWindowTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        base = timezone.make_aware(datetime.datetime(2026, 3, 2, 16, 0))
+        for week in range(4):
+            self.make_appointment(base + datetime.timedelta(weeks=week))
+
+    def test_window_limits_results(self):
+        response = self.client.get('/api/appointments/', {'start': '2026-03-02', 'end': '2026-03-09'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_calendar_view_is_compact(self):
+        response = self.client.get('/api/appointments/', {'start': '2026-03-01', 'end': '2026-04-01', 'view': 'calendar'})
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(set(response.data[0]), {'id', 'date_time', 'duration_minutes', 'status', 'patient_name'})
+        self.assertEqual(response.data[0]['patient_name'], 'Ana Pérez')
+
+    def test_invalid_bound_is_rejected(self):
+        response = self.client.get('/api/appointments/', {'start': 'ayer'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(ROOT_URLCONF='config.asgi_urls')
+class AsyncReadViewTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        base = timezone.make_aware(datetime.datetime(2026, 3, 2, 16, 0))
+        self.appointments = [self.make_appointment(base + datetime.timedelta(days=day)) for day in range(3)]
+        self.session = Session.objects.create(appointment=self.appointments[0], written_notes='Respiración')
+        self.async_client = AsyncClient()
+        self.headers = {'Authorization': f'Token {Token.objects.create(user=self.user).key}'}
+
+    async def assertSameAsDrf(self, url, params=None):
+        response = await self.async_client.get(url, params or {}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        # /api/patients.json: la ruta con sufijo del router llega siempre a la vista DRF
+        drf = await self.async_client.get(url.rstrip('/') + '.json', params or {}, headers=self.headers)
+        self.assertEqual(response.json(), drf.json())
+        return response.json()
+
+    async def test_reads_match_drf_views(self):
+        window = {'view': 'calendar', 'start': '2026-03-01', 'end': '2026-03-04'}
+        self.assertEqual(len(await self.assertSameAsDrf('/api/appointments/', window)), 2)
+        self.assertEqual(len((await self.assertSameAsDrf('/api/patients/'))['results']), 1)
+        session = await self.assertSameAsDrf(f'/api/sessions/{self.session.id}/')
+        self.assertEqual(session['written_notes'], 'Respiración')
+
+    async def test_errors_and_fallback(self):
+        self.assertEqual((await AsyncClient().get('/api/patients/')).status_code, 401)
+        self.assertEqual((await self.async_client.get('/api/sessions/999/', headers=self.headers)).status_code, 404)
+        response = await self.async_client.get(
+            '/api/appointments/', {'view': 'calendar', 'start': 'ayer', 'end': '2026-03-04'}, headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 400)
+        # Sin ventana completa o con otro método sigue la vista DRF
+        self.assertIn('results', (await self.async_client.get('/api/appointments/', headers=self.headers)).json())
+        response = await self.async_client.post(
+            '/api/patients/', {'first_name': 'Luis', 'last_name': 'Gómez', 'dni': '2'},
+            content_type='application/json', headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+class ListQueryCountTests(AppointmentTestMixin, TestCase):
+    """
+    Cada listado debe costar una cantidad fija de consultas, sin importar cuántas filas devuelva.
+    Si alguno de estos tests falla, probablemente un serializer volvió a leer relaciones fila por fila.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.template = TestTemplate.objects.create(name='GHQ-12', schema={'type': 'object'})
+        self.rows = 0
+
+    def add_rows(self, count):
+        start = timezone.make_aware(datetime.datetime(2026, 3, 2, 9, 0))
+        for i in range(self.rows, self.rows + count):
+            patient = Patient.objects.create(user=self.user, first_name=f'P{i}', last_name='Test', dni=f'dni-{i}')
+            plan = TreatmentPlan.objects.create(
+                patient=patient, user=self.user, start_date=start.date(), duration_months=1, sessions_per_week=1
+            )
+            appointment = self.make_appointment(
+                start + datetime.timedelta(hours=i), patient=patient, treatment_plan=plan
+            )
+            session = Session.objects.create(appointment=appointment)
+            Evaluation.objects.create(
+                user=self.user, patient=patient, test_template=self.template, session=session, results={}
+            )
+        self.rows += count
+
+    def assertConstantQueries(self, url, expected):
+        for batch in (3, 12):
+            self.add_rows(batch)
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_appointments(self):
+        self.assertConstantQueries('/api/appointments/', 1)
+
+    def test_appointments_calendar_view(self):
+        self.assertConstantQueries('/api/appointments/?view=calendar', 1)
+
+    def test_sessions(self):
+        self.assertConstantQueries('/api/sessions/', 1)
+
+    def test_treatment_plans(self):
+        self.assertConstantQueries('/api/treatment-plans/', 1)
+
+    def test_patients(self):
+        self.assertConstantQueries('/api/patients/', 1)
+
+    def test_evaluations(self):
+        self.assertConstantQueries('/api/evaluations/', 1)
+
+    def test_session_evaluations_count(self):
+        self.add_rows(2)
+        response = self.client.get('/api/sessions/')
+        self.assertEqual([row['evaluations_count'] for row in response.data['results']], [1, 1])
+
+
+class CursorPaginationTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        base = timezone.make_aware(datetime.datetime(2026, 3, 2, 9, 0))
+        self.appointments = [self.make_appointment(base + datetime.timedelta(hours=i)) for i in range(7)]
+
+    def test_pages_follow_endpoint_ordering(self):
+        seen = []
+        url = '/api/appointments/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, [a.id for a in self.appointments])
+
+    def test_ordering_always_ends_in_id(self):
+        paginator = ViewCursorPagination()
+        for ordering, expected in ((('-created_at',), ('-created_at', '-id')), ('date_time', ('date_time', 'id')),
+                                   (('date_time', 'id'), ('date_time', 'id')), (None, ('-id',))):
+            view = mock.Mock(ordering=ordering)
+            self.assertEqual(paginator.get_ordering(None, None, view), expected)
+
+    def test_bounded_calendar_window_is_not_paginated(self):
+        response = self.client.get('/api/appointments/', {'start': '2026-03-02', 'end': '2026-03-03', 'view': 'calendar'})
+        self.assertEqual(len(response.data), 7)
+
+
+class RecurrenceTests(AppointmentTestMixin, TestCase):
+    def test_matches_day_by_day_walk(self):
+        start, until = datetime.date(2026, 3, 4), datetime.date(2027, 3, 3)
+        expected = []
+        day = start
+        while day <= until:
+            if day.weekday() in (1, 4):
+                expected.append(day)
+            day += datetime.timedelta(days=1)
+        self.assertEqual(list(weekly_occurrences(start, [4, 1], until=until)), expected)
+
+    def test_interval_count_and_exclusions(self):
+        dates = list(weekly_occurrences(
+            datetime.date(2026, 3, 2), [0], interval=2, count=4, exclude=[datetime.date(2026, 3, 16)]
+        ))
+        self.assertEqual(dates, [datetime.date(2026, 3, 2), datetime.date(2026, 3, 30), datetime.date(2026, 4, 13)])
+
+    def test_preview_writes_nothing(self):
+        response = self.client.post('/api/treatment-plans/generate_recurrence/', {
+            'patient_id': self.patient.id, 'start_date': '2026-03-02', 'duration_months': 1,
+            'time': '16:00:00', 'days_of_week': [1, 4], 'preview': True,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['appointments_count'], 9)
+        self.assertFalse(TreatmentPlan.objects.exists())
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_generates_plan_in_batches(self):
+        response = self.client.post('/api/treatment-plans/generate_recurrence/', {
+            'patient_id': self.patient.id, 'start_date': '2026-03-02', 'until': '2028-03-01',
+            'time': '16:00:00', 'days_of_week': [0, 2, 4], 'exclude_dates': ['2026-05-01'],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        plan = TreatmentPlan.objects.get(id=response.data['plan_id'])
+        self.assertEqual(plan.appointments.count(), response.data['appointments_count'])
+        self.assertEqual(plan.duration_months, 24)
+        self.assertFalse(plan.appointments.filter(date_time__date=datetime.date(2026, 5, 1)).exists())
+
+    def test_invalid_weekday_is_rejected(self):
+        response = self.client.post('/api/treatment-plans/generate_recurrence/', {
+            'patient_id': self.patient.id, 'start_date': '2026-03-02', 'duration_months': 1,
+            'time': '16:00:00', 'days_of_week': [9],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unbounded_or_empty_slots_are_rejected(self):
+        base = {'patient_id': self.patient.id, 'start_date': '2026-03-02', 'time': '16:00:00', 'days_of_week': [0, 2, 4]}
+        for extra in ({'count': 10 ** 9}, {'until': '9999-12-31'}, {'duration_months': 10 ** 6},
+                      {'count': 3, 'duration_minutes': 0}, {'count': 3, 'duration_minutes': -30}):
+            with self.subTest(**extra):
+                response = self.client.post('/api/treatment-plans/generate_recurrence/', {**base, **extra}, format='json')
+                self.assertEqual(response.status_code, 400)
+        with override_settings(BULK_MAX_ITEMS=3):
+            response = self.client.post('/api/treatment-plans/generate_recurrence/', {**base, 'count': 3}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Appointment.objects.count(), 3)
+
+
+class ConflictDetectionTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.at = lambda day, hour, minute=0: timezone.make_aware(datetime.datetime(2026, 3, day, hour, minute))
+        self.busy = self.make_appointment(self.at(3, 16), duration_minutes=60)   # martes 16-17
+        self.make_appointment(self.at(6, 15), duration_minutes=120)              # viernes 15-17
+        self.make_appointment(self.at(10, 16), status='cancelled')
+
+    def test_sweep_finds_overlaps_in_one_query(self):
+        slots = [
+            (self.at(3, 16, 30), self.at(3, 17, 30)),
+            (self.at(3, 17), self.at(3, 18)),            # empieza justo cuando termina: no choca
+            (self.at(6, 16), self.at(6, 17)),
+            (self.at(10, 16), self.at(10, 17)),          # el único turno está cancelado
+        ]
+        with self.assertNumQueries(1):
+            conflicts = find_conflicts(self.user, slots)
+        self.assertEqual(sorted(conflicts), [0, 2])
+        self.assertEqual(conflicts[0], [self.busy])
+
+    def recurrence(self, **extra):
+        return self.client.post('/api/treatment-plans/generate_recurrence/', {
+            'patient_id': self.patient.id, 'start_date': '2026-03-02', 'duration_months': 1,
+            'time': '16:00:00', 'days_of_week': [1, 4], **extra,
+        }, format='json')
+
+    def test_recurrence_rejects_conflicts_by_default(self):
+        response = self.recurrence()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(response.data['conflicts']), 2)
+        self.assertFalse(TreatmentPlan.objects.exists())
+
+    def test_recurrence_can_skip_conflicts(self):
+        response = self.recurrence(on_conflict='skip')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['appointments_count'], 7)
+
+    def test_create_rejects_overlap(self):
+        payload = {'patient': self.patient.id, 'date_time': self.at(3, 16, 30).isoformat(), 'duration_minutes': 30}
+        response = self.client.post('/api/appointments/', payload, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(response.data['conflicts']), 1)
+        # Con un solo turno, skip no puede omitirlo: rechaza igual
+        self.assertEqual(
+            self.client.post('/api/appointments/?on_conflict=skip', payload, format='json').status_code, 409
+        )
+        self.assertEqual(
+            self.client.post('/api/appointments/?on_conflict=allow', payload, format='json').status_code, 201
+        )
+
+    def test_update_ignores_itself(self):
+        response = self.client.patch(f'/api/appointments/{self.busy.id}/', {'duration_minutes': 45}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class BulkAppointmentTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.at = lambda day, hour, minute=0: timezone.make_aware(datetime.datetime(2026, 3, day, hour, minute))
+        self.busy = self.make_appointment(self.at(3, 16), duration_minutes=60)
+
+    def item(self, day, hour, minute=0, **extra):
+        return {'patient': self.patient.id, 'date_time': self.at(day, hour, minute).isoformat(), 'duration_minutes': 60, **extra}
+
+    def test_create_in_constant_queries(self):
+        items = [self.item(day, 9) for day in range(2, 22)]
+        with self.assertNumQueries(10):
+            response = self.client.post('/api/appointments/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['saved'], 20)
+        self.assertEqual({r['status'] for r in response.data['results']}, {'created'})
+        self.assertEqual(Appointment.objects.count(), 21)
+
+    def test_rejects_whole_batch_on_invalid_item(self):
+        items = [self.item(4, 9), self.item(5, 9, patient=999)]
+        response = self.client.post('/api/appointments/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r['status'] for r in response.data['results']], ['not_saved', 'invalid'])
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_conflicts_with_agenda_and_within_batch(self):
+        items = [self.item(3, 16, 30), self.item(4, 9), self.item(4, 9, 30)]
+        response = self.client.post('/api/appointments/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 409)
+
+        response = self.client.post('/api/appointments/bulk/', {'items': items, 'on_conflict': 'skip'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        first, second, third = response.data['results']
+        self.assertEqual(first['conflicts_with'][0]['id'], self.busy.id)
+        self.assertEqual(second['status'], 'created')
+        self.assertEqual((third['status'], third['conflicts_with_items']), ('conflict', [1]))
+
+    def test_update_and_status(self):
+        other = self.make_appointment(self.at(3, 18))
+        response = self.client.patch('/api/appointments/bulk/', [
+            {'id': self.busy.id, 'notes': 'Traer estudios'}, {'id': other.id, 'date_time': self.at(3, 16, 30).isoformat()},
+            {'id': 12345, 'notes': 'x'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r['status'] for r in response.data['results']], ['not_saved', 'conflict', 'not_found'])
+
+        response = self.client.patch('/api/appointments/bulk/', {'items': [{'id': self.busy.id, 'notes': 'Traer estudios'}]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.notes, 'Traer estudios')
+
+        with self.assertNumQueries(9):
+            response = self.client.post('/api/appointments/bulk-status/', {'ids': [self.busy.id, other.id, 999], 'status': 'cancelled'}, format='json')
+        self.assertEqual([r['status'] for r in response.data['results']], ['updated', 'updated', 'not_found'])
+        self.assertFalse(Appointment.objects.exclude(status='cancelled').exists())
+        response = self.client.post('/api/appointments/bulk-status/', [{'id': self.busy.id}], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class AvailabilityTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        for weekday in range(5):
+            WorkingHours.objects.create(user=self.user, weekday=weekday, start_time=datetime.time(9), end_time=datetime.time(12))
+        self.at = lambda day, hour: timezone.make_aware(datetime.datetime(2026, 3, day, hour))
+
+    def test_subtract_intervals(self):
+        free = [(0, 10), (20, 30)]
+        busy = [(2, 4), (3, 5), (8, 22), (25, 26)]
+        self.assertEqual(availability.subtract_intervals(free, busy), [(0, 2), (5, 8), (22, 25), (26, 30)])
+
+    def test_next_slots_skip_busy_time(self):
+        self.make_appointment(self.at(2, 10))
+        slots = availability.next_free_slots(self.user, 3, 60, after=self.at(2, 8))
+        self.assertEqual([start.hour for start, _ in slots], [9, 11, 9])
+        self.assertEqual(slots[2][0].day, 3)
+
+    def test_cached_week_is_invalidated_by_appointment_changes(self):
+        monday = datetime.date(2026, 3, 2)
+        availability.free_intervals(self.user, monday)
+        with self.assertNumQueries(0):
+            availability.free_intervals(self.user, monday)
+
+        appointment = self.make_appointment(self.at(2, 9))
+        self.assertEqual(availability.free_intervals(self.user, monday)[0][0], self.at(2, 10))
+
+        # Al moverlo a la semana siguiente se liberan las dos semanas
+        appointment.date_time = self.at(9, 9)
+        appointment.save()
+        self.assertEqual(availability.free_intervals(self.user, monday)[0][0], self.at(2, 9))
+        self.assertEqual(availability.free_intervals(self.user, datetime.date(2026, 3, 9))[0][0], self.at(9, 10))
+
+    def test_recurrence_invalidates_cached_weeks(self):
+        monday = datetime.date(2026, 3, 2)
+        self.assertEqual(availability.free_intervals(self.user, monday)[0][0], self.at(2, 9))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/treatment-plans/generate_recurrence/', {
+                'patient_id': self.patient.id, 'start_date': '2026-03-02', 'count': 2,
+                'time': '09:00:00', 'days_of_week': [0],
+            }, format='json')
+        self.assertEqual(availability.free_intervals(self.user, monday)[0][0], self.at(2, 10))
+
+    def test_endpoint(self):
+        response = self.client.get('/api/availability/', {'count': 2, 'duration': 90, 'after': '2026-03-02T09:00'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['slots']), 2)
+        self.assertEqual(response.data['slots'][1]['start'], '2026-03-02T10:30:00+00:00')
+
+
+class MediaTestMixin(AppointmentTestMixin):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        overrides = self.settings(MEDIA_ROOT=media_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+
+class VoiceNoteUploadTests(MediaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        appointment = self.make_appointment(timezone.make_aware(datetime.datetime(2026, 3, 2, 16)))
+        self.session = Session.objects.create(appointment=appointment)
+        self.audio = bytes(range(256)) * 40
+
+    def send_chunk(self, upload_id, offset, data):
+        return self.client.generic(
+            'PATCH', f'/api/voice-note-uploads/{upload_id}/', data,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload(self):
+        response = self.client.post(
+            f'/api/sessions/{self.session.id}/voice-note/uploads/',
+            {'filename': 'sesion.webm', 'size': len(self.audio)}, format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data['upload_id']
+        for offset in range(0, len(self.audio), 4000):
+            response = self.send_chunk(upload_id, offset, self.audio[offset:offset + 4000])
+            self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['completed'])
+        self.session.refresh_from_db()
+
+    def test_chunked_upload_is_resumable(self):
+        response = self.client.post(
+            f'/api/sessions/{self.session.id}/voice-note/uploads/', {'filename': 'a.webm', 'size': 10}, format='json'
+        )
+        upload_id = response.data['upload_id']
+        self.assertEqual(self.send_chunk(upload_id, 0, b'12345').data['offset'], 5)
+        # Un reintento con un offset viejo se rechaza e informa desde dónde seguir
+        conflict = self.send_chunk(upload_id, 0, b'12345')
+        self.assertEqual((conflict.status_code, conflict.data['offset']), (409, 5))
+        self.assertEqual(self.client.get(f'/api/voice-note-uploads/{upload_id}/').data['offset'], 5)
+        self.assertEqual(self.send_chunk(upload_id, 5, b'6789012345').status_code, 400)
+
+    def test_filename_and_size_are_checked_up_front(self):
+        url = f'/api/sessions/{self.session.id}/voice-note/uploads/'
+        for payload in ({'filename': '../../settings.wav', 'size': 10}, {'filename': 'notas.exe', 'size': 10},
+                        {'filename': 'a' * 300 + '.wav', 'size': 10}, {'filename': 'a.wav', 'size': 0},
+                        {'filename': 'a.wav', 'size': 1.5}, {'filename': 'a.wav', 'size': True}):
+            with self.subTest(**payload):
+                self.assertEqual(self.client.post(url, payload, format='json').status_code, 400)
+        self.assertFalse(VoiceNoteUpload.objects.exists())
+        self.assertEqual(self.client.post(url, {'filename': 'Sesión 1.WAV', 'size': 10}, format='json').status_code, 201)
+
+    def test_abandoned_uploads_are_purged(self):
+        response = self.client.post(
+            f'/api/sessions/{self.session.id}/voice-note/uploads/', {'filename': 'a.webm', 'size': 10}, format='json'
+        )
+        fresh = VoiceNoteUpload.objects.get(id=response.data['upload_id'])
+        old = VoiceNoteUpload.objects.create(session=self.session, user=self.user, filename='b.webm', size=10)
+        voice_notes.start_upload(old)
+        VoiceNoteUpload.objects.filter(id=old.id).update(created_at=timezone.now() - datetime.timedelta(days=3))
+        # .part de una subida que ya no existe (la sesión se borró)
+        orphan = os.path.join(os.path.dirname(voice_notes.part_path(old)), 'huerfano.part')
+        open(orphan, 'wb').close()
+        os.utime(orphan, (0, 0))
+
+        call_command('process_audio_jobs', '--once', stdout=io.StringIO())
+        self.assertEqual(list(VoiceNoteUpload.objects.all()), [fresh])
+        self.assertTrue(os.path.exists(voice_notes.part_path(fresh)))
+        self.assertFalse(os.path.exists(voice_notes.part_path(old)) or os.path.exists(orphan))
+
+    def test_upload_then_range_playback(self):
+        self.upload()
+        self.assertTrue(self.session.voice_note.name.startswith('voice_notes/'))
+        url = f'/api/sessions/{self.session.id}/voice-note/'
+
+        response = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.audio)}')
+        self.assertEqual(b''.join(response.streaming_content), self.audio[100:200])
+
+        full = self.client.get(url)
+        self.assertEqual(b''.join(full.streaming_content), self.audio)
+        self.assertEqual(self.client.get(url, HTTP_RANGE=f'bytes={len(self.audio)}-').status_code, 416)
+
+    def test_playback_requires_token_or_signature(self):
+        self.upload()
+        signed_url = self.client.get(f'/api/sessions/{self.session.id}/').data['voice_note_url']
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(f'/api/sessions/{self.session.id}/voice-note/').status_code, 401)
+        response = self.client.get(signed_url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.audio[-10:])
+
+
+def fake_transcode(source, target):
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        dst.write(src.read()[:10])
+
+
+@mock.patch.object(audio, 'analyze', return_value=(12.5, [0.1, 0.9]))
+class AudioJobTests(MediaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        appointment = self.make_appointment(timezone.make_aware(datetime.datetime(2026, 3, 2, 16)))
+        self.session = Session.objects.create(appointment=appointment)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.voice_note.save('sesion.wav', ContentFile(b'RIFF' + b'\0' * 1000))
+        self.original = self.session.voice_note.name
+
+    @mock.patch.object(audio, 'transcode', side_effect=fake_transcode)
+    def test_worker_transcodes_and_drops_original(self, transcode, analyze):
+        self.assertEqual(AudioJob.objects.get().status, 'pending')
+        call_command('process_audio_jobs', '--once', stdout=io.StringIO())
+
+        self.session.refresh_from_db()
+        self.assertTrue(self.session.voice_note.name.endswith('.opus.ogg'))
+        self.assertEqual((self.session.voice_note_duration, self.session.voice_note_peaks), (12.5, [0.1, 0.9]))
+        self.assertFalse(default_storage.exists(self.original))
+        self.assertEqual(AudioJob.objects.get().status, 'done')
+        # Guardar la sesión procesada no vuelve a encolar
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.save()
+        self.assertEqual(AudioJob.objects.count(), 1)
+
+    @mock.patch.object(audio, 'transcode', side_effect=audio.AudioProcessingError('sin ffmpeg'))
+    def test_failure_keeps_original_and_retries_later(self, transcode, analyze):
+        with self.assertLogs('appointments.jobs', 'ERROR'):
+            call_command('process_audio_jobs', '--once', stdout=io.StringIO())
+        job = AudioJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.voice_note.name, self.original)
+        self.assertTrue(default_storage.exists(self.original))
+
+    def test_stale_jobs_count_the_attempt_and_eventually_fail(self, analyze):
+        job = AudioJob.objects.get()
+        abandoned = timezone.now() - jobs.STALE_AFTER - datetime.timedelta(minutes=1)
+        for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+            # Como si el worker hubiera muerto procesándolo
+            AudioJob.objects.filter(pk=job.pk).update(status='running', started_at=abandoned)
+            jobs.claim_next(kinds=['transcribe'])
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNone(jobs.claim_next())
+
+
+@override_settings(
+    TRANSCRIPTION_ENABLED=True, TRANSCRIPTION_ENGINE='appointments.transcription.FakeEngine',
+    TRANSCRIPTION_ENGINE_OPTIONS={}, TRANSCRIPTION_WORKERS=1, TRANSCRIPTION_CHUNK_SECONDS=10,
+)
+@mock.patch.object(audio, 'speech_segments', return_value=[(0.0, 25.0), (40.0, 45.0)])
+@mock.patch.object(audio, 'analyze', return_value=(45.0, [0.5]))
+@mock.patch.object(audio, 'transcode', side_effect=fake_transcode)
+class TranscriptionTests(MediaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        appointment = self.make_appointment(timezone.make_aware(datetime.datetime(2026, 3, 2, 16)))
+        self.session = Session.objects.create(appointment=appointment)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.voice_note.save('sesion.wav', ContentFile(b'RIFF' + b'\0' * 1000))
+
+    def test_transcribes_speech_chunks_in_order_after_transcode(self, transcode, analyze, segments):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_audio_jobs', '--once', stdout=io.StringIO())
+        self.assertEqual(AudioJob.objects.get(kind='transcribe').status, 'pending')
+        call_command('process_audio_jobs', '--once', stdout=io.StringIO())
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.transcript, '[0.0-10.0] [10.0-20.0] [20.0-25.0] [40.0-45.0]')
+        self.assertEqual(self.session.transcript_progress, 1.0)
+        segments.assert_called_once_with(self.session.voice_note.path)
+
+    def test_silent_note_clears_the_indexed_transcript(self, transcode, analyze, segments):
+        self.session.transcript = 'Texto de una grabación anterior'
+        self.session.save()
+        self.assertTrue(SearchDocument.objects.filter(kind='session', object_id=self.session.id).exists())
+        segments.return_value = []
+        jobs.transcribe_session(self.session)
+
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.transcript, self.session.transcript_progress), ('', 1.0))
+        self.assertFalse(SearchDocument.objects.filter(kind='session', object_id=self.session.id).exists())
+
+    def test_manual_transcribe_endpoint(self, transcode, analyze, segments):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/sessions/{self.session.id}/transcribe/')
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(AudioJob.objects.filter(kind='transcribe', status='pending').exists())
+
+
+class SpeechSegmentTests(TestCase):
+    def test_speech_segments_merges_short_gaps(self):
+        quiet, loud = array.array('h', [10] * 800), array.array('h', [8000] * 800)
+        # Ventanas de 100 ms: 2 s de silencio, 1 s de voz, 0.3 s de pausa, 1 s de voz, 2 s de silencio
+        windows = [quiet] * 20 + [loud] * 10 + [quiet] * 3 + [loud] * 10 + [quiet] * 20
+        with mock.patch.object(audio, '_pcm_windows', return_value=iter(windows)):
+            self.assertEqual(audio.speech_segments('nota.ogg'), [(1.8, 4.5)])
+
+    def test_plan_chunks_splits_long_segments(self):
+        self.assertEqual(
+            transcription.plan_chunks([(0, 25), (30, 31)], 10),
+            [(0, 10), (10, 20), (20, 25), (30, 31)],
+        )
@@ -0,0 +1,75 @@
+"""
+Motores de transcripción local (voz a texto) para las notas de voz.
+
+Este módulo no importa modelos de Django: las funciones se ejecutan dentro de un
+ProcessPoolExecutor y tienen que poder cargarse en un proceso hijo sin configurar Django.
+La orquestación (qué tramos, progreso, guardado) está en appointments.jobs.
+
+El motor se elige con TRANSCRIPTION_ENGINE (ruta a la clase) y TRANSCRIPTION_ENGINE_OPTIONS.
+"""
+import importlib
+import subprocess
+
+# Un motor por proceso del pool: cargar un modelo es caro y se reutiliza entre tramos
+_engines = {}
+
+
+class FakeEngine:
+    """Motor determinista para tests y desarrollo: describe el tramo que recibió."""
+
+    def __init__(self, **options):
+        self.options = options
+
+    def transcribe(self, path, start, end):
+        return f'[{start:.1f}-{end:.1f}]'
+
+
+class WhisperEngine:
+    """
+    Whisper local vía faster-whisper (dependencia opcional: `pip install faster-whisper`).
+    Opciones: model ('small'), language ('es'), device ('cpu'), compute_type ('int8'), ffmpeg ('ffmpeg').
+    """
+    SAMPLE_RATE = 16000
+
+    def __init__(self, model='small', language='es', device='cpu', compute_type='int8', ffmpeg='ffmpeg'):
+        from faster_whisper import WhisperModel
+        # Cada proceso del pool usa un hilo: el paralelismo lo da el pool
+        self.model = WhisperModel(model, device=device, compute_type=compute_type, cpu_threads=1)
+        self.language = language
+        self.ffmpeg = ffmpeg
+
+    def transcribe(self, path, start, end):
+        import numpy as np
+        raw = subprocess.run(
+            [self.ffmpeg, '-nostdin', '-ss', f'{start:.3f}', '-t', f'{end - start:.3f}', '-i', path,
+             '-vn', '-ac', '1', '-ar', str(self.SAMPLE_RATE), '-f', 's16le', '-'],
+            check=True, capture_output=True,
+        ).stdout
+        samples = np.frombuffer(raw, dtype='<i2').astype('float32') / 32768
+        segments, _ = self.model.transcribe(samples, language=self.language, vad_filter=False)
+        return ' '.join(segment.text.strip() for segment in segments)
+
+
+def load_engine(engine_path, options):
+    key = (engine_path, tuple(sorted(options.items())))
+    if key not in _engines:
+        module_name, class_name = engine_path.rsplit('.', 1)
+        _engines[key] = getattr(importlib.import_module(module_name), class_name)(**options)
+    return _engines[key]
+
+
+def transcribe_chunk(task):
+    """Punto de entrada en el proceso hijo. `task` = (motor, opciones, archivo, inicio, fin)."""
+    engine_path, options, path, start, end = task
+    return load_engine(engine_path, options).transcribe(path, start, end).strip()
+
+
+def plan_chunks(segments, max_length):
+    """Parte los tramos con voz en pedazos de a lo sumo `max_length` segundos."""
+    chunks = []
+    for start, end in segments:
+        while end - start > max_length:
+            chunks.append((start, start + max_length))
+            start += max_length
+        chunks.append((start, end))
+    return chunks
@@ -1,12 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AppointmentViewSet, TreatmentPlanViewSet, SessionViewSet
+from .views import AppointmentViewSet, TreatmentPlanViewSet, SessionViewSet, WorkingHoursViewSet, AvailabilityView, VoiceNoteUploadView
 
 router = DefaultRouter()
 router.register(r'appointments', AppointmentViewSet, basename='appointment')
 router.register(r'treatment-plans', TreatmentPlanViewSet, basename='treatmentplan')
 router.register(r'sessions', SessionViewSet, basename='session')
+router.register(r'working-hours', WorkingHoursViewSet, basename='workinghours')
 
 urlpatterns = [
+    path('availability/', AvailabilityView.as_view(), name='availability'),
+    path('voice-note-uploads/<uuid:upload_id>/', VoiceNoteUploadView.as_view(), name='voice-note-upload'),
     path('', include(router.urls)),
 ]
@@ -1,25 +1,283 @@
 import datetime
+from itertools import islice
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from rest_framework.permissions import IsAuthenticated
-from .models import TreatmentPlan, Appointment, Session
-from .serializers import TreatmentPlanSerializer, AppointmentSerializer, SessionSerializer
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.views import APIView
+from config.bulk import ERROR_POLICIES, BulkResults, bulk_items, bulk_option, ids_of, item_id
+from config.response_cache import CachedListMixin
+from search import index as search_index
+from sync.changes import record_changes
+from . import availability, jobs, voice_notes
+from .models import TreatmentPlan, Appointment, Session, VoiceNoteUpload, WorkingHours
+from .conflicts import (
+    CONFLICT_POLICIES, FREE_STATUSES, ScheduleConflict, batch_overlaps, find_conflicts, describe_conflicts,
+)
+from .recurrence import weekly_occurrences, occurrence_datetimes
+from .serializers import (
+    TreatmentPlanSerializer, AppointmentSerializer, CalendarAppointmentSerializer, SessionSerializer,
+    WorkingHoursSerializer,
+)
+from patients import summary as patient_summary
 from patients.models import Patient
 
+
+def parse_window_bound(value, param):
+    """
+    Convierte un parámetro `start`/`end` (fecha o fecha-hora ISO 8601) en un datetime aware.
+    Una fecha sola se interpreta como el comienzo de ese día.
+    """
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError
+            parsed = datetime.datetime.combine(day, datetime.time.min)
+    except ValueError:
+        raise ValidationError({param: f'Fecha inválida: {value!r}. Usar formato ISO 8601.'})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def conflict_policy(request):
+    """
+    Qué hacer si los turnos nuevos se superponen con otros del profesional:
+    'reject' (por defecto) no guarda nada, 'skip' omite los que chocan, 'allow' guarda igual.
+    Los conflictos se responden con 409.
+    """
+    return bulk_option(request, 'on_conflict', CONFLICT_POLICIES)
+
+
 class AppointmentViewSet(viewsets.ModelViewSet):
     serializer_class = AppointmentSerializer
     permission_classes = [IsAuthenticated]
+    ordering = ('date_time', 'id')
 
     def get_queryset(self):
         # We only show appointments that belong to the logged-in user
-        return Appointment.objects.filter(user=self.request.user).order_by('date_time')
+        queryset = Appointment.objects.filter(user=self.request.user)
+
+        # Ventana del calendario: ?start=2026-03-02&end=2026-03-09 (end exclusivo).
+        # Usa el índice (user, date_time), así el costo depende de la semana/mes visible.
+        params = self.request.query_params
+        if params.get('start'):
+            queryset = queryset.filter(date_time__gte=parse_window_bound(params['start'], 'start'))
+        if params.get('end'):
+            queryset = queryset.filter(date_time__lt=parse_window_bound(params['end'], 'end'))
+
+        if self.is_calendar_view():
+            queryset = queryset.select_related('patient').only(
+                'id', 'date_time', 'duration_minutes', 'status',
+                'patient__first_name', 'patient__last_name',
+            )
+        else:
+            # patient_name lee el paciente de cada fila: lo traemos en el mismo JOIN
+            queryset = queryset.select_related('patient')
+        return queryset.order_by(*self.ordering)
+
+    def is_calendar_view(self):
+        return self.action == 'list' and self.request.query_params.get('view') == 'calendar'
+
+    def paginate_queryset(self, queryset):
+        # Con start y end la ventana ya acota el resultado; el calendario la necesita completa
+        params = self.request.query_params
+        if self.is_calendar_view() and params.get('start') and params.get('end'):
+            return None
+        return super().paginate_queryset(queryset)
+
+    def get_serializer_class(self):
+        if self.is_calendar_view():
+            return CalendarAppointmentSerializer
+        return AppointmentSerializer
 
     def perform_create(self, serializer):
+        self.check_overlap(serializer)
         serializer.save(user=self.request.user)
 
+    def perform_update(self, serializer):
+        self.check_overlap(serializer)
+        serializer.save()
+
+    def check_overlap(self, serializer):
+        """
+        Rechaza el alta/edición (409) si el turno se superpone con otro del profesional.
+        Con un solo turno no hay nada que omitir: skip rechaza igual que reject.
+        """
+        instance = serializer.instance
+        values = serializer.validated_data
+
+        def current(field, default=None):
+            return values.get(field, getattr(instance, field, default))
+
+        if current('status', 'scheduled') in FREE_STATUSES or conflict_policy(self.request) == 'allow':
+            return
+        start = current('date_time')
+        slots = [(start, start + datetime.timedelta(minutes=current('duration_minutes', 60)))]
+        conflicts = find_conflicts(self.request.user, slots, exclude_ids=[instance.id] if instance else ())
+        if conflicts:
+            raise ScheduleConflict({
+                'message': 'El horario se superpone con otro turno.',
+                'conflicts': describe_conflicts(slots, conflicts),
+            })
+
+    @action(detail=False, methods=['post', 'patch'])
+    def bulk(self, request):
+        """
+        Alta (POST) o edición (PATCH, cada ítem con su "id") de varios turnos en una transacción.
+        Body: [{"patient": 1, "date_time": "...", ...}, ...]
+              o {"items": [...], "on_error": "reject|skip", "on_conflict": "reject|skip|allow"}
+        """
+        user = request.user
+        items = bulk_items(request)
+        on_error = bulk_option(request, 'on_error', ERROR_POLICIES)
+        on_conflict = bulk_option(request, 'on_conflict', CONFLICT_POLICIES)
+        creating = request.method == 'POST'
+
+        instances = {} if creating else Appointment.objects.filter(
+            user=user, id__in=ids_of(items, 'id')
+        ).select_related('patient').in_bulk()
+        context = {**self.get_serializer_context(), 'prefetched': {
+            Patient: Patient.objects.filter(user=user).in_bulk(ids_of(items, 'patient')),
+            TreatmentPlan: TreatmentPlan.objects.filter(user=user).in_bulk(ids_of(items, 'treatment_plan')),
+        }}
+
+        results = BulkResults(len(items))
+        valid = []
+        for index, item in enumerate(items):
+            instance = None
+            if not creating:
+                instance = instances.get(item_id(item))
+                if instance is None:
+                    results.fail(index, 'not_found')
+                    continue
+            serializer = AppointmentSerializer(instance, data=item, partial=not creating, context=context)
+            if serializer.is_valid():
+                valid.append((index, instance, serializer.validated_data))
+            else:
+                results.fail(index, 'invalid', errors=serializer.errors)
+
+        if on_conflict != 'allow':
+            valid = self.drop_bulk_conflicts(valid, results)
+        failures = {results.items[index]['status'] for index in results.failed}
+        if (on_error == 'reject' and failures - {'conflict'}) or (on_conflict == 'reject' and 'conflict' in failures):
+            return results.rejected_response('Hay turnos inválidos o superpuestos; no se guardó ninguno.')
+
+        touched = [instance.date_time for _, instance, _ in valid if instance]
+        patients = {instance.patient_id for _, instance, _ in valid if instance}
+        with transaction.atomic():
+            if creating:
+                appointments = Appointment.objects.bulk_create([Appointment(user=user, **data) for _, _, data in valid])
+            else:
+                appointments, fields = [], set()
+                for _, instance, data in valid:
+                    for field, value in data.items():
+                        setattr(instance, field, value)
+                    fields.update(data)
+                    appointments.append(instance)
+                if fields:
+                    Appointment.objects.bulk_update(appointments, fields)
+            # bulk_create/bulk_update no disparan señales: disponibilidad, búsqueda, sync y resúmenes a mano
+            touched += [appointment.date_time for appointment in appointments]
+            transaction.on_commit(lambda: availability.invalidate_dates(user.id, touched))
+            search_index.update_documents(appointments)
+            record_changes(user.id, 'appointment', [appointment.pk for appointment in appointments])
+            patient_summary.refresh(patients | {appointment.patient_id for appointment in appointments})
+
+        for (index, _, _), appointment in zip(valid, appointments):
+            results.ok(index, 'created' if creating else 'updated', appointment.pk)
+        return results.response(len(appointments), status.HTTP_201_CREATED if creating else status.HTTP_200_OK)
+
+    def drop_bulk_conflicts(self, valid, results):
+        """Marca como 'conflict' los ítems que se superponen con la agenda o entre sí, y los saca."""
+        def current(instance, data, field, default=None):
+            return data.get(field, getattr(instance, field, default))
+
+        occupying = [
+            (index, instance, data) for index, instance, data in valid
+            if current(instance, data, 'status', 'scheduled') not in FREE_STATUSES
+        ]
+        slots = []
+        for _, instance, data in occupying:
+            start = current(instance, data, 'date_time')
+            slots.append((start, start + datetime.timedelta(minutes=current(instance, data, 'duration_minutes', 60))))
+        # Los turnos del lote se comparan entre sí con su horario nuevo, no con el guardado
+        existing = find_conflicts(self.request.user, slots, exclude_ids=[i.id for _, i, _ in valid if i])
+        internal = batch_overlaps(slots)
+
+        conflicting = set()
+        for position in set(existing) | set(internal):
+            index = occupying[position][0]
+            conflicting.add(index)
+            described = describe_conflicts(slots, {position: existing.get(position, [])})[0]
+            results.fail(
+                index, 'conflict', conflicts_with=described['conflicts_with'],
+                conflicts_with_items=[occupying[other][0] for other in internal.get(position, [])],
+            )
+        return [entry for entry in valid if entry[0] not in conflicting]
+
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """
+        Cambia el estado de varios turnos con un solo UPDATE.
+        Body: {"ids": [1, 2, 3], "status": "completed", "on_conflict": "reject|skip|allow"}
+        """
+        user = request.user
+        if not isinstance(request.data, dict):
+            raise ValidationError({'non_field_errors': 'Se espera un objeto {"ids": [...], "status": "..."}.'})
+        new_status = request.data.get('status')
+        if new_status not in dict(Appointment.STATUS_CHOICES):
+            raise ValidationError({'status': f'Debe ser uno de: {", ".join(dict(Appointment.STATUS_CHOICES))}.'})
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids or len(ids) > settings.BULK_MAX_ITEMS:
+            raise ValidationError({'ids': f'Se espera una lista de 1 a {settings.BULK_MAX_ITEMS} ids.'})
+        policy = conflict_policy(request)
+
+        rows = {
+            row[0]: row for row in Appointment.objects.filter(user=user, id__in=[i for i in ids if isinstance(i, int)])
+            .values_list('id', 'date_time', 'duration_minutes', 'status', 'patient_id')
+        }
+        results = BulkResults(len(ids))
+        positions = {}
+        for index, appointment_id in enumerate(ids):
+            row = rows.get(appointment_id) if isinstance(appointment_id, int) else None
+            if row is None:
+                results.fail(index, 'not_found')
+            else:
+                positions.setdefault(appointment_id, index)
+
+        # Solo pueden chocar los que pasan de un estado libre a uno que ocupa el horario
+        if new_status not in FREE_STATUSES and policy != 'allow':
+            reviving = [rows[i] for i in positions if rows[i][3] in FREE_STATUSES]
+            slots = [(dt, dt + datetime.timedelta(minutes=minutes)) for _, dt, minutes, _, _ in reviving]
+            existing = find_conflicts(user, slots, exclude_ids=[row[0] for row in reviving])
+            for position in set(existing) | set(batch_overlaps(slots)):
+                appointment_id = reviving[position][0]
+                results.fail(positions.pop(appointment_id), 'conflict')
+        if policy == 'reject' and any(results.items[i]['status'] == 'conflict' for i in results.failed):
+            return results.rejected_response('Algunos turnos se superponen con otros; no se cambió ninguno.')
+
+        with transaction.atomic():
+            Appointment.objects.filter(user=user, id__in=list(positions)).update(status=new_status)
+            record_changes(user.id, 'appointment', positions)
+            patient_summary.refresh(rows[i][4] for i in positions)
+            dates = [rows[i][1] for i in positions]
+            transaction.on_commit(lambda: availability.invalidate_dates(user.id, dates))
+        for appointment_id, index in positions.items():
+            results.ok(index, 'updated', appointment_id)
+        return results.response(len(positions))
+
     @action(detail=True, methods=['get', 'post'])
     def session(self, request, pk=None):
         """
@@ -31,16 +289,21 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         session, created = Session.objects.get_or_create(appointment=appointment)
         return Response(SessionSerializer(session).data)
 
-class TreatmentPlanViewSet(viewsets.ModelViewSet):
+class TreatmentPlanViewSet(CachedListMixin, viewsets.ModelViewSet):
     serializer_class = TreatmentPlanSerializer
     permission_classes = [IsAuthenticated]
+    ordering = ('-created_at', '-id')
+    cache_scope = 'treatment_plans'
 
     def get_queryset(self):
-        return TreatmentPlan.objects.filter(user=self.request.user).order_by('-created_at')
+        return TreatmentPlan.objects.filter(user=self.request.user).order_by(*self.ordering)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    # Tamaño de lote para bulk_create: evita un INSERT gigante en planes largos
+    RECURRENCE_BATCH_SIZE = 500
+
     @action(detail=False, methods=['post'])
     def generate_recurrence(self, request):
         """
@@ -54,43 +317,89 @@ class TreatmentPlanViewSet(viewsets.ModelViewSet):
             "duration_minutes": 60,
             "days_of_week": [1, 4]  # 1 = Martes, 4 = Viernes (0 es Lunes según date.weekday())
         }
+        Opcionales (regla estilo RRULE):
+            "interval": 2,                       # cada 2 semanas
+            "count": 20,                         # en lugar de duration_months: cantidad de turnos
+            "until": "2026-12-18",               # en lugar de duration_months: última fecha (inclusive)
+            "exclude_dates": ["2026-05-01"],     # feriados u otras fechas a omitir
+            "preview": true,                     # solo devuelve las fechas, no guarda nada
+            "on_conflict": "skip"                # si chocan con otros turnos: reject (defecto) | skip | allow
+        Una regla que genera más de BULK_MAX_ITEMS turnos se rechaza con 400.
         """
         user = request.user
         data = request.data
 
         try:
-            patient = Patient.objects.get(id=data['patient_id'])
+            patient = Patient.objects.get(id=data['patient_id'], user=user)
             start_date = datetime.datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-            duration_months = int(data['duration_months'])
             time_obj = datetime.datetime.strptime(data['time'], '%H:%M:%S').time()
             duration_minutes = int(data.get('duration_minutes', 60))
+            if duration_minutes <= 0:
+                raise ValueError('duration_minutes debe ser mayor a 0.')
             days_of_week = [int(d) for d in data['days_of_week']]
-        except (KeyError, ValueError, Patient.DoesNotExist) as e:
+            interval = int(data.get('interval', 1))
+            exclude_dates = [datetime.datetime.strptime(d, '%Y-%m-%d').date() for d in data.get('exclude_dates', [])]
+
+            count = int(data['count']) if data.get('count') else None
+            until = datetime.datetime.strptime(data['until'], '%Y-%m-%d').date() if data.get('until') else None
+            if count is None and until is None:
+                duration_months = int(data['duration_months'])
+                # El período de duration_months excluye el día final
+                until = start_date + relativedelta(months=duration_months) - datetime.timedelta(days=1)
+
+            # count y until no tienen techo: se corta en uno más que el máximo para detectar el exceso
+            rule = weekly_occurrences(start_date, days_of_week, interval, count, until, exclude_dates)
+            dates = list(islice(rule, settings.BULK_MAX_ITEMS + 1))
+            if len(dates) > settings.BULK_MAX_ITEMS:
+                raise ValueError(f'La regla genera más de {settings.BULK_MAX_ITEMS} turnos.')
+        except (KeyError, ValueError, TypeError, OverflowError, Patient.DoesNotExist) as e:
             return Response({'error': str(e), 'message': 'Payload inválido.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        end_date = start_date + relativedelta(months=duration_months)
-        
-        # Guardar el plan agrupador
-        plan = TreatmentPlan.objects.create(
-            user=user,
-            patient=patient,
-            start_date=start_date,
-            duration_months=duration_months,
-            sessions_per_week=len(days_of_week)
-        )
-
-        # Lógica inteligente de recurrencia
-        current_date = start_date
-        appointments_to_create = []
-
-        while current_date < end_date:
-            if current_date.weekday() in days_of_week:
-                # Es un día seleccionado, armamos el datetime
-                dt = datetime.datetime.combine(current_date, time_obj)
-                
-                # Ignorar posibles feriados (aquí se podría conectar a feriados_api)
-                
-                appointments_to_create.append(
+        occurrences = occurrence_datetimes(dates, time_obj)
+        policy = conflict_policy(request)
+
+        # Una sola consulta trae la agenda del período; el cruce se hace en memoria
+        slots = [(dt, dt + datetime.timedelta(minutes=duration_minutes)) for dt in occurrences]
+        conflicts = find_conflicts(user, slots) if policy != 'allow' else {}
+        conflict_list = describe_conflicts(slots, conflicts)
+
+        if str(data.get('preview', '')).lower() in ('1', 'true'):
+            return Response({
+                'preview': True,
+                'appointments_count': len(occurrences),
+                'occurrences': [dt.isoformat() for dt in occurrences],
+                'conflicts': conflict_list,
+            })
+
+        if conflicts and policy == 'reject':
+            return Response({
+                'message': f'{len(conflicts)} turnos se superponen con otros ya agendados. No se generó el plan.',
+                'conflicts': conflict_list,
+            }, status=status.HTTP_409_CONFLICT)
+        if conflicts:
+            dates = [d for i, d in enumerate(dates) if i not in conflicts]
+            occurrences = [dt for i, dt in enumerate(occurrences) if i not in conflicts]
+
+        if 'duration_months' in data:
+            duration_months = int(data['duration_months'])
+        else:
+            last_date = dates[-1] if dates else start_date
+            span = relativedelta(last_date, start_date)
+            duration_months = span.years * 12 + span.months + 1
+
+        with transaction.atomic():
+            # Guardar el plan agrupador
+            plan = TreatmentPlan.objects.create(
+                user=user,
+                patient=patient,
+                start_date=start_date,
+                duration_months=duration_months,
+                sessions_per_week=len(set(days_of_week))
+            )
+
+            # Inserción masiva por lotes, todo en una sola transacción
+            appointments = Appointment.objects.bulk_create(
+                (
                     Appointment(
                         patient=patient,
                         user=user,
@@ -99,22 +408,166 @@ class TreatmentPlanViewSet(viewsets.ModelViewSet):
                         duration_minutes=duration_minutes,
                         status='scheduled'
                     )
-                )
-            current_date += datetime.timedelta(days=1)
-
-        # Inserción masiva para optimizar la DB
-        Appointment.objects.bulk_create(appointments_to_create)
+                    for dt in occurrences
+                ),
+                batch_size=self.RECURRENCE_BATCH_SIZE,
+            )
+            # bulk_create no dispara post_save: invalidamos a mano las semanas tocadas
+            transaction.on_commit(lambda: availability.invalidate_dates(user.id, occurrences))
+            record_changes(user.id, 'appointment', [appointment.pk for appointment in appointments])
+            patient_summary.refresh([patient.id])
 
         return Response({
-            'message': f'Se generaron {len(appointments_to_create)} turnos exitosamente.',
+            'message': f'Se generaron {len(occurrences)} turnos exitosamente.',
             'plan_id': plan.id,
-            'appointments_count': len(appointments_to_create)
+            'appointments_count': len(occurrences),
+            'skipped_conflicts': conflict_list,
         }, status=status.HTTP_201_CREATED)
 
 class SessionViewSet(viewsets.ModelViewSet):
     serializer_class = SessionSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser] # Soporte para envío de Audio Files
+    ordering = ('-created_at', '-id')
 
     def get_queryset(self):
-        return Session.objects.filter(appointment__user=self.request.user)
+        # evaluations_count se resuelve con un COUNT agrupado en vez de una consulta por sesión
+        return Session.objects.filter(appointment__user=self.request.user).annotate(
+            evaluations_total=Count('evaluations')
+        ).order_by(*self.ordering)
+
+    @action(detail=True, methods=['post'], url_path='voice-note/uploads', url_name='voice-note-uploads')
+    def start_voice_note_upload(self, request, pk=None):
+        """
+        Inicia una subida por partes de la nota de voz (ver appointments.voice_notes).
+        Payload: {"filename": "sesion.webm", "size": 52428800}
+        """
+        session = self.get_object()
+        try:
+            filename = str(request.data['filename'])
+            # Vía str(): un booleano o un float no pasan por un tamaño en bytes
+            size = int(str(request.data['size']))
+        except (KeyError, ValueError, TypeError):
+            raise ValidationError({'detail': 'Se requieren filename y size (bytes).'})
+        if not 0 < size <= settings.VOICE_NOTE_MAX_UPLOAD_SIZE:
+            raise ValidationError({'size': f'Debe estar entre 1 y {settings.VOICE_NOTE_MAX_UPLOAD_SIZE} bytes.'})
+        try:
+            voice_notes.check_filename(filename)
+        except ValueError as e:
+            raise ValidationError({'filename': str(e)})
+
+        upload = VoiceNoteUpload.objects.create(session=session, user=request.user, filename=filename, size=size)
+        voice_notes.start_upload(upload)
+        return Response({'upload_id': upload.id, 'offset': 0, 'size': size}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], url_path='voice-note', url_name='voice-note',
+            permission_classes=[AllowAny])
+    def voice_note(self, request, pk=None):
+        """
+        Reproduce la nota de voz con soporte de Range. Requiere el token o una firma ?sig= vigente
+        (la que devuelve `voice_note_url` en el serializer).
+        """
+        if request.user.is_authenticated:
+            session = get_object_or_404(Session, pk=pk, appointment__user=request.user)
+        elif voice_notes.check_signature(pk, request.query_params.get('sig', '')):
+            session = get_object_or_404(Session, pk=pk)
+        else:
+            return Response({'detail': 'Autenticación requerida.'}, status=status.HTTP_401_UNAUTHORIZED)
+        if not session.voice_note:
+            raise NotFound('La sesión no tiene nota de voz.')
+        return voice_notes.serve_file(request, session.voice_note)
+
+    @action(detail=True, methods=['post'])
+    def transcribe(self, request, pk=None):
+        """Encola (o vuelve a encolar) la transcripción de la nota de voz."""
+        session = self.get_object()
+        if not session.voice_note:
+            raise ValidationError({'detail': 'La sesión no tiene nota de voz.'})
+        jobs.enqueue(session, 'transcribe')
+        return Response({'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
+
+class VoiceNoteUploadView(APIView):
+    """
+    Estado (GET), envío de un tramo (PATCH, cuerpo crudo + header Upload-Offset) o descarte (DELETE)
+    de una subida por partes.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_upload(self, upload_id, for_update=False):
+        queryset = VoiceNoteUpload.objects.filter(user=self.request.user, completed_at__isnull=True)
+        if for_update:
+            queryset = queryset.select_for_update()
+        return get_object_or_404(queryset, pk=upload_id)
+
+    def get(self, request, upload_id):
+        upload = self.get_upload(upload_id)
+        return Response({'upload_id': upload.id, 'offset': upload.offset, 'size': upload.size})
+
+    def patch(self, request, upload_id):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            raise ValidationError({'detail': 'Falta el header Upload-Offset.'})
+
+        with transaction.atomic():
+            upload = self.get_upload(upload_id, for_update=True)
+            remaining = upload.size - upload.offset
+            if int(request.headers.get('Content-Length') or 0) > remaining:
+                raise ValidationError({'detail': f'El tramo excede el tamaño declarado (restan {remaining} bytes).'})
+            try:
+                voice_notes.append_chunk(upload, request.stream, offset, remaining)
+            except voice_notes.UploadOffsetMismatch:
+                return Response(
+                    {'detail': 'Offset incorrecto; retomar desde el indicado.', 'offset': upload.offset},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            if upload.offset == upload.size:
+                voice_notes.finish_upload(upload)
+            upload.save(update_fields=['offset', 'completed_at'])
+
+        return Response({'upload_id': upload.id, 'offset': upload.offset, 'completed': upload.completed_at is not None})
+
+    def delete(self, request, upload_id):
+        upload = self.get_upload(upload_id)
+        voice_notes.discard_upload(upload)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class WorkingHoursViewSet(viewsets.ModelViewSet):
+    serializer_class = WorkingHoursSerializer
+    permission_classes = [IsAuthenticated]
+    ordering = ('weekday', 'start_time', 'id')
+
+    def get_queryset(self):
+        return WorkingHours.objects.filter(user=self.request.user).order_by(*self.ordering)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+class AvailabilityView(APIView):
+    """
+    Próximos huecos libres del profesional según su horario de atención.
+    GET /api/availability/?count=5&duration=60&after=2026-03-02T09:00
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_COUNT = 50
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            count = min(int(params.get('count', 5)), self.MAX_COUNT)
+            duration = int(params.get('duration', 60))
+            if count < 1 or duration < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({'detail': 'count y duration deben ser enteros positivos.'})
+        after = parse_window_bound(params['after'], 'after') if params.get('after') else None
+
+        slots = availability.next_free_slots(request.user, count, duration, after)
+        response = {
+            'duration_minutes': duration,
+            'slots': [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in slots],
+        }
+        if not WorkingHours.objects.filter(user=request.user).exists():
+            response['detail'] = 'No hay horario de atención cargado; configuralo en /api/working-hours/.'
+        return Response(response)
@@ -0,0 +1,253 @@
+"""
+Subida por partes y reproducción de las notas de voz de las sesiones.
+
+Subida (protocolo tipo tus, reanudable):
+    POST  /api/sessions/<id>/voice-note/uploads/   {"filename": "...", "size": 123456}
+          -> {"upload_id": "...", "offset": 0}
+    PATCH /api/voice-note-uploads/<upload_id>/     cuerpo = bytes crudos, header Upload-Offset: N
+          -> {"offset": N + len(cuerpo), "completed": bool}
+    GET   /api/voice-note-uploads/<upload_id>/     -> offset actual, para retomar tras un corte
+
+Validación y limpieza:
+    El nombre y el tamaño se validan al crear la subida, no al terminarla. Los `.part` de
+    subidas abandonadas (o de sesiones borradas) los elimina purge_stale_uploads(), que
+    corre el worker de process_audio_jobs.
+
+Reproducción:
+    GET /api/sessions/<id>/voice-note/   con soporte de Range (206 Partial Content).
+    Acepta el token en el header o una firma temporal ?sig=... (el <audio> del navegador
+    no puede mandar headers de autenticación).
+"""
+import datetime
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import VoiceNoteUpload
+
+# Bytes leídos por iteración al copiar el cuerpo de la request al disco
+COPY_BUFFER_SIZE = 64 * 1024
+UPLOADS_DIR = 'voice_notes/uploads'
+SIGNATURE_SALT = 'appointments.voice_note'
+AUDIO_EXTENSIONS = ('.wav', '.webm', '.ogg', '.oga', '.opus', '.mp3', '.m4a', '.aac', '.flac')
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadOffsetMismatch(Exception):
+    pass
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Subida por partes
+# ---------------------------------------------------------------------------
+
+def check_filename(filename):
+    """Nombre de archivo de audio sin rutas; ValueError con el motivo si no sirve."""
+    if not filename or os.path.basename(filename) != filename or '\\' in filename or filename in ('.', '..'):
+        raise ValueError('Debe ser un nombre de archivo, sin carpetas.')
+    if len(filename) > VoiceNoteUpload._meta.get_field('filename').max_length:
+        raise ValueError('Nombre de archivo demasiado largo.')
+    if os.path.splitext(filename)[1].lower() not in AUDIO_EXTENSIONS:
+        raise ValueError(f"Extensión no admitida. Se aceptan: {', '.join(AUDIO_EXTENSIONS)}.")
+
+
+def part_path(upload):
+    return default_storage.path(f'{UPLOADS_DIR}/{upload.id}.part')
+
+
+def start_upload(upload):
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+
+def append_chunk(upload, stream, offset, max_bytes):
+    """
+    Copia `stream` al final del archivo parcial sin cargarlo entero en memoria.
+    `offset` debe coincidir con lo ya recibido; si no, el cliente tiene que consultar y reintentar.
+    """
+    if offset != upload.offset:
+        raise UploadOffsetMismatch(upload.offset)
+    written = 0
+    with open(part_path(upload), 'r+b') as part:
+        # Un intento previo pudo dejar bytes de más sin registrar: se descartan
+        part.truncate(upload.offset)
+        part.seek(upload.offset)
+        while written < max_bytes:
+            block = stream.read(min(COPY_BUFFER_SIZE, max_bytes - written))
+            if not block:
+                break
+            part.write(block)
+            written += len(block)
+        part.flush()
+        os.fsync(part.fileno())
+    upload.offset += written
+    return written
+
+
+def finish_upload(upload):
+    """Mueve el archivo completo al FileField de la sesión (rename, sin copiar bytes)."""
+    session = upload.session
+    field = session.voice_note.field
+    name = default_storage.get_available_name(
+        field.generate_filename(session, upload.filename), max_length=field.max_length
+    )
+    final_path = default_storage.path(name)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(part_path(upload), final_path)
+    session.voice_note.name = name
+    session.save(update_fields=['voice_note', 'updated_at'])
+    upload.completed_at = timezone.now()
+
+
+def discard_upload(upload):
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def purge_stale_uploads():
+    """
+    Borra las subidas sin completar más viejas que VOICE_NOTE_UPLOAD_MAX_AGE con su `.part`,
+    y los `.part` que quedaron sin subida (sesión borrada, corte entre el rename y el save).
+    Devuelve cuántas subidas descartó.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.VOICE_NOTE_UPLOAD_MAX_AGE)
+    stale = list(VoiceNoteUpload.objects.filter(completed_at__isnull=True, created_at__lt=cutoff))
+    for upload in stale:
+        discard_upload(upload)
+    VoiceNoteUpload.objects.filter(id__in=[upload.id for upload in stale]).delete()
+    removed = len(stale)
+
+    directory = default_storage.path(UPLOADS_DIR)
+    if not os.path.isdir(directory):
+        return removed
+    pending = {str(pk) for pk in VoiceNoteUpload.objects.filter(completed_at__isnull=True).values_list('id', flat=True)}
+    for entry in os.scandir(directory):
+        upload_id, extension = os.path.splitext(entry.name)
+        # Solo huérfanos con cierta antigüedad: la fila se crea antes que el archivo, pero
+        # puede no estar confirmada todavía
+        if extension != '.part' or upload_id in pending:
+            continue
+        if entry.stat().st_mtime < cutoff.timestamp():
+            os.remove(entry.path)
+            removed += 1
+    return removed
+
+
+# ---------------------------------------------------------------------------
+# Reproducción
+# ---------------------------------------------------------------------------
+
+def playback_url(session):
+    """URL relativa y firmada para reproducir la nota de voz sin header de autenticación."""
+    signature = signing.TimestampSigner(salt=SIGNATURE_SALT).sign(str(session.pk))
+    return f"{reverse('session-voice-note', args=[session.pk])}?sig={signature}"
+
+
+def check_signature(session_pk, signature):
+    try:
+        value = signing.TimestampSigner(salt=SIGNATURE_SALT).unsign(
+            signature, max_age=settings.VOICE_NOTE_URL_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return value == str(session_pk)
+
+
+def parse_range(header, size):
+    """
+    Interpreta un header `Range: bytes=a-b` de un solo rango.
+    Devuelve (inicio, fin) inclusivos, o None si hay que mandar el archivo completo.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Múltiples rangos u otra unidad: se ignora y se manda todo (permitido por RFC 9110)
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Sufijo: los últimos N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class RangeFileWrapper:
+    """
+    Lector acotado a [inicio, fin] de un archivo.
+    No expone fileno() a propósito: si lo hiciera, el file_wrapper del servidor WSGI
+    usaría sendfile() sobre el archivo completo e ignoraría el rango.
+    """
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=COPY_BUFFER_SIZE):
+        if self.remaining <= 0:
+            return b''
+        data = self.file.read(min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def serve_file(request, fieldfile):
+    """
+    Responde con el archivo completo (FileResponse, que el servidor WSGI envía con sendfile)
+    o con el rango pedido (206). Si VOICE_NOTE_SENDFILE_HEADER está configurado, delega
+    el envío al servidor web (X-Accel-Redirect / X-Sendfile), que resuelve los rangos solo.
+    """
+    content_type = mimetypes.guess_type(fieldfile.name)[0] or 'application/octet-stream'
+
+    sendfile_header = settings.VOICE_NOTE_SENDFILE_HEADER
+    if sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        if sendfile_header == 'X-Accel-Redirect':
+            response[sendfile_header] = f"{settings.VOICE_NOTE_SENDFILE_PREFIX.rstrip('/')}/{fieldfile.name}"
+        else:
+            response[sendfile_header] = fieldfile.path
+        return response
+
+    size = fieldfile.size
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = fieldfile.storage.open(fieldfile.name, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFileWrapper(file, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
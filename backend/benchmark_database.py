@@ -0,0 +1,159 @@
+"""
+Benchmark de concurrencia de la base de datos: varios hilos, cada uno con su conexión,
+repiten requests cortas (lecturas, y escrituras en una transacción) durante unos segundos.
+
+    python benchmark_database.py                   # la base configurada (DB_ENGINE, ver config/database.py)
+    python benchmark_database.py --compare-sqlite  # SQLite de fábrica vs afinado, en un archivo temporal
+    python benchmark_database.py --threads 16 --seconds 20 --write-ratio 0.3
+
+Escribe en una tabla propia (bench_scratch) que se borra al terminar.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+from config.database import database_config
+
+TABLE = 'bench_scratch'
+PAYLOAD = 'x' * 200
+ID_COLUMN = {'sqlite': 'id INTEGER PRIMARY KEY AUTOINCREMENT', 'postgresql': 'id BIGSERIAL PRIMARY KEY'}
+
+
+def register(alias, config):
+    """Agrega `alias` a las conexiones de Django (una por hilo, como en el servidor)."""
+    connections.settings[alias] = connections.configure_settings({'default': config, alias: config})[alias]
+
+
+def create_table(alias):
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        cursor.execute(
+            f'CREATE TABLE {TABLE} ({ID_COLUMN[connection.vendor]}, worker INTEGER NOT NULL, payload TEXT NOT NULL)'
+        )
+        cursor.execute(f'CREATE INDEX {TABLE}_worker_idx ON {TABLE} (worker, id)')
+
+
+def drop_table(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+    connections[alias].close()
+
+
+def request(alias, worker, threads, is_write):
+    if is_write:
+        # Como un save() con sus señales: varias sentencias en una transacción
+        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+            cursor.execute(f'INSERT INTO {TABLE} (worker, payload) VALUES (%s, %s)', [worker, PAYLOAD])
+            cursor.execute(f'SELECT COUNT(*) FROM {TABLE} WHERE worker = %s', [worker])
+            cursor.execute(f'INSERT INTO {TABLE} (worker, payload) VALUES (%s, %s)', [worker, PAYLOAD])
+    else:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                f'SELECT id, payload FROM {TABLE} WHERE worker = %s ORDER BY id DESC LIMIT 20',
+                [random.randrange(threads)],
+            )
+            cursor.fetchall()
+
+
+def run_worker(alias, worker, threads, deadline, write_ratio, results):
+    rng = random.Random(worker)
+    latencies, writes, errors = [], 0, 0
+    try:
+        while time.perf_counter() < deadline:
+            is_write = rng.random() < write_ratio
+            started = time.perf_counter()
+            try:
+                request(alias, worker, threads, is_write)
+            except DatabaseError:
+                # "database is locked" en SQLite sin afinar
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            writes += is_write
+    finally:
+        connections[alias].close()
+    results.append((latencies, writes, errors))
+
+
+def benchmark(alias, threads, seconds, write_ratio):
+    create_table(alias)
+    results = []
+    deadline = time.perf_counter() + seconds
+    workers = [
+        threading.Thread(target=run_worker, args=(alias, worker, threads, deadline, write_ratio, results))
+        for worker in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    drop_table(alias)
+
+    latencies = sorted(latency for worker_latencies, _, _ in results for latency in worker_latencies)
+    percentile = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 if latencies else 0.0
+    return {
+        'requests/s': len(latencies) / seconds,
+        'writes/s': sum(writes for _, writes, _ in results) / seconds,
+        'p50 ms': percentile(0.5),
+        'p95 ms': percentile(0.95),
+        'max ms': latencies[-1] * 1000 if latencies else 0.0,
+        'errors': sum(errors for _, _, errors in results),
+    }
+
+
+def print_table(rows):
+    columns = ['requests/s', 'writes/s', 'p50 ms', 'p95 ms', 'max ms', 'errors']
+    width = max(len(name) for name in rows) + 2
+    print('perfil'.ljust(width) + ''.join(column.rjust(12) for column in columns))
+    for name, stats in rows.items():
+        print(name.ljust(width) + ''.join(
+            (f'{stats[column]:12d}' if column == 'errors' else f'{stats[column]:12.1f}') for column in columns
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='Fracción de requests que escriben.')
+    parser.add_argument('--compare-sqlite', action='store_true', help='SQLite sin afinar vs afinado (archivo temporal).')
+    args = parser.parse_args()
+
+    profiles = {}
+    if args.compare_sqlite:
+        directory = tempfile.mkdtemp(prefix='cronovoz-bench-')
+        for name, tuned in (('sqlite (de fábrica)', '0'), ('sqlite (afinado)', '1')):
+            path = os.path.join(directory, f'bench-{tuned}.sqlite3')
+            profiles[name] = database_config({'DB_ENGINE': 'sqlite', 'DB_NAME': path, 'DB_SQLITE_TUNED': tuned})
+    else:
+        directory = None
+        default = settings.DATABASES['default']
+        profiles[f"{default['ENGINE'].rsplit('.', 1)[-1]} (configurado)"] = dict(default)
+
+    print(f'{args.threads} hilos, {args.seconds:g} s, {args.write_ratio:.0%} escrituras\n')
+    rows = {}
+    try:
+        for index, (name, config) in enumerate(profiles.items()):
+            alias = f'bench_{index}'
+            register(alias, config)
+            rows[name] = benchmark(alias, args.threads, args.seconds, args.write_ratio)
+    finally:
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
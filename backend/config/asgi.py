@@ -3,6 +3,9 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Un solo proceso atiende muchas conexiones lentas:
+    uvicorn config.asgi:application --workers 1
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -12,5 +15,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Calendario, pacientes y detalle de sesión como vistas async (ver config/asyncapi.py)
+os.environ.setdefault('ASYNC_READ_VIEWS', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,27 @@
+"""
+URLs del modo ASGI: las lecturas más pedidas van a vistas async (ver config/asyncapi.py)
+y se agrega el canal en vivo /api/sync/events/; todo lo demás es igual que en config/urls.py.
+"""
+from django.urls import path
+
+from appointments.async_views import calendar_window, session_detail
+from appointments.views import AppointmentViewSet, SessionViewSet
+from patients.async_views import patient_list
+from patients.views import PatientViewSet
+from sync.events import change_events
+from .asyncapi import async_read
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/appointments/', async_read(
+        calendar_window, AppointmentViewSet.as_view({'get': 'list', 'post': 'create'}),
+    )),
+    path('api/patients/', async_read(
+        patient_list, PatientViewSet.as_view({'get': 'list', 'post': 'create'}),
+    )),
+    path('api/sessions/<int:pk>/', async_read(
+        session_detail,
+        SessionViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}),
+    )),
+    path('api/sync/events/', change_events, name='sync-events'),
+] + sync_urlpatterns
@@ -0,0 +1,64 @@
+"""
+Vistas async para los endpoints de lectura más pedidos, en el modo ASGI (ASYNC_READ_VIEWS,
+que config/asgi.py activa; ver config/asgi_urls.py).
+
+Con WSGI cada conexión ocupa un hilo del worker mientras dura: un celular con mala señal
+que tarda en mandar el request o en leer la respuesta tiene un hilo tomado todo ese tiempo.
+Con ASGI esas esperas las hace el event loop, así un solo proceso atiende muchas conexiones
+lentas a la vez. El calendario y el detalle de sesión consultan con el ORM async; el listado
+de pacientes pasa entero por sync_to_async (ver patients/async_views.py).
+
+async_read() junta una lectura async con la vista DRF de siempre: el GET lo resuelve la
+función async (si devuelve None, porque no maneja esos parámetros, sigue la vista DRF) y el
+resto de los métodos va directo a DRF. Las vistas async reusan el queryset y el serializer
+del ViewSet, así que responden exactamente lo mismo.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json', headers=headers)
+
+
+def error_response(exc, drf_request=None):
+    """Lo mismo que respondería el exception handler de DRF."""
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    headers = None
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers = {'WWW-Authenticate': api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]().authenticate_header(drf_request)}
+    return json_response(data, exc.status_code, headers)
+
+
+async def authenticated_request(request):
+    """Request de DRF con el usuario ya autenticado (con la caché de tokens no toca la base)."""
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    user = await sync_to_async(lambda: drf_request.user)()
+    if not user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+    return drf_request
+
+
+def viewset_for(viewset_class, drf_request, action, **kwargs):
+    """Instancia del ViewSet como la arma DRF, para reusar get_queryset() y get_serializer()."""
+    return viewset_class(request=drf_request, action=action, args=(), kwargs=kwargs, format_kwarg=None)
+
+
+def async_read(read, fallback):
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET':
+            try:
+                response = await read(request, *args, **kwargs)
+            except Http404:
+                return error_response(exceptions.NotFound())
+            except exceptions.APIException as e:
+                return error_response(e, request)
+            if response is not None:
+                return response
+        return await sync_to_async(fallback)(request, *args, **kwargs)
+    return csrf_exempt(view)
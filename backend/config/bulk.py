@@ -0,0 +1,97 @@
+"""
+Escrituras en lote: varios ítems en un solo request y una sola transacción.
+
+El cuerpo es una lista de ítems o {"items": [...], <opciones>}; la respuesta trae el
+resultado de cada ítem en el mismo orden ({"index", "status", "id" | "errors"}).
+Con on_error=reject (por defecto) un ítem inválido cancela todo el lote; con skip se
+guardan los válidos y se informan los demás.
+
+Los serializers validan ítem por ítem, pero las relaciones se buscan de una vez: ver
+PrefetchedPrimaryKeyRelatedField.
+"""
+from django.conf import settings
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+ERROR_POLICIES = ('reject', 'skip')
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Busca primero en context['prefetched'][Modelo] = {pk: instancia}, cargado con una consulta
+    por modelo para todo el lote. Sin eso se comporta como PrimaryKeyRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.get_queryset().model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return prefetched[int(data)]
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+def bulk_items(request):
+    data = request.data
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        raise ValidationError({'items': 'Se espera una lista no vacía de objetos.'})
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise ValidationError({'items': f'Máximo {settings.BULK_MAX_ITEMS} ítems por lote.'})
+    return items
+
+
+def bulk_option(request, name, choices):
+    """Opción del lote (en el cuerpo o en la query string); la primera de `choices` es el defecto."""
+    data = request.data if isinstance(request.data, dict) else {}
+    value = data.get(name) or request.query_params.get(name) or choices[0]
+    if value not in choices:
+        raise ValidationError({name: f'Debe ser uno de: {", ".join(choices)}.'})
+    return value
+
+
+def item_id(item, field='id'):
+    """El id entero de `field` en el ítem, o None si falta o no es un número."""
+    value = item.get(field)
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def ids_of(items, field):
+    """Los ids enteros que aparecen en `field` de los ítems (para precargar relaciones)."""
+    return {value for value in (item_id(item, field) for item in items) if value is not None}
+
+
+class BulkResults:
+    def __init__(self, size):
+        self.items = [{'index': index} for index in range(size)]
+        self.failed = set()
+
+    def ok(self, index, result, obj_id):
+        self.items[index].update(status=result, id=obj_id)
+
+    def fail(self, index, result, **details):
+        self.items[index].update(status=result, **details)
+        self.failed.add(index)
+
+    def rejected_response(self, message):
+        """Respuesta cuando la política es reject y algo falló: no se guardó nada."""
+        failures = {self.items[index]['status'] for index in self.failed}
+        code = status.HTTP_409_CONFLICT if failures == {'conflict'} else status.HTTP_400_BAD_REQUEST
+        for index, item in enumerate(self.items):
+            if index not in self.failed:
+                item['status'] = 'not_saved'
+        return Response({'message': message, 'saved': 0, 'results': self.items}, status=code)
+
+    def response(self, saved, success_status=status.HTTP_200_OK):
+        return Response({'saved': saved, 'results': self.items}, status=success_status)
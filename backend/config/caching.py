@@ -0,0 +1,26 @@
+"""
+Vencimientos de los caches que se invalidan a mano (respuestas de listados, disponibilidad).
+
+Las invalidaciones solo llegan a los demás procesos si el cache es compartido (Redis,
+Memcached, base de datos). Con un cache por proceso (LocMemCache, el de settings por
+defecto) cada worker guarda su propia copia y no se entera de lo que escribió otro, así
+que ahí las entradas duran como mucho LOCAL_CACHE_TIMEOUT: es lo más viejo que puede
+llegar a servir un worker después de un cambio hecho en otro.
+"""
+from django.conf import settings
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared(alias):
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def timeout(alias, shared_timeout):
+    """`shared_timeout` si el cache `alias` es compartido; si no, LOCAL_CACHE_TIMEOUT como máximo."""
+    if is_shared(alias):
+        return shared_timeout
+    return min(shared_timeout, settings.LOCAL_CACHE_TIMEOUT)
@@ -0,0 +1,36 @@
+"""
+Respuestas condicionales (ETag / If-None-Match) para vistas de DRF.
+
+Las vistas calculan el ETag con algo barato (un hash de contenido, metadatos) antes de
+armar la respuesta; si el cliente ya lo tiene, se contesta 304 sin serializar nada.
+"""
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+# El navegador guarda la respuesta pero la revalida siempre (un 304 no trae cuerpo)
+REVALIDATE = {'private': True, 'no_cache': True}
+# Contenido direccionado por hash: no cambia nunca
+IMMUTABLE = {'private': True, 'max_age': 60 * 60 * 24 * 365, 'immutable': True}
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    # Comparación débil, como pide RFC 9110 para If-None-Match
+    etags = [tag.removeprefix('W/') for tag in parse_etags(header)]
+    return '*' in etags or quote_etag(etag) in etags
+
+
+def conditional_response(request, etag, build, cache_control=REVALIDATE):
+    """304 si el cliente ya tiene `etag`; si no, la respuesta de build(). Ambas llevan el ETag."""
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = build()
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response['ETag'] = quote_etag(etag)
+        patch_cache_control(response, **cache_control)
+    return response
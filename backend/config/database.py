@@ -0,0 +1,83 @@
+"""
+Configuración de la base de datos a partir de variables de entorno.
+
+DB_ENGINE=sqlite (por defecto)
+    Archivo DB_NAME (por defecto backend/db.sqlite3), afinado para varios procesos
+    escribiendo a la vez (Django + la app de escritorio): journal WAL, así los lectores no
+    bloquean al escritor; synchronous=NORMAL, que con WAL sigue siendo seguro ante cortes
+    del proceso; espera de hasta DB_SQLITE_BUSY_TIMEOUT segundos en vez de fallar con
+    "database is locked"; mmap y caché de páginas más grandes; y transacciones IMMEDIATE,
+    que toman el lock de escritura al empezar y evitan el choque al querer subirlo a mitad
+    de camino. DB_SQLITE_TUNED=0 deja SQLite como viene.
+
+DB_ENGINE=postgres
+    DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT. Con DB_POOL_MAX_SIZE usa el pool
+    de conexiones de psycopg (requiere psycopg[pool]); si no, conexiones persistentes
+    que se reusan DB_CONN_MAX_AGE segundos, con chequeo de salud antes de usarlas.
+
+El efecto de cada perfil se mide con `python benchmark_database.py`.
+"""
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Se aplican al abrir cada conexión, en este orden
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -32000,  # en KiB (negativo): ~32 MB
+    'temp_store': 'MEMORY',
+}
+
+
+def _flag(env, name, default):
+    return env.get(name, default).lower() not in ('0', 'false', 'no', 'off', '')
+
+
+def sqlite_config(env):
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env.get('DB_NAME') or BASE_DIR / 'db.sqlite3',
+    }
+    if _flag(env, 'DB_SQLITE_TUNED', '1'):
+        config['OPTIONS'] = {
+            'init_command': ' '.join(f'PRAGMA {name}={value};' for name, value in SQLITE_PRAGMAS.items()),
+            'timeout': float(env.get('DB_SQLITE_BUSY_TIMEOUT', 20)),
+            'transaction_mode': 'IMMEDIATE',
+        }
+    return config
+
+
+def postgres_config(env):
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env.get('DB_NAME', 'cronovoz'),
+        'USER': env.get('DB_USER', ''),
+        'PASSWORD': env.get('DB_PASSWORD', ''),
+        'HOST': env.get('DB_HOST', ''),
+        'PORT': env.get('DB_PORT', ''),
+        'OPTIONS': {},
+    }
+    if env.get('DB_POOL_MAX_SIZE'):
+        # El pool y CONN_MAX_AGE no se combinan: con pool cada request devuelve su conexión
+        config['OPTIONS']['pool'] = {
+            'min_size': int(env.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(env['DB_POOL_MAX_SIZE']),
+            'timeout': float(env.get('DB_POOL_TIMEOUT', 10)),
+        }
+    else:
+        config['CONN_MAX_AGE'] = int(env.get('DB_CONN_MAX_AGE', 60))
+        config['CONN_HEALTH_CHECKS'] = True
+    return config
+
+
+def database_config(env=None):
+    env = os.environ if env is None else env
+    engine = env.get('DB_ENGINE', 'sqlite').lower()
+    if engine in ('sqlite', 'sqlite3'):
+        return sqlite_config(env)
+    if engine in ('postgres', 'postgresql'):
+        return postgres_config(env)
+    raise ValueError(f'DB_ENGINE desconocido: {engine} (sqlite o postgres)')
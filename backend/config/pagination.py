@@ -0,0 +1,39 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class ViewCursorPagination(CursorPagination):
+    """
+    Paginación por cursor para todos los listados de la API.
+
+    El orden y los límites de página los define cada ViewSet:
+        ordering = ('-created_at', '-id')   # debe coincidir con el orden del queryset
+        page_size = 50                      # opcional, por defecto REST_FRAMEWORK['PAGE_SIZE']
+        max_page_size = 200                 # opcional, por defecto PAGINATION_MAX_PAGE_SIZE
+
+    El cliente puede pedir otro tamaño con ?page_size=N (acotado a max_page_size).
+    A diferencia de LIMIT/OFFSET, el costo de cada página no crece con la posición.
+
+    El cursor guarda la posición en el primer campo del orden y, entre filas empatadas en
+    ese campo, cuántas ya se mostraron. Para que ese conteo sea estable el orden tiene que
+    ser total: si el del ViewSet no termina en id, se le agrega 'id' (o '-id', en el sentido
+    del último campo).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', 200)
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = getattr(view, 'page_size', None) or self.page_size
+        self.max_page_size = getattr(view, 'max_page_size', None) or self.max_page_size
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+        last = ordering[-1]
+        if last.lstrip('-') not in ('id', 'pk'):
+            ordering += ('-id' if last.startswith('-') else 'id',)
+        return ordering
@@ -0,0 +1,129 @@
+"""
+Cache de las respuestas de listados que cambian poco (pacientes, planes de tratamiento y
+plantillas), por usuario, endpoint y parámetros.
+
+Cada ámbito tiene un contador de versión que las señales suben en cada save()/delete()
+(invalidate()) y la clave de la respuesta incluye la versión vigente, así que después de
+un cambio las respuestas viejas dejan de leerse, pero solo en los procesos que comparten
+el contador. Con un cache compartido eso es todo el servidor y las respuestas duran
+RESPONSE_CACHE_TIMEOUT; con uno por proceso (LocMemCache) los demás workers siguen
+sirviendo su copia hasta que vence, por eso ahí se guarda como mucho LOCAL_CACHE_TIMEOUT
+(ver config/caching.py).
+
+Las escrituras que no disparan señales (bulk_create, update()) tienen que llamar a
+invalidate() a mano, igual que con la disponibilidad y el índice de búsqueda.
+
+Cada respuesta lleva X-Cache: HIT o MISS, y los aciertos y fallos por ámbito se consultan
+en GET /api/cache-stats/ (solo staff).
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import caching
+
+SCOPES = ('patients', 'treatment_plans', 'test_templates')
+OUTCOMES = ('hits', 'misses')
+_MISSING = object()
+
+
+def _cache():
+    return caches[settings.RESPONSE_CACHE]
+
+
+def _version_key(scope, owner_id):
+    return f'response:{scope}:{owner_id or "all"}:version'
+
+
+def version(scope, owner_id=None):
+    # Arranca en un valor nuevo (no en 0): si el cache descarta el contador, las respuestas
+    # guardadas con la numeración anterior no vuelven a coincidir
+    return _cache().get_or_set(_version_key(scope, owner_id), time.time_ns(), None)
+
+
+def bump(scope, owner_id=None):
+    try:
+        _cache().incr(_version_key(scope, owner_id))
+    except ValueError:
+        version(scope, owner_id)
+
+
+def invalidate(scope, owner_id=None):
+    """
+    Descarta las respuestas cacheadas de `scope` (de un profesional, o de todos si owner_id
+    es None). Sube la versión ya, para que la misma transacción lea lo nuevo, y otra vez al
+    confirmarla: lo que otra request haya cacheado mientras tanto tiene los datos viejos.
+    """
+    bump(scope, owner_id)
+    transaction.on_commit(partial(bump, scope, owner_id))
+
+
+def _count(scope, outcome):
+    key = f'response:{scope}:{outcome}'
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def cached_response(request, scope, owner_id, build):
+    """
+    La respuesta de build() para `request`, guardada por usuario y URL completa (la
+    paginación arma links absolutos) bajo la versión vigente de `scope`.
+    Solo se guardan las respuestas 200.
+    """
+    digest = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    key = f'response:{scope}:{request.user.pk}:{version(scope, owner_id)}:{digest}'
+    cache = _cache()
+    data = cache.get(key, _MISSING)
+    if data is not _MISSING:
+        _count(scope, 'hits')
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return response
+    _count(scope, 'misses')
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, response.data, caching.timeout(settings.RESPONSE_CACHE, settings.RESPONSE_CACHE_TIMEOUT))
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def stats():
+    values = _cache().get_many([f'response:{scope}:{outcome}' for scope in SCOPES for outcome in OUTCOMES])
+    result = {}
+    for scope in SCOPES:
+        hits, misses = (values.get(f'response:{scope}:{outcome}', 0) for outcome in OUTCOMES)
+        result[scope] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None}
+    return result
+
+
+class CachedListMixin:
+    """
+    Para ModelViewSets: list() sale del cache de respuestas.
+        cache_scope = 'patients'
+        cache_per_user = True   # False: la versión es una para todos (datos compartidos)
+    """
+    cache_scope = None
+    cache_per_user = True
+
+    def list(self, request, *args, **kwargs):
+        owner_id = request.user.pk if self.cache_per_user else None
+        return cached_response(request, self.cache_scope, owner_id, partial(super().list, request, *args, **kwargs))
+
+
+class ResponseCacheStatsView(APIView):
+    """Aciertos y fallos del cache de respuestas por ámbito, desde que arrancó el cache."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(stats())
@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import datetime
+import os
 from pathlib import Path
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +48,8 @@ INSTALLED_APPS = [
     'patients',
     'evaluations',
     'appointments',
+    'search',
+    'sync',
 ]
 
 MIDDLEWARE = [
@@ -57,7 +63,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'config.urls'
+# Modo ASGI (config/asgi.py lo activa): las lecturas más pedidas son vistas async
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', '0') == '1'
+
+ROOT_URLCONF = 'config.asgi_urls' if ASYNC_READ_VIEWS else 'config.urls'
 
 TEMPLATES = [
     {
@@ -75,17 +84,31 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite afinado por defecto; PostgreSQL con DB_ENGINE=postgres (ver config/database.py)
 DATABASES = {
+    'default': database_config(),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Cache local por proceso. Con varios workers conviene un cache compartido (Redis / Memcached)
+# para que la invalidación llegue a todos: mientras sea local, los caches que se invalidan a
+# mano guardan cada entrada como mucho LOCAL_CACHE_TIMEOUT segundos (ver config/caching.py).
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cronovoz',
     }
 }
+LOCAL_CACHE_TIMEOUT = 30
 
 
 # Password validation
@@ -130,10 +153,62 @@ CORS_ALLOW_ALL_ORIGINS = True
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'config.pagination.ViewCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
+# Tokens de la API (ver accounts/authentication.py): vencimiento (None = no vencen),
+# cuánto se cachea cada token→usuario y en qué caché (compartida si hay varios procesos)
+AUTH_TOKEN_TTL = datetime.timedelta(days=30)
+AUTH_TOKEN_CACHE_TIMEOUT = 300
+AUTH_TOKEN_CACHE = 'default'
+
+# Tope para ?page_size= en los listados (cada ViewSet puede definir uno propio)
+PAGINATION_MAX_PAGE_SIZE = 200
+
+# Tope de ítems por request en los endpoints /bulk/ (ver config/bulk.py)
+BULK_MAX_ITEMS = 500
+
+# Máximo de cambios por página del feed /api/sync/ (ver sync/views.py)
+SYNC_PAGE_SIZE = 500
+
+# Canal en vivo /api/sync/events/ (ver sync/events.py): cada cuánto relee el feed si no hubo
+# aviso (cambios de otro proceso), cuánto dura cada conexión y en cuánto reconecta el cliente
+SYNC_EVENTS_POLL_SECONDS = 5
+SYNC_EVENTS_MAX_SECONDS = 300
+SYNC_EVENTS_RETRY_MS = 3000
+
+# Cache de respuestas de listados (ver config/response_cache.py). El vencimiento vale con un
+# cache compartido; con uno por proceso se acorta a LOCAL_CACHE_TIMEOUT
+RESPONSE_CACHE = 'default'
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
 # Media files (Audio uploads, etc)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Notas de voz: subida por partes y reproducción autenticada (ver appointments/voice_notes.py)
+VOICE_NOTE_MAX_UPLOAD_SIZE = 1024 * 1024 * 1024  # 1 GB
+VOICE_NOTE_URL_MAX_AGE = 60 * 60 * 6  # validez de las URLs firmadas de reproducción, en segundos
+VOICE_NOTE_UPLOAD_MAX_AGE = 60 * 60 * 24 * 2  # las subidas sin completar se descartan a los 2 días
+# En producción, delegar el envío al servidor web: 'X-Accel-Redirect' (nginx) o 'X-Sendfile' (Apache).
+# Con nginx, VOICE_NOTE_SENDFILE_PREFIX es la location `internal` que apunta a MEDIA_ROOT.
+VOICE_NOTE_SENDFILE_HEADER = None
+VOICE_NOTE_SENDFILE_PREFIX = '/protected-media/'
+
+# Procesamiento de audio en segundo plano (manage.py process_audio_jobs)
+AUDIO_FFMPEG_BINARY = 'ffmpeg'
+AUDIO_OPUS_BITRATE = '24k'
+AUDIO_WAVEFORM_PEAKS = 200
+
+# Validadores compilados de JSON Schema por proceso, uno por versión de plantilla (ver evaluations/validation.py)
+EVALUATION_VALIDATOR_CACHE_SIZE = 128
+
+# Transcripción local de las notas de voz, después de comprimirlas (ver appointments/transcription.py)
+TRANSCRIPTION_ENABLED = False
+TRANSCRIPTION_ENGINE = 'appointments.transcription.WhisperEngine'
+TRANSCRIPTION_ENGINE_OPTIONS = {'model': 'small', 'language': 'es'}
+TRANSCRIPTION_WORKERS = None  # procesos en paralelo; None = uno por núcleo
+TRANSCRIPTION_CHUNK_SECONDS = 30
@@ -20,19 +20,24 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
-from rest_framework.authtoken.views import obtain_auth_token
 from rest_framework.routers import DefaultRouter
-from accounts.views import RegisterView
+from accounts.views import RegisterView, LoginView, LogoutView, RotateTokenView
+from config.response_cache import ResponseCacheStatsView
 from patients.views import PatientViewSet
-from evaluations.views import TestTemplateViewSet, EvaluationViewSet
-from appointments.views import AppointmentViewSet, TreatmentPlanViewSet
+from evaluations.views import TestTemplateViewSet, TestTemplateVersionViewSet, EvaluationViewSet
+from search.views import SearchView
+from sync.views import SyncView, SyncPushView
+from appointments.views import AppointmentViewSet, TreatmentPlanViewSet, SessionViewSet, WorkingHoursViewSet, AvailabilityView, VoiceNoteUploadView
 
 router = DefaultRouter()
 router.register(r'patients', PatientViewSet, basename='patient')
 router.register(r'test-templates', TestTemplateViewSet, basename='testtemplate')
+router.register(r'test-template-versions', TestTemplateVersionViewSet, basename='testtemplateversion')
 router.register(r'evaluations', EvaluationViewSet, basename='evaluation')
 router.register(r'appointments', AppointmentViewSet, basename='appointment')
 router.register(r'treatment-plans', TreatmentPlanViewSet, basename='treatmentplan')
+router.register(r'sessions', SessionViewSet, basename='session')
+router.register(r'working-hours', WorkingHoursViewSet, basename='workinghours')
 
 @api_view(['GET'])
 def test_api(request):
@@ -42,7 +47,15 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/test/', test_api),
     path('api/auth/register/', RegisterView.as_view(), name='register'),
-    path('api/auth/login/', obtain_auth_token, name='login'),
+    path('api/auth/login/', LoginView.as_view(), name='login'),
+    path('api/auth/logout/', LogoutView.as_view(), name='logout'),
+    path('api/auth/token/rotate/', RotateTokenView.as_view(), name='token-rotate'),
+    path('api/availability/', AvailabilityView.as_view(), name='availability'),
+    path('api/search/', SearchView.as_view(), name='search'),
+    path('api/cache-stats/', ResponseCacheStatsView.as_view(), name='cache-stats'),
+    path('api/sync/', SyncView.as_view(), name='sync'),
+    path('api/sync/push/', SyncPushView.as_view(), name='sync-push'),
+    path('api/voice-note-uploads/<uuid:upload_id>/', VoiceNoteUploadView.as_view(), name='voice-note-upload'),
     path('api/', include(router.urls)),
 ]
 
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from evaluations import projection
+from evaluations.models import Evaluation
+
+
+class Command(BaseCommand):
+    help = 'Regenera la proyección de resultados (EvaluationValue) de las evaluaciones existentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', type=int, action='append', dest='templates', help='Solo esta plantilla (repetible).')
+
+    def handle(self, *args, **options):
+        evaluations = Evaluation.objects.all()
+        if options['templates']:
+            evaluations = evaluations.filter(test_template__in=options['templates'])
+        total = projection.rebuild(evaluations)
+        self.stdout.write(self.style.SUCCESS(f'{total} valor(es) proyectado(s).'))
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluations', '0004_evaluation_session'),
+        ('patients', '0002_patient_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvaluationValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateTimeField()),
+                ('path', models.CharField(max_length=255)),
+                ('value_text', models.CharField(max_length=255)),
+                ('value_number', models.FloatField(blank=True, null=True)),
+                ('evaluation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='values', to='evaluations.evaluation')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='patients.patient')),
+                ('test_template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='evaluations.testtemplate')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'test_template', 'path', 'value_text'], name='evalvalue_text_idx'), models.Index(fields=['user', 'test_template', 'path', 'value_number'], name='evalvalue_number_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:35
+
+import hashlib
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_initial_versions(apps, schema_editor):
+    # Copia de evaluations.models.content_hash: las migraciones no dependen del código actual
+    TestTemplate = apps.get_model('evaluations', 'TestTemplate')
+    TestTemplateVersion = apps.get_model('evaluations', 'TestTemplateVersion')
+    Evaluation = apps.get_model('evaluations', 'Evaluation')
+    for template in TestTemplate.objects.all():
+        canonical = json.dumps({'schema': template.schema, 'ui_schema': template.ui_schema}, sort_keys=True, separators=(',', ':'))
+        digest = hashlib.sha256(canonical.encode()).hexdigest()
+        version = TestTemplateVersion.objects.create(
+            template=template, number=1, content_hash=digest, schema=template.schema, ui_schema=template.ui_schema,
+        )
+        TestTemplate.objects.filter(pk=template.pk).update(current_version=version, content_hash=digest)
+        Evaluation.objects.filter(test_template=template).update(template_version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluations', '0005_evaluationvalue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testtemplate',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.CreateModel(
+            name='TestTemplateVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('schema', models.JSONField()),
+                ('ui_schema', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='evaluations.testtemplate')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='evaluation',
+            name='template_version',
+            field=models.ForeignKey(blank=True, help_text='Versión de la plantilla con la que se cargaron los resultados', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='evaluations', to='evaluations.testtemplateversion'),
+        ),
+        migrations.AddField(
+            model_name='testtemplate',
+            name='current_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='evaluations.testtemplateversion'),
+        ),
+        migrations.AddConstraint(
+            model_name='testtemplateversion',
+            constraint=models.UniqueConstraint(fields=('template', 'number'), name='templateversion_number_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='testtemplateversion',
+            constraint=models.UniqueConstraint(fields=('template', 'content_hash'), name='templateversion_hash_uniq'),
+        ),
+        migrations.RunPython(create_initial_versions, migrations.RunPython.noop),
+    ]
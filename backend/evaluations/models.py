@@ -1,7 +1,17 @@
-from django.db import models
+import hashlib
+import json
+from django.db import models, transaction
+from django.db.models import Max
 from django.conf import settings
 from patients.models import Patient
 
+
+def content_hash(schema, ui_schema):
+    """Huella del contenido de una plantilla: mismo schema + ui_schema, mismo hash."""
+    canonical = json.dumps({'schema': schema, 'ui_schema': ui_schema}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
 class TestTemplate(models.Model):
     STATUS_CHOICES = (
         ('draft', 'Borrador'),
@@ -13,17 +23,102 @@ class TestTemplate(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     schema = models.JSONField(help_text="JSON Schema defining the UI form")
     ui_schema = models.JSONField(default=dict, blank=True, help_text="UI Schema defining form layout and widgets")
-    
+    # Versión vigente: la que usan las evaluaciones nuevas (ver TestTemplateVersion)
+    current_version = models.ForeignKey('TestTemplateVersion', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Editar schema o ui_schema (desde la API, el admin o scripts como load_custom_ui_schema.py)
+        # no modifica lo que ya se evaluó: genera una versión nueva y la deja como vigente
+        new_hash = content_hash(self.schema, self.ui_schema)
+        if new_hash == self.content_hash and self.current_version_id:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self.pk is None:
+                super().save(*args, **kwargs)
+                kwargs = {}
+            version = self.versions.filter(content_hash=new_hash).first()
+            if version is None:
+                number = (self.versions.aggregate(last=Max('number'))['last'] or 0) + 1
+                version = TestTemplateVersion.objects.create(
+                    template=self, number=number, content_hash=new_hash, schema=self.schema, ui_schema=self.ui_schema,
+                )
+            self.current_version, self.content_hash = version, new_hash
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'current_version', 'content_hash'}
+            super().save(*args, **kwargs)
+
+class TestTemplateVersion(models.Model):
+    """
+    Contenido inmutable de una plantilla (schema + ui_schema), identificado por su hash.
+    Cada evaluación queda ligada a la versión con la que se cargó y se lee siempre con ella.
+    """
+    template = models.ForeignKey(TestTemplate, on_delete=models.CASCADE, related_name='versions')
+    number = models.PositiveIntegerField()
+    content_hash = models.CharField(max_length=64)
+    schema = models.JSONField()
+    ui_schema = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['template', 'number'], name='templateversion_number_uniq'),
+            models.UniqueConstraint(fields=['template', 'content_hash'], name='templateversion_hash_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.template.name} v{self.number}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Las versiones de plantilla son inmutables: editar la plantilla crea una nueva.')
+        super().save(*args, **kwargs)
+
 class Evaluation(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='evaluations')
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='evaluations')
     test_template = models.ForeignKey(TestTemplate, on_delete=models.CASCADE)
+    template_version = models.ForeignKey(TestTemplateVersion, on_delete=models.PROTECT, null=True, blank=True, related_name='evaluations', help_text="Versión de la plantilla con la que se cargaron los resultados")
     session = models.ForeignKey('appointments.Session', on_delete=models.SET_NULL, null=True, blank=True, related_name='evaluations')
     date = models.DateTimeField(auto_now_add=True)
     results = models.JSONField(help_text="JSON containing the test results matching the schema")
 
     def __str__(self):
         return f"{self.test_template.name} for {self.patient.last_name} on {self.date.strftime('%Y-%m-%d')}"
+
+    def save(self, *args, **kwargs):
+        if self.template_version_id is None and self.test_template_id:
+            self.template_version_id = self.test_template.current_version_id
+        super().save(*args, **kwargs)
+
+class EvaluationValue(models.Model):
+    """
+    Proyección de Evaluation.results: una fila por valor escalar, con su ruta en el JSON
+    ("postura.curvatura_columna", "sintomas[]" para cada ítem de una lista).
+    Se regenera al guardar la evaluación (ver evaluations/projection.py) y permite
+    estadísticas por campo de una plantilla con una sola consulta indexada.
+    """
+    evaluation = models.ForeignKey(Evaluation, on_delete=models.CASCADE, related_name='values')
+    # Copias de la evaluación para filtrar y agrupar sin JOIN
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    test_template = models.ForeignKey(TestTemplate, on_delete=models.CASCADE, related_name='+')
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='+')
+    date = models.DateTimeField()
+
+    path = models.CharField(max_length=255)
+    # Forma canónica del valor (texto, número o true/false): igualdad y distribuciones
+    value_text = models.CharField(max_length=255)
+    # Números y booleanos (1/0): rangos, mínimos, promedios
+    value_number = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'test_template', 'path', 'value_text'], name='evalvalue_text_idx'),
+            models.Index(fields=['user', 'test_template', 'path', 'value_number'], name='evalvalue_number_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.path} = {self.value_text}"
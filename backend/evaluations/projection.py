@@ -0,0 +1,69 @@
+"""
+Proyección de Evaluation.results en filas EvaluationValue, para estadísticas por campo.
+
+Cada valor escalar del JSON se guarda con su ruta: las claves se unen con "." y los ítems
+de una lista agregan "[]" (todas las opciones marcadas de "sintomas" quedan en "sintomas[]").
+Los null no se guardan.
+"""
+from .models import EvaluationValue
+
+PATH_MAX_LENGTH = EvaluationValue._meta.get_field('path').max_length
+TEXT_MAX_LENGTH = EvaluationValue._meta.get_field('value_text').max_length
+
+
+def flatten(value, path=''):
+    """(ruta, valor) para cada valor escalar de `value`."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f'{path}.{key}' if path else str(key))
+    elif isinstance(value, list):
+        for item in value:
+            yield from flatten(item, f'{path}[]')
+    elif value is not None:
+        yield path, value
+
+
+def typed_value(value):
+    """(value_text, value_number) de un escalar del JSON."""
+    if isinstance(value, bool):
+        return ('true' if value else 'false'), float(value)
+    if isinstance(value, (int, float)):
+        number = float(value)
+        return (str(int(number)) if number.is_integer() else repr(number)), number
+    return str(value)[:TEXT_MAX_LENGTH], None
+
+
+def build_values(evaluation):
+    rows = []
+    for path, value in flatten(evaluation.results):
+        text, number = typed_value(value)
+        rows.append(EvaluationValue(
+            evaluation=evaluation, user_id=evaluation.user_id, test_template_id=evaluation.test_template_id,
+            patient_id=evaluation.patient_id, date=evaluation.date,
+            path=path[:PATH_MAX_LENGTH], value_text=text, value_number=number,
+        ))
+    return rows
+
+
+def refresh_values(evaluation):
+    EvaluationValue.objects.filter(evaluation=evaluation).delete()
+    EvaluationValue.objects.bulk_create(build_values(evaluation))
+
+
+def refresh_many(evaluations):
+    """refresh_values() para un lote de evaluaciones ya guardadas, en dos consultas."""
+    EvaluationValue.objects.filter(evaluation__in=[e.pk for e in evaluations]).delete()
+    EvaluationValue.objects.bulk_create([row for e in evaluations for row in build_values(e)], batch_size=1000)
+
+
+def rebuild(evaluations):
+    """Regenera la proyección de `evaluations` (un queryset). Devuelve cuántas filas quedaron."""
+    EvaluationValue.objects.filter(evaluation__in=evaluations).delete()
+    total, batch = 0, []
+    for evaluation in evaluations.iterator(chunk_size=500):
+        batch.extend(build_values(evaluation))
+        if len(batch) >= 1000:
+            total += len(EvaluationValue.objects.bulk_create(batch))
+            batch = []
+    total += len(EvaluationValue.objects.bulk_create(batch))
+    return total
@@ -1,16 +1,76 @@
+import re
 from rest_framework import serializers
-from .models import TestTemplate, Evaluation
+from rest_framework.settings import api_settings
+from config.bulk import PrefetchedPrimaryKeyRelatedField
+from .models import TestTemplate, TestTemplateVersion, Evaluation
+from .validation import ROOT_PATH, SchemaError, compile_schema, validate_results
 from patients.serializers import PatientSerializer
 
 class TestTemplateSerializer(serializers.ModelSerializer):
+    version = serializers.IntegerField(source='current_version.number', read_only=True, default=None)
+
     class Meta:
         model = TestTemplate
         fields = '__all__'
+        read_only_fields = ('current_version', 'content_hash')
+
+    def validate_schema(self, value):
+        try:
+            compile_schema(value)
+        except (SchemaError, re.error) as e:
+            raise serializers.ValidationError(f'Schema inválido: {e}')
+        return value
+
+class TestTemplateSummarySerializer(serializers.ModelSerializer):
+    # Listado liviano (?view=summary): sin schema ni ui_schema, que se piden por versión
+    version = serializers.IntegerField(source='current_version.number', read_only=True, default=None)
+
+    class Meta:
+        model = TestTemplate
+        fields = ('id', 'name', 'description', 'status', 'current_version', 'version', 'content_hash')
+        read_only_fields = fields
+
+class TestTemplateVersionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TestTemplateVersion
+        fields = ('id', 'template', 'number', 'content_hash', 'schema', 'ui_schema', 'created_at')
+        read_only_fields = fields
 
 class EvaluationSerializer(serializers.ModelSerializer):
     # We can include a nested patient serializer for read operations if needed, 
     # but for writes we usually just want the ID. Let's keep it simple for now.
+    # En los lotes, paciente, plantilla y sesión se buscan una vez para todos los ítems
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     class Meta:
         model = Evaluation
         fields = '__all__'
-        read_only_fields = ('user',)
+        read_only_fields = ('user', 'template_version')
+
+    def validate(self, attrs):
+        # Los resultados se validan contra el schema de la versión de la plantilla (validador
+        # compilado y cacheado): la vigente al crear, la original al editar
+        template = attrs.get('test_template', getattr(self.instance, 'test_template', None))
+        if self.instance is not None and template.pk == self.instance.test_template_id and self.instance.template_version:
+            version = self.instance.template_version
+        else:
+            version = attrs['template_version'] = template.current_version
+        if version is None:
+            raise serializers.ValidationError({'test_template': 'La plantilla todavía no tiene una versión publicada.'})
+        results = attrs.get('results', getattr(self.instance, 'results', None))
+        try:
+            errors = validate_results(version, results)
+        except (SchemaError, re.error) as e:
+            raise serializers.ValidationError({'test_template': f'La plantilla tiene un schema inválido: {e}'})
+        if errors:
+            if ROOT_PATH in errors:
+                errors[api_settings.NON_FIELD_ERRORS_KEY] = errors.pop(ROOT_PATH)
+            raise serializers.ValidationError({'results': errors})
+        return attrs
+
+
+class EvaluationSummarySerializer(serializers.ModelSerializer):
+    # Listado liviano (?view=summary): sin results, que se piden en el detalle
+    class Meta:
+        model = Evaluation
+        fields = ('id', 'patient', 'test_template', 'template_version', 'session', 'date')
+        read_only_fields = fields
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from config import response_cache
+from . import projection
+from .models import Evaluation, TestTemplate
+
+
+@receiver(post_save, sender=Evaluation)
+def refresh_evaluation_values(sender, instance, raw=False, **kwargs):
+    # Los fixtures (raw) se proyectan con `manage.py rebuild_evaluation_values`
+    if not raw:
+        projection.refresh_values(instance)
+
+
+
+@receiver(post_save, sender=TestTemplate)
+@receiver(post_delete, sender=TestTemplate)
+def invalidate_template_list(sender, instance, **kwargs):
+    # Una versión nueva siempre viene con el save() de su plantilla (current_version)
+    response_cache.invalidate('test_templates')
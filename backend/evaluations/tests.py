@@ -1,3 +1,285 @@
+import datetime
+import io
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from patients.models import Patient
+from search import index as search_index
+from .models import TestTemplate, Evaluation, EvaluationValue
+from . import validation
+from .projection import flatten
 
-# Create your tests here.
+
+class EvaluationValueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = TestTemplate.objects.create(name='Postura', schema={})
+        self.patients = [
+            Patient.objects.create(user=self.user, first_name='P', last_name=str(i), dni=str(i)) for i in range(3)
+        ]
+
+    def evaluate(self, patient, results, date=None):
+        evaluation = Evaluation.objects.create(user=self.user, patient=patient, test_template=self.template, results=results)
+        if date:
+            Evaluation.objects.filter(pk=evaluation.pk).update(date=date)
+            EvaluationValue.objects.filter(evaluation=evaluation).update(date=date)
+        return evaluation
+
+    def test_flatten_paths(self):
+        self.assertEqual(
+            list(flatten({'postura': {'curvatura': 'Lordótica'}, 'sintomas': ['a', 'b'], 'dolor': None, 'eva': 3})),
+            [('postura.curvatura', 'Lordótica'), ('sintomas[]', 'a'), ('sintomas[]', 'b'), ('eva', 3)],
+        )
+
+    def test_projection_follows_saves(self):
+        evaluation = self.evaluate(self.patients[0], {'curvatura': 'Lordótica', 'apto': True, 'eva': 3.0})
+        self.assertEqual(
+            set(evaluation.values.values_list('path', 'value_text', 'value_number')),
+            {('curvatura', 'Lordótica', None), ('apto', 'true', 1.0), ('eva', '3', 3.0)},
+        )
+        evaluation.results = {'curvatura': 'Normal'}
+        evaluation.save()
+        self.assertEqual(list(evaluation.values.values_list('value_text', flat=True)), ['Normal'])
+
+    def test_distribution_and_count_endpoints(self):
+        last_quarter = timezone.make_aware(datetime.datetime(2026, 8, 15))
+        self.evaluate(self.patients[0], {'curvatura': 'Lordótica', 'eva': 2}, last_quarter)
+        self.evaluate(self.patients[0], {'curvatura': 'Lordótica', 'eva': 4}, last_quarter)
+        self.evaluate(self.patients[1], {'curvatura': 'Lordótica', 'eva': 6}, last_quarter)
+        self.evaluate(self.patients[2], {'curvatura': 'Normal'}, last_quarter)
+        self.evaluate(self.patients[2], {'curvatura': 'Lordótica'}, timezone.make_aware(datetime.datetime(2026, 1, 10)))
+        url = f'/api/test-templates/{self.template.id}/distribution/'
+
+        with self.assertNumQueries(3):  # plantilla + totales + distribución
+            data = self.client.get(url, {'path': 'curvatura', 'since': '2026-07-01', 'until': '2026-09-30'}).data
+        self.assertEqual(data['values'], [
+            {'value': 'Lordótica', 'count': 3, 'patients': 2},
+            {'value': 'Normal', 'count': 1, 'patients': 1},
+        ])
+        data = self.client.get(url, {'path': 'curvatura', 'value': 'Lordótica', 'since': '2026-07-01'}).data
+        self.assertEqual((data['evaluations'], data['patients']), (3, 2))
+        self.assertEqual(self.client.get(url, {'path': 'eva'}).data['numeric'], {'min': 2.0, 'max': 6.0, 'avg': 4.0})
+
+        fields = self.client.get(f'/api/test-templates/{self.template.id}/fields/').data['fields']
+        self.assertEqual([(f['path'], f['evaluations'], f['numeric']) for f in fields], [('curvatura', 5, False), ('eva', 3, True)])
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'path': 'eva', 'until': '2026-02-30'}).status_code, 400)
+
+    def test_rebuild_command(self):
+        self.evaluate(self.patients[0], {'curvatura': 'Lordótica', 'sintomas': ['a', 'b']})
+        EvaluationValue.objects.all().delete()
+        call_command('rebuild_evaluation_values', stdout=io.StringIO())
+        self.assertEqual(EvaluationValue.objects.count(), 3)
+
+
+class ResultsValidationTests(TestCase):
+    SCHEMA = {
+        'type': 'object',
+        'required': ['curvatura_columna'],
+        'properties': {
+            'curvatura_columna': {'type': 'string', 'enum': ['Normal', 'Xifótica', 'Lordótica']},
+            'posicion_cabeza': {'type': 'array', 'items': {'$ref': '#/definitions/posicion'}, 'uniqueItems': True},
+            'medidas': {'type': 'object', 'properties': {'superior': {'type': 'number', 'minimum': 0}}},
+            'notas': {'type': 'string', 'maxLength': 5},
+        },
+        'definitions': {'posicion': {'type': 'string', 'enum': ['Adecuada', 'Rotada Derecha']}},
+    }
+
+    def setUp(self):
+        validation.validators.clear()
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(user=self.user, first_name='Ana', last_name='Pérez', dni='1')
+        self.template = TestTemplate.objects.create(name='Postura', schema=self.SCHEMA)
+
+    def post(self, results):
+        return self.client.post('/api/evaluations/', {
+            'patient': self.patient.id, 'test_template': self.template.id, 'results': results,
+        }, format='json')
+
+    def test_all_errors_come_back_per_field(self):
+        response = self.post({
+            'posicion_cabeza': ['Adecuada', 'Adecuada', 'Inclinada'],
+            'medidas': {'superior': -1}, 'notas': 'demasiado largo',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['results']), {
+            'curvatura_columna', 'posicion_cabeza', 'posicion_cabeza[2]', 'medidas.superior', 'notas',
+        })
+        self.assertEqual(self.post({'curvatura_columna': 'Lordótica', 'posicion_cabeza': ['Adecuada']}).status_code, 201)
+        self.assertEqual(self.post([]).data['results'], {'non_field_errors': ['Debe ser de tipo object.']})
+
+    def test_validator_compiled_once_per_version(self):
+        with mock.patch.object(validation, 'compile_schema', wraps=validation.compile_schema) as compile_schema:
+            self.post({'curvatura_columna': 'Normal'})
+            self.post({'curvatura_columna': 'Normal'})
+            self.assertEqual(compile_schema.call_count, 1)
+
+            self.template.schema = {**self.SCHEMA, 'required': []}
+            self.template.save()
+            self.assertEqual(self.post({}).status_code, 201)
+            self.assertEqual(compile_schema.call_count, 2)
+
+    def test_impossible_dates_are_field_errors(self):
+        self.template.schema = {'type': 'object', 'properties': {
+            'fecha': {'type': 'string', 'format': 'date'}, 'hora': {'type': 'string', 'format': 'date-time'},
+        }}
+        self.template.save()
+        response = self.post({'fecha': '2026-02-30', 'hora': '2026-02-30T10:00:00'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['results']), {'fecha', 'hora'})
+        self.assertEqual(self.post({'fecha': '2026-02-28', 'hora': '2026-02-28T10:00:00'}).status_code, 201)
+
+    def test_multiple_of_decimal_step(self):
+        self.template.schema = {'type': 'object', 'properties': {'tono': {'type': 'number', 'multipleOf': 0.1}}}
+        self.template.save()
+        for value in (0.3, 0.7, 1.1, 12):
+            self.assertEqual(self.post({'tono': value}).status_code, 201, value)
+        response = self.post({'tono': 0.35})
+        self.assertEqual(response.data['results'], {'tono': ['Debe ser múltiplo de 0.1.']})
+
+    def test_template_without_version_is_a_field_error(self):
+        TestTemplate.objects.filter(pk=self.template.pk).update(current_version=None)
+        response = self.post({'curvatura_columna': 'Normal'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('test_template', response.data)
+
+    def test_invalid_template_schema_is_rejected(self):
+        response = self.client.post('/api/test-templates/', {
+            'name': 'Rota', 'schema': {'type': 'object', 'properties': {'x': {'$ref': '#/definitions/nada'}}},
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class TemplateVersionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(user=self.user, first_name='Ana', last_name='Pérez', dni='1')
+        self.schema_v1 = {'type': 'object', 'properties': {'voz': {'type': 'string', 'enum': ['Normal', 'Ronca']}}}
+        self.template = TestTemplate.objects.create(name='Voz', schema=self.schema_v1)
+
+    def test_editing_creates_new_version_and_pins_evaluations(self):
+        v1 = self.template.current_version
+        evaluation = Evaluation.objects.create(user=self.user, patient=self.patient, test_template=self.template, results={'voz': 'Ronca'})
+        self.assertEqual(evaluation.template_version, v1)
+
+        self.template.schema = {'type': 'object', 'properties': {'voz': {'type': 'string', 'enum': ['Normal', 'Disfónica']}}}
+        self.template.save()
+        self.template.description = 'Solo cambia la descripción'
+        self.template.save()
+        self.assertEqual(self.template.versions.count(), 2)
+        self.assertEqual(self.template.current_version.number, 2)
+        evaluation.refresh_from_db()
+        self.assertEqual(evaluation.template_version.schema, self.schema_v1)
+
+        # Editar una evaluación vieja valida contra su versión, no contra la vigente
+        response = self.client.patch(f'/api/evaluations/{evaluation.id}/', {'results': {'voz': 'Normal'}}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.post('/api/evaluations/', {
+            'patient': self.patient.id, 'test_template': self.template.id, 'results': {'voz': 'Ronca'},
+        }, format='json').status_code, 400)
+
+        # Volver al schema anterior reutiliza la versión 1
+        self.template.schema = self.schema_v1
+        self.template.save()
+        self.assertEqual(self.template.current_version, v1)
+        with self.assertRaises(ValueError):
+            v1.save()
+
+    def test_conditional_requests(self):
+        for url in ('/api/test-templates/', f'/api/test-templates/{self.template.id}/',
+                    f'/api/test-template-versions/{self.template.current_version_id}/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            with self.assertNumQueries(1):
+                cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(cached.status_code, 304)
+
+        etag = self.client.get('/api/test-templates/')['ETag']
+        self.template.ui_schema = {'voz': {'ui:widget': 'radio'}}
+        self.template.save()
+        self.assertEqual(self.client.get('/api/test-templates/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertIn('immutable', self.client.get(f'/api/test-template-versions/{self.template.current_version_id}/')['Cache-Control'])
+
+
+class SummaryViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patient = Patient.objects.create(user=self.user, first_name='Ana', last_name='Pérez', dni='1')
+        big = {f'campo_{i}': {'type': 'string', 'enum': [f'opción {j}' for j in range(20)]} for i in range(50)}
+        self.template = TestTemplate.objects.create(name='Grande', schema={'type': 'object', 'properties': big})
+        for _ in range(3):
+            Evaluation.objects.create(
+                user=self.user, patient=patient, test_template=self.template, results={k: 'opción 1' for k in big},
+            )
+
+    def assertNoJsonColumns(self, url, columns):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'view': 'summary'})
+        self.assertEqual(response.status_code, 200)
+        selected = ' '.join(query['sql'].split(' FROM ')[0] for query in queries.captured_queries)
+        for column in columns:
+            self.assertNotIn(f'."{column}"', selected)
+            self.assertNotIn(column, response.data['results'][0])
+        full = self.client.get(url)
+        self.assertLess(len(response.content) * 10, len(full.content))
+        return response.data['results']
+
+    def test_template_summary_defers_schemas(self):
+        row, = self.assertNoJsonColumns('/api/test-templates/', ['schema', 'ui_schema'])
+        self.assertEqual((row['name'], row['version'], row['current_version']), ('Grande', 1, self.template.current_version_id))
+
+    def test_evaluation_summary_defers_results(self):
+        rows = self.assertNoJsonColumns('/api/evaluations/', ['results'])
+        self.assertEqual(len(rows), 3)
+        self.assertIn('results', self.client.get(f'/api/evaluations/{rows[0]["id"]}/').data)
+
+
+class BulkEvaluationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patients = [
+            Patient.objects.create(user=self.user, first_name=f'Paciente{i}', last_name='Pérez', dni=str(i)) for i in range(5)
+        ]
+        self.template = TestTemplate.objects.create(name='Postura', schema={
+            'type': 'object', 'properties': {'curvatura': {'type': 'string', 'enum': ['Normal', 'Lordótica']}},
+        })
+
+    def test_create_projects_and_indexes(self):
+        items = [{'patient': p.id, 'test_template': self.template.id, 'results': {'curvatura': 'Lordótica'}} for p in self.patients]
+        with self.assertNumQueries(13):
+            response = self.client.post('/api/evaluations/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['saved'], 5)
+        self.assertEqual(EvaluationValue.objects.filter(value_text='Lordótica').count(), 5)
+        self.assertTrue(all(e.template_version_id == self.template.current_version_id for e in Evaluation.objects.all()))
+        self.assertEqual(len(search_index.search(self.user, 'lordotica')), 5)
+
+    def test_skip_invalid_and_update(self):
+        items = [
+            {'patient': self.patients[0].id, 'test_template': self.template.id, 'results': {'curvatura': 'Normal'}},
+            {'patient': self.patients[1].id, 'test_template': self.template.id, 'results': {'curvatura': 'Plana'}},
+        ]
+        response = self.client.post('/api/evaluations/bulk/', {'items': items, 'on_error': 'skip'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        created, invalid = response.data['results']
+        self.assertEqual(invalid['status'], 'invalid')
+        self.assertIn('curvatura', invalid['errors']['results'])
+
+        response = self.client.patch('/api/evaluations/bulk/', [{'id': created['id'], 'results': {'curvatura': 'Lordótica'}}], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(EvaluationValue.objects.get(evaluation_id=created['id']).value_text, 'Lordótica')
@@ -0,0 +1,369 @@
+"""
+Validación de Evaluation.results contra TestTemplate.schema.
+
+compile_schema() recorre el schema una sola vez y arma una cadena de funciones (regex
+compiladas, enums como sets, $ref resueltos): validar es solo ejecutarlas. Los validadores
+compilados viven en un LRU del proceso, indexado por el hash de la versión de la plantilla:
+las versiones son inmutables, así que editar una plantilla nunca deja un validador viejo
+en uso (ni en este proceso ni en los demás).
+
+Soporta las palabras clave que usan los formularios (RJSF): type, enum, const, properties,
+required, additionalProperties, items, minItems, maxItems, uniqueItems, minLength,
+maxLength, pattern, format (date, date-time, email), minimum, maximum, exclusiveMinimum,
+exclusiveMaximum, multipleOf, allOf, anyOf, oneOf, not, if/then/else, dependencies y $ref
+locales. Las demás se ignoran, como las anotaciones (title, description, default...).
+
+Los errores vuelven todos juntos, en una pasada, como {ruta: [mensajes]}.
+"""
+import json
+import re
+import threading
+from collections import OrderedDict
+from decimal import Decimal, localcontext
+
+from django.conf import settings
+from django.core.validators import EmailValidator
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.dateparse import parse_date, parse_datetime
+
+ROOT_PATH = ''
+
+TYPES = {
+    'string': lambda v: isinstance(v, str),
+    'integer': lambda v: (isinstance(v, int) and not isinstance(v, bool)) or (isinstance(v, float) and v.is_integer()),
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'boolean': lambda v: isinstance(v, bool),
+    'object': lambda v: isinstance(v, dict),
+    'array': lambda v: isinstance(v, list),
+    'null': lambda v: v is None,
+}
+
+
+def _is_email(value):
+    try:
+        EmailValidator()(value)
+    except DjangoValidationError:
+        return False
+    return True
+
+
+def _is_multiple(value, divisor):
+    # En decimal y a partir del repr: con floats 0.3 / 0.1 da 2.9999999999999996. La
+    # precisión alcanza para el cociente entero completo, así el resto es exacto
+    value, divisor = Decimal(repr(value)), Decimal(repr(divisor))
+    try:
+        with localcontext() as context:
+            context.prec = max(context.prec, value.adjusted() - divisor.adjusted() + 2)
+            return value % divisor == 0
+    except ArithmeticError:
+        # Divisor 0 (esquema inválido) o infinitos
+        return False
+
+
+def _parses(parser):
+    # parse_date/parse_datetime devuelven None si no reconocen el formato, pero fallan
+    # con ValueError si el formato es válido y la fecha no existe (2026-02-30)
+    def check(value):
+        try:
+            return parser(value) is not None
+        except ValueError:
+            return False
+    return check
+
+
+FORMATS = {
+    'date': _parses(parse_date),
+    'date-time': _parses(parse_datetime),
+    'email': _is_email,
+}
+
+
+class SchemaError(Exception):
+    pass
+
+
+def join_path(path, key):
+    return f'{path}.{key}' if path else str(key)
+
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True)
+
+
+def _choices(values):
+    return ', '.join(str(v) for v in values[:10]) + ('...' if len(values) > 10 else '')
+
+
+class Compiler:
+    def __init__(self, root):
+        self.root = root
+        self.refs = {}
+
+    def resolve(self, ref):
+        if not ref.startswith('#'):
+            raise SchemaError(f'Solo se admiten $ref locales: {ref}')
+        node = self.root
+        for part in filter(None, ref[1:].split('/')):
+            part = part.replace('~1', '/').replace('~0', '~')
+            try:
+                node = node[int(part)] if isinstance(node, list) else node[part]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise SchemaError(f'$ref inexistente: {ref}')
+        return node
+
+    def ref(self, ref):
+        # Compilación diferida: admite schemas recursivos
+        if ref not in self.refs:
+            self.refs[ref] = None
+            self.refs[ref] = self.compile(self.resolve(ref))
+        checks = self.refs
+
+        def check(value, path, errors):
+            checks[ref](value, path, errors)
+        return check
+
+    def compile(self, schema):
+        if schema is True or schema == {}:
+            return lambda value, path, errors: None
+        if schema is False:
+            return lambda value, path, errors: errors.append((path, 'No se admite ningún valor.'))
+        if not isinstance(schema, dict):
+            raise SchemaError(f'Schema inválido: {schema!r}')
+        if '$ref' in schema:
+            return self.ref(schema['$ref'])
+
+        type_check = self.compile_type(schema.get('type'))
+        checks = []
+        for compile_keyword in (
+            self.compile_enum, self.compile_string, self.compile_number, self.compile_array,
+            self.compile_object, self.compile_combinators, self.compile_conditional,
+        ):
+            checks.extend(compile_keyword(schema))
+
+        def check(value, path, errors):
+            # Con el tipo equivocado el resto de las reglas no tiene sentido
+            if type_check and not type_check(value, path, errors):
+                return
+            for rule in checks:
+                rule(value, path, errors)
+        return check
+
+    def compile_type(self, types):
+        if types is None:
+            return None
+        types = [types] if isinstance(types, str) else list(types)
+        predicates = [TYPES[t] for t in types if t in TYPES]
+        if not predicates:
+            return None
+        message = f'Debe ser de tipo {" o ".join(types)}.'
+
+        def check(value, path, errors):
+            if any(predicate(value) for predicate in predicates):
+                return True
+            errors.append((path, message))
+            return False
+        return check
+
+    def compile_enum(self, schema):
+        checks = []
+        if 'enum' in schema:
+            allowed = {_canonical(v) for v in schema['enum']}
+            message = f'Debe ser uno de: {_choices(schema["enum"])}.'
+            checks.append(lambda v, p, e: _canonical(v) in allowed or e.append((p, message)))
+        if 'const' in schema:
+            expected = _canonical(schema['const'])
+            message = f'Debe ser {schema["const"]!r}.'
+            checks.append(lambda v, p, e: _canonical(v) == expected or e.append((p, message)))
+        return checks
+
+    def compile_string(self, schema):
+        checks = []
+        if 'minLength' in schema:
+            n = schema['minLength']
+            checks.append(lambda v, p, e: not isinstance(v, str) or len(v) >= n or e.append((p, f'Mínimo {n} caracteres.')))
+        if 'maxLength' in schema:
+            n = schema['maxLength']
+            checks.append(lambda v, p, e: not isinstance(v, str) or len(v) <= n or e.append((p, f'Máximo {n} caracteres.')))
+        if 'pattern' in schema:
+            regex = re.compile(schema['pattern'])
+            message = f'No cumple el formato {schema["pattern"]}.'
+            checks.append(lambda v, p, e: not isinstance(v, str) or regex.search(v) or e.append((p, message)))
+        if schema.get('format') in FORMATS:
+            is_valid = FORMATS[schema['format']]
+            message = f'Formato {schema["format"]} inválido.'
+            checks.append(lambda v, p, e: not isinstance(v, str) or is_valid(v) or e.append((p, message)))
+        return checks
+
+    def compile_number(self, schema):
+        def is_number(v):
+            return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+        checks = []
+        for keyword, holds, message in (
+            ('minimum', lambda v, n: v >= n, 'Debe ser mayor o igual a {}.'),
+            ('maximum', lambda v, n: v <= n, 'Debe ser menor o igual a {}.'),
+            ('exclusiveMinimum', lambda v, n: v > n, 'Debe ser mayor a {}.'),
+            ('exclusiveMaximum', lambda v, n: v < n, 'Debe ser menor a {}.'),
+            ('multipleOf', _is_multiple, 'Debe ser múltiplo de {}.'),
+        ):
+            # exclusiveMinimum/Maximum booleanos (draft 4) no se validan
+            if keyword in schema and is_number(schema[keyword]):
+                n, text = schema[keyword], message.format(schema[keyword])
+                checks.append(lambda v, p, e, n=n, holds=holds, text=text: not is_number(v) or holds(v, n) or e.append((p, text)))
+        return checks
+
+    def compile_array(self, schema):
+        checks = []
+        items = schema.get('items')
+        if isinstance(items, list):
+            item_checks = [self.compile(item) for item in items]
+
+            def check_tuple(value, path, errors):
+                if isinstance(value, list):
+                    for index, (item, item_check) in enumerate(zip(value, item_checks)):
+                        item_check(item, f'{path}[{index}]', errors)
+            checks.append(check_tuple)
+        elif items is not None:
+            item_check = self.compile(items)
+
+            def check_items(value, path, errors):
+                if isinstance(value, list):
+                    for index, item in enumerate(value):
+                        item_check(item, f'{path}[{index}]', errors)
+            checks.append(check_items)
+        if 'minItems' in schema:
+            n = schema['minItems']
+            checks.append(lambda v, p, e: not isinstance(v, list) or len(v) >= n or e.append((p, f'Elegir al menos {n}.')))
+        if 'maxItems' in schema:
+            n = schema['maxItems']
+            checks.append(lambda v, p, e: not isinstance(v, list) or len(v) <= n or e.append((p, f'Elegir como máximo {n}.')))
+        if schema.get('uniqueItems'):
+            checks.append(lambda v, p, e: (
+                not isinstance(v, list) or len({_canonical(i) for i in v}) == len(v) or e.append((p, 'Hay valores repetidos.'))
+            ))
+        return checks
+
+    def compile_object(self, schema):
+        checks = []
+        properties = {name: self.compile(sub) for name, sub in schema.get('properties', {}).items()}
+        additional = schema.get('additionalProperties', True)
+        additional_check = None if additional is True else self.compile(additional)
+        required = list(schema.get('required', []))
+
+        if properties or additional_check or required:
+            def check_object(value, path, errors):
+                if not isinstance(value, dict):
+                    return
+                for name in required:
+                    if name not in value:
+                        errors.append((join_path(path, name), 'Campo obligatorio.'))
+                for name, item in value.items():
+                    item_check = properties.get(name, additional_check)
+                    if item_check:
+                        item_check(item, join_path(path, name), errors)
+            checks.append(check_object)
+
+        for name, dependency in schema.get('dependencies', {}).items():
+            if isinstance(dependency, list):
+                def check_dependency(value, path, errors, name=name, needed=dependency):
+                    if isinstance(value, dict) and name in value:
+                        for other in needed:
+                            if other not in value:
+                                errors.append((join_path(path, other), 'Campo obligatorio.'))
+            else:
+                dependent_check = self.compile(dependency)
+
+                def check_dependency(value, path, errors, name=name, dependent_check=dependent_check):
+                    if isinstance(value, dict) and name in value:
+                        dependent_check(value, path, errors)
+            checks.append(check_dependency)
+        return checks
+
+    def compile_combinators(self, schema):
+        checks = []
+        if 'allOf' in schema:
+            subchecks = [self.compile(sub) for sub in schema['allOf']]
+
+            def check_all(value, path, errors):
+                for subcheck in subchecks:
+                    subcheck(value, path, errors)
+            checks.append(check_all)
+        for keyword, matches, message in (
+            ('anyOf', lambda passed: passed >= 1, 'No cumple ninguna de las opciones.'),
+            ('oneOf', lambda passed: passed == 1, 'Debe cumplir exactamente una de las opciones.'),
+        ):
+            if keyword in schema:
+                subchecks = [self.compile(sub) for sub in schema[keyword]]
+
+                def check_some(value, path, errors, subchecks=subchecks, matches=matches, message=message):
+                    if not matches(sum(1 for subcheck in subchecks if passes(subcheck, value, path))):
+                        errors.append((path, message))
+                checks.append(check_some)
+        if 'not' in schema:
+            negated = self.compile(schema['not'])
+            checks.append(lambda v, p, e: not passes(negated, v, p) or e.append((p, 'Valor no permitido.')))
+        return checks
+
+    def compile_conditional(self, schema):
+        if 'if' not in schema:
+            return []
+        condition = self.compile(schema['if'])
+        then_check = self.compile(schema.get('then', True))
+        else_check = self.compile(schema.get('else', True))
+
+        def check(value, path, errors):
+            (then_check if passes(condition, value, path) else else_check)(value, path, errors)
+        return [check]
+
+
+def passes(check, value, path):
+    errors = []
+    check(value, path, errors)
+    return not errors
+
+
+def compile_schema(schema):
+    """Validador para `schema`: recibe el valor y devuelve {ruta: [mensajes]} (vacío si es válido)."""
+    check = Compiler(schema).compile(schema)
+
+    def validate(value):
+        errors = []
+        check(value, ROOT_PATH, errors)
+        grouped = {}
+        for path, message in errors:
+            grouped.setdefault(path, []).append(message)
+        return grouped
+    return validate
+
+
+class ValidatorCache:
+    """LRU de validadores compilados, indexado por TestTemplateVersion.content_hash."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.validators = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, version):
+        key = version.content_hash
+        with self.lock:
+            if key in self.validators:
+                self.validators.move_to_end(key)
+                return self.validators[key]
+        validator = compile_schema(version.schema)
+        with self.lock:
+            self.validators[key] = validator
+            while len(self.validators) > self.max_size:
+                self.validators.popitem(last=False)
+        return validator
+
+    def clear(self):
+        with self.lock:
+            self.validators.clear()
+
+
+validators = ValidatorCache(settings.EVALUATION_VALIDATOR_CACHE_SIZE)
+
+
+def validate_results(version, results):
+    return validators.get(version)(results)
@@ -1,23 +1,246 @@
-from rest_framework import viewsets
+import datetime
+import hashlib
+from functools import partial
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from .models import TestTemplate, Evaluation
-from .serializers import TestTemplateSerializer, EvaluationSerializer
+from rest_framework.response import Response
+from appointments.models import Session
+from config.bulk import ERROR_POLICIES, BulkResults, bulk_items, bulk_option, ids_of, item_id
+from config.conditional import IMMUTABLE, conditional_response
+from config.response_cache import CachedListMixin
+from patients import summary as patient_summary
+from patients.models import Patient
+from search import index as search_index
+from sync.changes import record_changes
+from . import projection
+from .models import TestTemplate, TestTemplateVersion, Evaluation, EvaluationValue
+from .serializers import (
+    TestTemplateSerializer, TestTemplateSummarySerializer, TestTemplateVersionSerializer,
+    EvaluationSerializer, EvaluationSummarySerializer,
+)
 
-class TestTemplateViewSet(viewsets.ModelViewSet):
+
+def is_summary_view(view):
+    return view.action == 'list' and view.request.query_params.get('view') == 'summary'
+
+class TestTemplateViewSet(CachedListMixin, viewsets.ModelViewSet):
     # Templates are created by admins via the Django Admin panel, a future management interface,
     # or by professionals to create or modify custom tests.
-    queryset = TestTemplate.objects.all()
     serializer_class = TestTemplateSerializer
     permission_classes = [IsAuthenticated]
+    ordering = ('id',)
+    lookup_value_regex = r'\d+'
+    # Las plantillas son compartidas: una sola versión del cache para todos los usuarios
+    cache_scope = 'test_templates'
+    cache_per_user = False
+    MAX_DISTRIBUTION_VALUES = 100
+    # Todo lo que cambia la representación de una plantilla; schema y ui_schema entran vía content_hash
+    ETAG_FIELDS = ('id', 'content_hash', 'name', 'description', 'status')
+
+    def get_queryset(self):
+        queryset = TestTemplate.objects.select_related('current_version').order_by(*self.ordering)
+        if is_summary_view(self):
+            # Los JSON no se leen de la base: el listado solo muestra nombres
+            return queryset.only(
+                'id', 'name', 'description', 'status', 'content_hash', 'current_version__id', 'current_version__number',
+            )
+        return queryset.defer('current_version__schema', 'current_version__ui_schema')
+
+    def get_serializer_class(self):
+        if is_summary_view(self):
+            return TestTemplateSummarySerializer
+        return TestTemplateSerializer
+
+    def metadata_etag(self, queryset, *extra):
+        # Se calcula sin leer los JSON: si el cliente ya tiene esta versión no se serializa nada
+        digest = hashlib.sha1()
+        for row in (*extra, *queryset.values_list(*self.ETAG_FIELDS)):
+            digest.update(repr(row).encode())
+        return digest.hexdigest()
+
+    def list(self, request, *args, **kwargs):
+        etag = self.metadata_etag(self.filter_queryset(self.get_queryset()), request.get_full_path())
+        return conditional_response(request, etag, partial(super().list, request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = self.metadata_etag(self.get_queryset().filter(pk=kwargs['pk']))
+        return conditional_response(request, etag, partial(super().retrieve, request, *args, **kwargs))
+
+    @action(detail=True, methods=['get'])
+    def versions(self, request, pk=None):
+        """Historial de versiones de la plantilla (sin los schemas: ver /api/test-template-versions/{id}/)."""
+        template = self.get_object()
+        return Response([
+            {'id': v.id, 'number': v.number, 'content_hash': v.content_hash, 'created_at': v.created_at}
+            for v in template.versions.order_by('-number').only('id', 'number', 'content_hash', 'created_at')
+        ])
+
+    def template_values(self, request):
+        """Valores proyectados de las evaluaciones del usuario con esta plantilla, filtrados por ?since/?until."""
+        template = self.get_object()
+        values = EvaluationValue.objects.filter(user=request.user, test_template=template)
+        for param, lookup in (('since', 'date__gte'), ('until', 'date__lt')):
+            if request.query_params.get(param):
+                try:
+                    day = parse_date(request.query_params[param])
+                    if day is None:
+                        raise ValueError
+                except ValueError:
+                    raise ValidationError({param: 'Formato esperado: AAAA-MM-DD.'})
+                if param == 'until':
+                    day += datetime.timedelta(days=1)  # until es inclusivo
+                values = values.filter(**{lookup: timezone.make_aware(datetime.datetime.combine(day, datetime.time()))})
+        return template, values
+
+    @action(detail=True, methods=['get'])
+    def fields(self, request, pk=None):
+        """
+        Campos con datos en las evaluaciones de esta plantilla.
+        GET /api/test-templates/{id}/fields/?since=2026-07-01&until=2026-09-30
+        """
+        template, values = self.template_values(request)
+        rows = values.values('path').annotate(
+            values=Count('id'), evaluations=Count('evaluation', distinct=True), numeric=Count('value_number'),
+        ).order_by('path')
+        return Response({'template': template.id, 'fields': [
+            {'path': row['path'], 'values': row['values'], 'evaluations': row['evaluations'], 'numeric': row['numeric'] == row['values']}
+            for row in rows
+        ]})
+
+    @action(detail=True, methods=['get'])
+    def distribution(self, request, pk=None):
+        """
+        Distribución de un campo: cuántas veces y en cuántos pacientes aparece cada valor.
+        Con ?value= cuenta solo ese valor.
+        GET /api/test-templates/{id}/distribution/?path=curvatura_columna&value=Lordótica&since=2026-07-01
+        """
+        path = request.query_params.get('path')
+        if not path:
+            raise ValidationError({'path': 'Requerido.'})
+        template, values = self.template_values(request)
+        values = values.filter(path=path)
+        if 'value' in request.query_params:
+            values = values.filter(value_text=request.query_params['value'])
+
+        totals = values.aggregate(
+            count=Count('id'), evaluations=Count('evaluation', distinct=True), patients=Count('patient', distinct=True),
+            numeric_count=Count('value_number'), min=Min('value_number'), max=Max('value_number'), avg=Avg('value_number'),
+        )
+        distribution = values.values('value_text').annotate(
+            count=Count('id'), patients=Count('patient', distinct=True),
+        ).order_by('-count', 'value_text')[:self.MAX_DISTRIBUTION_VALUES]
+
+        response = {
+            'template': template.id, 'path': path,
+            'count': totals['count'], 'evaluations': totals['evaluations'], 'patients': totals['patients'],
+            'values': [{'value': row['value_text'], 'count': row['count'], 'patients': row['patients']} for row in distribution],
+        }
+        if totals['numeric_count']:
+            response['numeric'] = {key: totals[key] for key in ('min', 'max', 'avg')}
+        return Response(response)
+
+class TestTemplateVersionViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Versiones inmutables de las plantillas. El ETag es el hash del contenido y la respuesta
+    se puede cachear para siempre.
+    """
+    queryset = TestTemplateVersion.objects.all()
+    serializer_class = TestTemplateVersionSerializer
+    permission_classes = [IsAuthenticated]
+    ordering = ('id',)
+    lookup_value_regex = r'\d+'
+
+    def retrieve(self, request, *args, **kwargs):
+        content_hash = self.get_queryset().filter(pk=kwargs['pk']).values_list('content_hash', flat=True).first()
+        if content_hash is None:
+            return super().retrieve(request, *args, **kwargs)  # 404
+        return conditional_response(
+            request, content_hash, partial(super().retrieve, request, *args, **kwargs), cache_control=IMMUTABLE,
+        )
 
 class EvaluationViewSet(viewsets.ModelViewSet):
     serializer_class = EvaluationSerializer
     permission_classes = [IsAuthenticated]
+    ordering = ('-date', '-id')
 
     def get_queryset(self):
         # Users can only see evaluations they conducted
-        return Evaluation.objects.filter(user=self.request.user).order_by('-date')
+        queryset = Evaluation.objects.filter(user=self.request.user)
+        if is_summary_view(self):
+            queryset = queryset.only('id', 'patient', 'test_template', 'template_version', 'session', 'date')
+        return queryset.order_by(*self.ordering)
+
+    def get_serializer_class(self):
+        if is_summary_view(self):
+            return EvaluationSummarySerializer
+        return EvaluationSerializer
 
     def perform_create(self, serializer):
         # Automatically assign the logged-in user to the evaluation
         serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['post', 'patch'])
+    def bulk(self, request):
+        """
+        Alta (POST) o edición (PATCH, cada ítem con su "id") de varias evaluaciones en una transacción.
+        Body: [{"patient": 1, "test_template": 2, "results": {...}}, ...] o {"items": [...], "on_error": "reject|skip"}
+        """
+        user = request.user
+        items = bulk_items(request)
+        on_error = bulk_option(request, 'on_error', ERROR_POLICIES)
+        creating = request.method == 'POST'
+
+        instances = {} if creating else Evaluation.objects.filter(
+            user=user, id__in=ids_of(items, 'id')
+        ).select_related('patient', 'test_template__current_version', 'template_version').in_bulk()
+        context = {**self.get_serializer_context(), 'prefetched': {
+            Patient: Patient.objects.filter(user=user).in_bulk(ids_of(items, 'patient')),
+            TestTemplate: TestTemplate.objects.select_related('current_version').in_bulk(ids_of(items, 'test_template')),
+            Session: Session.objects.filter(appointment__user=user).in_bulk(ids_of(items, 'session')),
+        }}
+
+        results = BulkResults(len(items))
+        valid = []
+        for index, item in enumerate(items):
+            instance = None
+            if not creating:
+                instance = instances.get(item_id(item))
+                if instance is None:
+                    results.fail(index, 'not_found')
+                    continue
+            serializer = EvaluationSerializer(instance, data=item, partial=not creating, context=context)
+            if serializer.is_valid():
+                valid.append((index, instance, serializer.validated_data))
+            else:
+                results.fail(index, 'invalid', errors=serializer.errors)
+        if results.failed and on_error == 'reject':
+            return results.rejected_response('Hay evaluaciones inválidas; no se guardó ninguna.')
+
+        patients = {instance.patient_id for _, instance, _ in valid if instance}
+        with transaction.atomic():
+            if creating:
+                evaluations = Evaluation.objects.bulk_create([Evaluation(user=user, **data) for _, _, data in valid])
+            else:
+                evaluations, fields = [], set()
+                for _, instance, data in valid:
+                    for field, value in data.items():
+                        setattr(instance, field, value)
+                    fields.update(data)
+                    evaluations.append(instance)
+                if fields:
+                    Evaluation.objects.bulk_update(evaluations, fields)
+            # bulk_create/bulk_update no disparan señales: proyección, búsqueda, sync y resúmenes a mano
+            projection.refresh_many(evaluations)
+            search_index.update_documents(evaluations)
+            record_changes(user.id, 'evaluation', [evaluation.pk for evaluation in evaluations])
+            patient_summary.refresh(patients | {evaluation.patient_id for evaluation in evaluations})
+
+        for (index, _, _), evaluation in zip(valid, evaluations):
+            results.ok(index, 'created' if creating else 'updated', evaluation.pk)
+        return results.response(len(evaluations), status.HTTP_201_CREATED if creating else status.HTTP_200_OK)
@@ -0,0 +1,109 @@
+"""
+Prueba de carga con clientes lentos (celulares con mala señal) contra servidores ya
+levantados, para comparar el camino WSGI con el ASGI:
+
+    gunicorn config.wsgi -w 1 --threads 8 -b 127.0.0.1:8001
+    uvicorn config.asgi:application --workers 1 --port 8002
+    python loadtest_read_endpoints.py --token <token> http://127.0.0.1:8001 http://127.0.0.1:8002
+
+Cada cliente repite: abre una conexión, manda el request en partes con --send-delay
+segundos entre una y otra (como una red lenta), lee la respuesta y vuelve a empezar.
+Recorre el calendario de la semana, el listado de pacientes y (con --session) el detalle
+de una sesión.
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+def paths(args):
+    result = [
+        f'/api/appointments/?view=calendar&start={args.start}&end={args.end}',
+        '/api/patients/',
+    ]
+    if args.session:
+        result.append(f'/api/sessions/{args.session}/')
+    return result
+
+
+async def fetch(host, port, path, token, send_delay, parts=3):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAuthorization: Token {token}\r\n'
+            'Accept: application/json\r\nConnection: close\r\n\r\n'
+        ).encode()
+        size = -(-len(request) // parts)
+        for start in range(0, len(request), size):
+            if start:
+                await asyncio.sleep(send_delay)
+            writer.write(request[start:start + size])
+            await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1]) if response.startswith(b'HTTP/') else 0
+
+
+async def client(url, args, deadline, stats):
+    parts = urlsplit(url)
+    targets = paths(args)
+    index = 0
+    while time.perf_counter() < deadline:
+        path = targets[index % len(targets)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(
+                fetch(parts.hostname, parts.port or 80, path, args.token, args.send_delay), args.timeout,
+            )
+        except (OSError, asyncio.TimeoutError):
+            status = 0
+        if status == 200:
+            stats['latencies'].append(time.perf_counter() - started)
+        else:
+            stats['errors'] += 1
+
+
+async def load(url, args):
+    stats = {'latencies': [], 'errors': 0}
+    deadline = time.perf_counter() + args.seconds
+    await asyncio.gather(*(client(url, args, deadline, stats) for _ in range(args.clients)))
+    latencies = sorted(stats['latencies'])
+    percentile = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 if latencies else 0.0
+    return {
+        'ok': len(latencies),
+        'req/s': len(latencies) / args.seconds,
+        'p50 ms': percentile(0.5),
+        'p95 ms': percentile(0.95),
+        'errors': stats['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='+', help='Servidores a comparar, p. ej. http://127.0.0.1:8001')
+    parser.add_argument('--token', required=True)
+    parser.add_argument('--clients', type=int, default=100, help='Conexiones simultáneas.')
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--send-delay', type=float, default=0.3, help='Pausa entre las partes del request.')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--session', type=int, help='Id de una sesión para incluir su detalle.')
+    parser.add_argument('--start', default='2026-03-02')
+    parser.add_argument('--end', default='2026-03-09')
+    args = parser.parse_args()
+
+    print(f'{args.clients} clientes, {args.seconds:g} s, {args.send_delay:g} s entre partes del request\n')
+    columns = ['ok', 'req/s', 'p50 ms', 'p95 ms', 'errors']
+    width = max(len(url) for url in args.urls) + 2
+    print('servidor'.ljust(width) + ''.join(column.rjust(10) for column in columns))
+    for url in args.urls:
+        stats = asyncio.run(load(url, args))
+        print(url.ljust(width) + ''.join(
+            (f'{stats[column]:10d}' if isinstance(stats[column], int) else f'{stats[column]:10.1f}') for column in columns
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+from asgiref.sync import sync_to_async
+
+from config.asyncapi import authenticated_request, json_response, viewset_for
+from config.response_cache import cached_response
+from .views import PatientViewSet
+
+
+async def patient_list(request):
+    """
+    GET /api/patients/ (paginado por cursor, igual que PatientViewSet).
+
+    A propósito es un envoltorio de código sincrónico: la paginación por cursor de DRF y el
+    cache de respuestas no tienen versión async, y reescribirlos solo para esta vista
+    duplicaría la lógica de los cursores. Lo que se gana respecto de WSGI es que la
+    conexión lenta la espera el event loop; la consulta y la serialización ocupan un hilo.
+    """
+    if request.GET.get('view'):
+        return None  # el directorio (?view=directory) sigue en PatientViewSet
+    drf_request = await authenticated_request(request)
+    view = viewset_for(PatientViewSet, drf_request, 'list')
+    paginator = view.paginator
+
+    def build():
+        page = paginator.paginate_queryset(view.get_queryset(), drf_request, view)
+        return paginator.get_paginated_response(view.get_serializer(page, many=True).data)
+
+    # Cache, consulta y serialización juntas en un solo salto a sync_to_async
+    response = await sync_to_async(cached_response)(drf_request, view.cache_scope, drf_request.user.pk, build)
+    return json_response(response.data, headers={'X-Cache': response['X-Cache']})
@@ -0,0 +1,101 @@
+"""
+Directorio de pacientes: GET /api/patients/?view=directory
+
+    q=per              autocompletado: cada término es prefijo del apellido, del nombre o del DNI
+    sort=name          name, -name, last_visit, -last_visit, created, -created
+    active_plan=1      solo con (1) o sin (0) un plan de tratamiento activo
+    last_visit_after=2026-01-01 / last_visit_before=2026-06-30   (inclusivos)
+    limit=20           hasta MAX_LIMIT filas, sin paginar: {"results": [...], "has_more": true}
+
+Todo se resuelve con índices: los prefijos son rangos sobre last_name_key / first_name_key
+(patient_user_lastname_idx, patient_user_firstname_idx) y sobre el índice único del DNI;
+última visita, próximo turno, contadores y plan activo salen de la fila de PatientSummary
+de cada paciente (un JOIN por clave primaria, ver patients/summary.py).
+"""
+import datetime
+import re
+
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from . import summary
+from .models import Patient, search_key
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+MAX_TERMS = 4
+SORTS = {
+    'name': ('last_name_key', 'first_name_key', 'id'),
+    '-name': ('-last_name_key', '-first_name_key', '-id'),
+    'last_visit': (F('last_visit').asc(nulls_first=True), 'id'),
+    '-last_visit': (F('last_visit').desc(nulls_last=True), '-id'),
+    'created': ('created_at', 'id'),
+    '-created': ('-created_at', '-id'),
+}
+
+
+def prefix_range(field, prefix):
+    """`field` empieza con `prefix`, como rango (usa el índice; LIKE no lo hace en SQLite)."""
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix[:-1] + chr(ord(prefix[-1]) + 1)})
+
+
+def parse_day(params, param):
+    value = params.get(param)
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError
+    except ValueError:
+        raise ValidationError({param: 'Formato esperado: AAAA-MM-DD.'})
+    return day
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time()))
+
+
+def directory_queryset(user, params):
+    summary.refresh_stale(user)
+    queryset = Patient.objects.filter(user=user).annotate(
+        last_visit=F('summary__last_visit_at'),
+        next_appointment=F('summary__next_appointment_at'),
+        sessions_completed=F('summary__sessions_completed'),
+        sessions_missed=F('summary__sessions_missed'),
+        evaluations_count=F('summary__evaluations_count'),
+        has_active_plan=Q(summary__active_plan__isnull=False),
+    )
+
+    for term in re.findall(r'\w+', search_key(params.get('q', '')))[:MAX_TERMS]:
+        queryset = queryset.filter(
+            prefix_range('last_name_key', term) | prefix_range('first_name_key', term) | prefix_range('dni', term)
+        )
+
+    active_plan = params.get('active_plan')
+    if active_plan:
+        if active_plan not in ('0', '1'):
+            raise ValidationError({'active_plan': 'Debe ser 1 o 0.'})
+        queryset = queryset.filter(summary__active_plan__isnull=active_plan == '0')
+    after, before = parse_day(params, 'last_visit_after'), parse_day(params, 'last_visit_before')
+    if after:
+        queryset = queryset.filter(last_visit__gte=day_start(after))
+    if before:
+        queryset = queryset.filter(last_visit__lt=day_start(before + datetime.timedelta(days=1)))
+
+    sort = params.get('sort', 'name')
+    if sort not in SORTS:
+        raise ValidationError({'sort': f'Debe ser uno de: {", ".join(SORTS)}.'})
+    return queryset.order_by(*SORTS[sort])
+
+
+def parse_limit(params):
+    try:
+        limit = min(int(params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        raise ValidationError({'limit': 'Debe ser un entero positivo.'})
+    return limit
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from patients import summary
+from patients.models import Patient
+
+
+class Command(BaseCommand):
+    help = 'Regenera el resumen (PatientSummary) de los pacientes existentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help='Solo los pacientes de este usuario (repetible).')
+
+    def handle(self, *args, **options):
+        patients = Patient.objects.all()
+        if options['users']:
+            patients = patients.filter(user__in=options['users'])
+        total = summary.rebuild(patients)
+        self.stdout.write(self.style.SUCCESS(f'{total} resumen(es) de paciente regenerado(s).'))
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:11
+
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def search_key(value):
+    # Copia de patients.models.search_key: las migraciones no dependen del código actual
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold().strip()
+
+
+def fill_name_keys(apps, schema_editor):
+    Patient = apps.get_model('patients', 'Patient')
+    patients = list(Patient.objects.only('id', 'first_name', 'last_name'))
+    for patient in patients:
+        patient.last_name_key, patient.first_name_key = search_key(patient.last_name), search_key(patient.first_name)
+    Patient.objects.bulk_update(patients, ['last_name_key', 'first_name_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0002_patient_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='first_name_key',
+            field=models.CharField(default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='last_name_key',
+            field=models.CharField(default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['user', 'last_name_key', 'first_name_key'], name='patient_user_lastname_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['user', 'first_name_key'], name='patient_user_firstname_idx'),
+        ),
+    ]
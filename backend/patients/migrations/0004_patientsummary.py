@@ -0,0 +1,90 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Func, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Copia de patients/summary.py al crear la tabla: las migraciones no dependen del código actual
+FREE_STATUSES = ('cancelled', 'rescheduled')
+BATCH_SIZE = 500
+
+
+def count_of(queryset):
+    counted = queryset.order_by().annotate(total=Func(F('pk'), function='COUNT')).values('total')
+    return Coalesce(Subquery(counted[:1]), 0)
+
+
+def fill_summaries(apps, schema_editor):
+    Patient = apps.get_model('patients', 'Patient')
+    PatientSummary = apps.get_model('patients', 'PatientSummary')
+    Appointment = apps.get_model('appointments', 'Appointment')
+    Session = apps.get_model('appointments', 'Session')
+    TreatmentPlan = apps.get_model('appointments', 'TreatmentPlan')
+    Evaluation = apps.get_model('evaluations', 'Evaluation')
+
+    now = timezone.now()
+    appointments = Appointment.objects.filter(patient=OuterRef('pk')).exclude(status__in=FREE_STATUSES)
+    sessions = Session.objects.filter(appointment__patient=OuterRef('pk'))
+    rows = Patient.objects.order_by('pk').annotate(
+        summary_last_visit=Subquery(
+            appointments.filter(date_time__lt=now).order_by('-date_time').values('date_time')[:1]
+        ),
+        summary_next_appointment=Subquery(
+            appointments.filter(date_time__gte=now).order_by('date_time').values('date_time')[:1]
+        ),
+        summary_completed=count_of(sessions.filter(status='realizada')),
+        summary_missed=count_of(sessions.filter(status='ausente')),
+        summary_evaluations=count_of(Evaluation.objects.filter(patient=OuterRef('pk'))),
+        summary_plan=Subquery(
+            TreatmentPlan.objects.filter(patient=OuterRef('pk'), status='active')
+            .order_by('-start_date', '-id').values('id')[:1]
+        ),
+    ).values_list(
+        'pk', 'user_id', 'summary_last_visit', 'summary_next_appointment',
+        'summary_completed', 'summary_missed', 'summary_evaluations', 'summary_plan',
+    )
+    PatientSummary.objects.bulk_create(
+        (
+            PatientSummary(
+                patient_id=patient_id, user_id=user_id, last_visit_at=last_visit, next_appointment_at=next_appointment,
+                sessions_completed=completed, sessions_missed=missed, evaluations_count=evaluations, active_plan_id=plan,
+            )
+            for patient_id, user_id, last_visit, next_appointment, completed, missed, evaluations, plan
+            in rows.iterator(chunk_size=BATCH_SIZE)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_directory_indexes'),
+        ('evaluations', '0006_template_versions'),
+        ('patients', '0003_patient_name_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientSummary',
+            fields=[
+                ('patient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='patients.patient')),
+                ('last_visit_at', models.DateTimeField(blank=True, null=True)),
+                ('next_appointment_at', models.DateTimeField(blank=True, null=True)),
+                ('sessions_completed', models.PositiveIntegerField(default=0)),
+                ('sessions_missed', models.PositiveIntegerField(default=0)),
+                ('evaluations_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('active_plan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='appointments.treatmentplan')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'next_appointment_at'], name='summary_user_next_idx'), models.Index(fields=['user', 'last_visit_at'], name='summary_user_lastvisit_idx')],
+            },
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
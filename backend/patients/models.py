@@ -1,6 +1,15 @@
+import unicodedata
+
 from django.db import models
 from django.conf import settings
 
+
+def search_key(value):
+    """Forma de búsqueda de un nombre: minúsculas y sin tildes ("Pérez" -> "perez")."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold().strip()
+
+
 class Patient(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='patients', default=1)
     first_name = models.CharField(max_length=150)
@@ -10,6 +19,51 @@ class Patient(models.Model):
     phone = models.CharField(max_length=50, blank=True, null=True)
     birth_date = models.DateField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Copias normalizadas de los nombres para el directorio (patients/directory.py): el
+    # autocompletado busca por rango sobre el índice, sin LIKE ni funciones por fila
+    last_name_key = models.CharField(max_length=150, editable=False, default='')
+    first_name_key = models.CharField(max_length=150, editable=False, default='')
+
+    class Meta:
+        indexes = [
+            # Orden alfabético y autocompletado por apellido, por profesional
+            models.Index(fields=['user', 'last_name_key', 'first_name_key'], name='patient_user_lastname_idx'),
+            models.Index(fields=['user', 'first_name_key'], name='patient_user_firstname_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.dni})"
+
+    def save(self, *args, **kwargs):
+        self.last_name_key, self.first_name_key = search_key(self.last_name), search_key(self.first_name)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'last_name_key', 'first_name_key'}
+        super().save(*args, **kwargs)
+
+
+class PatientSummary(models.Model):
+    """
+    Datos de la ficha de cada paciente ya calculados (ver patients/summary.py): el directorio
+    y la ficha leen una fila en lugar de agregar turnos, sesiones, evaluaciones y planes.
+    """
+    patient = models.OneToOneField(Patient, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    # Copia de patient.user para filtrar sin JOIN
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    # Último turno pasado y próximo turno, sin contar cancelados ni reprogramados
+    last_visit_at = models.DateTimeField(null=True, blank=True)
+    next_appointment_at = models.DateTimeField(null=True, blank=True)
+    sessions_completed = models.PositiveIntegerField(default=0)
+    sessions_missed = models.PositiveIntegerField(default=0)
+    evaluations_count = models.PositiveIntegerField(default=0)
+    active_plan = models.ForeignKey('appointments.TreatmentPlan', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Filas vencidas (el próximo turno ya pasó) y orden por última visita
+            models.Index(fields=['user', 'next_appointment_at'], name='summary_user_next_idx'),
+            models.Index(fields=['user', 'last_visit_at'], name='summary_user_lastvisit_idx'),
+        ]
+
+    def __str__(self):
+        return f"Resumen de {self.patient}"
@@ -1,8 +1,22 @@
 from rest_framework import serializers
-from .models import Patient
+from .models import Patient, PatientSummary
 
 class PatientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Patient
-        fields = '__all__'
+        exclude = ('last_name_key', 'first_name_key')
         read_only_fields = ('user',)
+
+class PatientDirectorySerializer(PatientSerializer):
+    # Anotados en patients/directory.py
+    last_visit = serializers.DateTimeField(read_only=True)
+    next_appointment = serializers.DateTimeField(read_only=True)
+    sessions_completed = serializers.IntegerField(read_only=True)
+    sessions_missed = serializers.IntegerField(read_only=True)
+    evaluations_count = serializers.IntegerField(read_only=True)
+    has_active_plan = serializers.BooleanField(read_only=True)
+
+class PatientSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PatientSummary
+        exclude = ('user',)
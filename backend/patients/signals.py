@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from appointments.models import Appointment, Session, TreatmentPlan
+from config import response_cache
+from evaluations.models import Evaluation
+from . import summary
+from .models import Patient
+
+
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+def invalidate_patient_list(sender, instance, **kwargs):
+    response_cache.invalidate('patients', instance.user_id)
+
+
+@receiver(post_save, sender=Patient)
+def create_patient_summary(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        summary.refresh([instance.pk])
+
+
+def deleting_patients(origin):
+    # Si se borra el paciente (o la cuenta) su resumen se va con él: no hay que recalcularlo
+    model = getattr(origin, 'model', type(origin))
+    return model is Patient or model is get_user_model()
+
+
+@receiver(post_init, sender=Appointment)
+def remember_summary_patient(sender, instance, **kwargs):
+    # Si el turno pasa a otro paciente hay que recalcular también el resumen del anterior
+    instance._summary_patient_id = instance.__dict__.get('patient_id')
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_save, sender=Evaluation)
+@receiver(post_save, sender=TreatmentPlan)
+@receiver(post_delete, sender=Appointment)
+@receiver(post_delete, sender=Evaluation)
+@receiver(post_delete, sender=TreatmentPlan)
+def refresh_patient_summary(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or deleting_patients(origin):
+        return
+    summary.refresh({instance.patient_id, getattr(instance, '_summary_patient_id', None)})
+    instance._summary_patient_id = instance.patient_id
+
+
+@receiver(post_init, sender=Session)
+def remember_summary_status(sender, instance, **kwargs):
+    instance._summary_status = instance.__dict__.get('status') if instance.pk else None
+
+
+@receiver(post_save, sender=Session)
+@receiver(post_delete, sender=Session)
+def refresh_session_patient_summary(sender, instance, raw=False, origin=None, **kwargs):
+    # Del resumen solo importa el estado: editar notas o audio no lo toca
+    unchanged = kwargs['signal'] is post_save and instance._summary_status == instance.status
+    instance._summary_status = instance.status
+    if raw or unchanged or deleting_patients(origin):
+        return
+    # Si se está borrando el turno, el resumen lo recalcula su propia señal
+    summary.refresh(Appointment.objects.filter(pk=instance.appointment_id).values_list('patient_id', flat=True))
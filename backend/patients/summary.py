@@ -0,0 +1,106 @@
+"""
+Resumen de cada paciente (PatientSummary): última visita, próximo turno, sesiones
+realizadas y ausentes, evaluaciones y plan activo.
+
+Las señales de patients/signals.py recalculan la fila de un paciente cuando cambia uno de
+sus turnos, sesiones, evaluaciones o planes (una consulta y un upsert). Las escrituras que
+no disparan señales (bulk_create, bulk_update, update()) tienen que llamar a refresh() a
+mano, igual que con la búsqueda y el feed de sync. La migración que crea la tabla
+ya la llena; `manage.py rebuild_patient_summaries` regenera todo si hiciera falta.
+
+Última visita y próximo turno dependen de la hora: cuando pasa el próximo turno la fila
+queda vieja (next_appointment_at <= ahora) y refresh_stale() la recalcula antes de leer.
+"""
+from django.db.models import F, Func, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from appointments.conflicts import FREE_STATUSES
+from appointments.models import Appointment, Session, TreatmentPlan
+from evaluations.models import Evaluation
+from .models import Patient, PatientSummary
+
+BATCH_SIZE = 500
+# Columnas que se recalculan, en el orden de summary_rows()
+FIELDS = (
+    'user_id', 'last_visit_at', 'next_appointment_at',
+    'sessions_completed', 'sessions_missed', 'evaluations_count', 'active_plan_id',
+)
+UPDATE_FIELDS = [
+    'user', 'last_visit_at', 'next_appointment_at',
+    'sessions_completed', 'sessions_missed', 'evaluations_count', 'active_plan', 'updated_at',
+]
+
+
+def count_of(queryset):
+    """COUNT(*) de `queryset` (filtrado por OuterRef) como subconsulta escalar."""
+    counted = queryset.order_by().annotate(total=Func(F('pk'), function='COUNT')).values('total')
+    return Coalesce(Subquery(counted[:1]), 0)
+
+
+def summary_rows(patient_ids, now):
+    """(patient_id, *FIELDS) de cada paciente, en una sola consulta."""
+    appointments = Appointment.objects.filter(patient=OuterRef('pk')).exclude(status__in=FREE_STATUSES)
+    sessions = Session.objects.filter(appointment__patient=OuterRef('pk'))
+    return Patient.objects.filter(pk__in=patient_ids).annotate(
+        summary_last_visit=Subquery(
+            appointments.filter(date_time__lt=now).order_by('-date_time').values('date_time')[:1]
+        ),
+        summary_next_appointment=Subquery(
+            appointments.filter(date_time__gte=now).order_by('date_time').values('date_time')[:1]
+        ),
+        summary_completed=count_of(sessions.filter(status='realizada')),
+        summary_missed=count_of(sessions.filter(status='ausente')),
+        summary_evaluations=count_of(Evaluation.objects.filter(patient=OuterRef('pk'))),
+        summary_plan=Subquery(
+            TreatmentPlan.objects.filter(patient=OuterRef('pk'), status='active')
+            .order_by('-start_date', '-id').values('id')[:1]
+        ),
+    ).values_list(
+        'pk', 'user_id', 'summary_last_visit', 'summary_next_appointment',
+        'summary_completed', 'summary_missed', 'summary_evaluations', 'summary_plan',
+    )
+
+
+def refresh(patient_ids):
+    """Recalcula el resumen de `patient_ids` (los que ya no existen se ignoran)."""
+    patient_ids = sorted({patient_id for patient_id in patient_ids if patient_id is not None})
+    now = timezone.now()
+    for start in range(0, len(patient_ids), BATCH_SIZE):
+        summaries = [
+            PatientSummary(patient_id=row[0], **dict(zip(FIELDS, row[1:])))
+            for row in summary_rows(patient_ids[start:start + BATCH_SIZE], now)
+        ]
+        PatientSummary.objects.bulk_create(
+            summaries, update_conflicts=True, unique_fields=['patient'], update_fields=UPDATE_FIELDS,
+        )
+
+
+def refresh_stale(user):
+    """Recalcula los resúmenes de `user` cuyo próximo turno ya pasó."""
+    refresh(PatientSummary.objects.filter(
+        user=user, next_appointment_at__lte=timezone.now(),
+    ).values_list('patient_id', flat=True))
+
+
+def summary_for(patient):
+    """El resumen de `patient`, al día."""
+    summary = PatientSummary.objects.filter(patient=patient).first()
+    if summary is None or (summary.next_appointment_at and summary.next_appointment_at <= timezone.now()):
+        refresh([patient.pk])
+        summary = PatientSummary.objects.get(patient=patient)
+    return summary
+
+
+def rebuild(patients):
+    """Regenera el resumen de `patients` (un queryset). Devuelve cuántos quedaron."""
+    total = 0
+    batch = []
+    for patient_id in patients.values_list('pk', flat=True).iterator(chunk_size=BATCH_SIZE):
+        batch.append(patient_id)
+        if len(batch) >= BATCH_SIZE:
+            refresh(batch)
+            total += len(batch)
+            batch = []
+    refresh(batch)
+    return total + len(batch)
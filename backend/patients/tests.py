@@ -1,3 +1,205 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from config import caching
+from appointments.models import Appointment, Session, TreatmentPlan
+from evaluations.models import Evaluation, TestTemplate
+from .models import Patient, PatientSummary
 
-# Create your tests here.
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(user=self.user, first_name='Ana', last_name='Pérez', dni='1')
+
+    def names(self, url='/api/patients/', client=None, expect='HIT'):
+        response = (client or self.client).get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], expect)
+        return [row['first_name'] if 'first_name' in row else row['name'] for row in response.data['results']]
+
+    def test_repeated_reads_hit_until_a_write(self):
+        self.assertEqual(self.names(expect='MISS'), ['Ana'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['Ana'])
+        self.assertEqual(self.names('/api/patients/?page_size=1', expect='MISS'), ['Ana'])
+
+        # Otro profesional: su propio listado, y lo que escribe no invalida el de este
+        other = User.objects.create_user(username='otra', password='secret')
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        self.assertEqual(self.names(client=other_client, expect='MISS'), [])
+        Patient.objects.create(user=other, first_name='Luis', last_name='Gómez', dni='2')
+        self.assertEqual(self.names(), ['Ana'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/patients/{self.patient.id}/', {'first_name': 'Ana María'}, format='json')
+        self.assertEqual(self.names(expect='MISS'), ['Ana María'])
+        self.patient.delete()
+        self.assertEqual(self.names(expect='MISS'), [])
+
+    def test_shared_templates_and_stats(self):
+        template = TestTemplate.objects.create(name='Voz', schema={'type': 'object'})
+        self.assertEqual(self.names('/api/test-templates/', expect='MISS'), ['Voz'])
+        self.assertEqual(self.names('/api/test-templates/'), ['Voz'])
+        template.name = 'Voz y habla'
+        template.save()
+        self.assertEqual(self.names('/api/test-templates/', expect='MISS'), ['Voz y habla'])
+
+        self.assertEqual(self.client.get('/api/cache-stats/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        stats = self.client.get('/api/cache-stats/').data
+        self.assertEqual(stats['test_templates'], {'hits': 1, 'misses': 2, 'hit_rate': 0.333})
+
+    def test_process_local_cache_keeps_entries_briefly(self):
+        # Con LocMemCache otro worker no ve la invalidación: la respuesta dura poco
+        self.assertEqual(caching.timeout('default', 60 * 60 * 24), 30)
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(caching.timeout('default', 60 * 60 * 24), 60 * 60 * 24)
+
+
+class DirectoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        people = [('Ana', 'Pérez', '30111222'), ('Pedro', 'Álvarez', '28999000'), ('Lucía', 'Peralta', '41222333')]
+        self.ana, self.pedro, self.lucia = [
+            Patient.objects.create(user=self.user, first_name=first, last_name=last, dni=dni) for first, last, dni in people
+        ]
+        other = User.objects.create_user(username='otra', password='secret')
+        Patient.objects.create(user=other, first_name='Pablo', last_name='Pérez', dni='1')
+
+        now = timezone.now()
+        for patient, days_ago, status in ((self.ana, 3, 'completed'), (self.pedro, 40, 'completed'), (self.pedro, 2, 'cancelled')):
+            Appointment.objects.create(user=self.user, patient=patient, date_time=now - datetime.timedelta(days=days_ago), status=status)
+        Appointment.objects.create(user=self.user, patient=self.lucia, date_time=now + datetime.timedelta(days=5))
+        TreatmentPlan.objects.create(
+            user=self.user, patient=self.ana, start_date=now.date(), duration_months=3, sessions_per_week=1,
+        )
+
+    def directory(self, **params):
+        response = self.client.get('/api/patients/', {'view': 'directory', **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['last_name'] for row in response.data['results']]
+
+    def test_typeahead_ignores_case_and_accents(self):
+        self.assertEqual(self.directory(), ['Álvarez', 'Peralta', 'Pérez'])
+        self.assertEqual(self.directory(q='PER'), ['Peralta', 'Pérez'])
+        self.assertEqual(self.directory(q='alv'), ['Álvarez'])
+        self.assertEqual(self.directory(q='pe an'), ['Pérez'])  # apellido y nombre
+        self.assertEqual(self.directory(q='3011'), ['Pérez'])  # DNI
+        self.assertEqual(self.directory(q='lu'), ['Peralta'])
+
+        response = self.client.get('/api/patients/', {'view': 'directory', 'limit': 2})
+        self.assertTrue(response.data['has_more'])
+        self.assertNotIn('last_name_key', response.data['results'][0])
+
+    def test_last_visit_and_active_plan(self):
+        self.assertEqual(self.directory(sort='-last_visit'), ['Pérez', 'Álvarez', 'Peralta'])
+        self.assertEqual(self.directory(active_plan='1'), ['Pérez'])
+        self.assertEqual(self.directory(active_plan='0'), ['Álvarez', 'Peralta'])
+        since = (timezone.localdate() - datetime.timedelta(days=10)).isoformat()
+        self.assertEqual(self.directory(last_visit_before=since), ['Álvarez'])
+        self.assertEqual(self.directory(last_visit_after=since), ['Pérez'])
+
+        row = self.client.get('/api/patients/', {'view': 'directory', 'q': 'ana'}).data['results'][0]
+        self.assertTrue(row['has_active_plan'])
+        self.assertIsNotNone(row['last_visit'])
+        for params in ({'sort': 'dni'}, {'limit': 0}, {'active_plan': 'si'}, {'last_visit_after': 'ayer'}, {'last_visit_before': '2026-02-30'}):
+            self.assertEqual(self.client.get('/api/patients/', {'view': 'directory', **params}).status_code, 400)
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN es de SQLite')
+    def test_typeahead_uses_name_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.directory(q='per')
+        # La primera consulta busca resúmenes vencidos; la última es la del directorio
+        plan = connection.cursor().execute('EXPLAIN QUERY PLAN ' + queries.captured_queries[-1]['sql']).fetchall()
+        self.assertIn('patient_user_lastname_idx', str(plan))
+
+
+class PatientSummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(user=self.user, first_name='Ana', last_name='Pérez', dni='1')
+        self.now = timezone.now()
+
+    def summary(self):
+        response = self.client.get(f'/api/patients/{self.patient.id}/summary/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_signals_keep_the_row_up_to_date(self):
+        self.assertEqual(self.summary()['sessions_completed'], 0)
+        past = Appointment.objects.create(user=self.user, patient=self.patient, date_time=self.now - datetime.timedelta(days=7))
+        upcoming = Appointment.objects.create(user=self.user, patient=self.patient, date_time=self.now + datetime.timedelta(days=2))
+        session = Session.objects.create(appointment=past)
+        session.status = 'realizada'
+        session.save()
+        Evaluation.objects.create(
+            user=self.user, patient=self.patient, session=session, results={},
+            test_template=TestTemplate.objects.create(name='Voz', schema={'type': 'object'}),
+        )
+        plan = TreatmentPlan.objects.create(
+            user=self.user, patient=self.patient, start_date=self.now.date(), duration_months=3, sessions_per_week=1,
+        )
+
+        row = PatientSummary.objects.get(patient=self.patient)
+        self.assertEqual(row.last_visit_at, past.date_time)
+        self.assertEqual(row.next_appointment_at, upcoming.date_time)
+        self.assertEqual((row.sessions_completed, row.sessions_missed, row.evaluations_count), (1, 0, 1))
+        self.assertEqual(row.active_plan_id, plan.id)
+
+        # Guardar la sesión sin cambiar el estado no recalcula nada
+        with CaptureQueriesContext(connection) as queries:
+            session.written_notes = 'Sin novedades'
+            session.save()
+        self.assertNotIn('patients_patientsummary', str(queries.captured_queries))
+        upcoming.status = 'cancelled'
+        upcoming.save()
+        past.delete()
+        data = self.summary()
+        self.assertEqual((data['next_appointment_at'], data['last_visit_at'], data['sessions_completed']), (None, None, 0))
+
+        # Un turno que pasa a otro paciente actualiza los dos resúmenes
+        other = Patient.objects.create(user=self.user, first_name='Luis', last_name='Gómez', dni='2')
+        upcoming.status = 'scheduled'
+        upcoming.save()
+        upcoming.patient = other
+        upcoming.save()
+        self.assertIsNone(PatientSummary.objects.get(patient=self.patient).next_appointment_at)
+        self.assertEqual(PatientSummary.objects.get(patient=other).next_appointment_at, upcoming.date_time)
+
+        self.patient.delete()
+        self.assertFalse(PatientSummary.objects.filter(patient_id=plan.patient_id).exists())
+
+    def test_stale_rows_are_refreshed_before_reading(self):
+        appointment = Appointment.objects.create(user=self.user, patient=self.patient, date_time=self.now + datetime.timedelta(hours=1))
+        # Como si el turno ya hubiera pasado: la fila sigue diciendo "próximo"
+        Appointment.objects.filter(pk=appointment.pk).update(date_time=self.now - datetime.timedelta(hours=1))
+        PatientSummary.objects.filter(patient=self.patient).update(next_appointment_at=self.now - datetime.timedelta(hours=1))
+
+        row = self.client.get('/api/patients/', {'view': 'directory'}).data['results'][0]
+        self.assertIsNone(row['next_appointment'])
+        self.assertIsNotNone(row['last_visit'])
+
+    def test_rebuild_command(self):
+        Appointment.objects.create(user=self.user, patient=self.patient, date_time=self.now - datetime.timedelta(days=1))
+        PatientSummary.objects.all().delete()
+        call_command('rebuild_patient_summaries', stdout=StringIO())
+        self.assertEqual(PatientSummary.objects.get(patient=self.patient).last_visit_at.date(), (self.now - datetime.timedelta(days=1)).date())
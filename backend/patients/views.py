@@ -1,14 +1,43 @@
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from config.response_cache import CachedListMixin
+from . import directory, summary
 from .models import Patient
-from .serializers import PatientSerializer
+from .serializers import PatientSerializer, PatientDirectorySerializer, PatientSummarySerializer
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(CachedListMixin, viewsets.ModelViewSet):
     serializer_class = PatientSerializer
     permission_classes = [IsAuthenticated]
+    ordering = ('-created_at', '-id')
+    cache_scope = 'patients'
 
     def get_queryset(self):
-        return Patient.objects.filter(user=self.request.user).order_by('-created_at')
+        return Patient.objects.filter(user=self.request.user).order_by(*self.ordering)
+
+    def is_directory_view(self):
+        return self.action == 'list' and self.request.query_params.get('view') == 'directory'
+
+    def list(self, request, *args, **kwargs):
+        if self.is_directory_view():
+            # Depende de turnos, planes y la hora actual: no pasa por el cache de respuestas
+            return self.directory(request)
+        return super().list(request, *args, **kwargs)
+
+    def directory(self, request):
+        """Autocompletado, orden y filtros del directorio (ver patients/directory.py)."""
+        limit = directory.parse_limit(request.query_params)
+        patients = list(directory.directory_queryset(request.user, request.query_params)[:limit + 1])
+        return Response({
+            'results': PatientDirectorySerializer(patients[:limit], many=True).data,
+            'has_more': len(patients) > limit,
+        })
+
+    @action(detail=True, methods=['get'], url_path='summary')
+    def patient_summary(self, request, pk=None):
+        """Resumen de la ficha: última visita, próximo turno, sesiones, evaluaciones y plan activo."""
+        return Response(PatientSummarySerializer(summary.summary_for(self.get_object())).data)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -0,0 +1,252 @@
+"""
+Búsqueda de texto completo sobre pacientes, turnos, sesiones y evaluaciones.
+
+Cada objeto buscable se copia como título + cuerpo a SearchDocument (document_for() y las
+señales de search/signals.py). El índice lo mantiene la base de datos sobre esa tabla:
+
+- SQLite: tabla virtual FTS5 `search_index` con contenido externo, sincronizada por
+  triggers (migración 0002). Tokenizador unicode61 sin diacríticos ("perez" encuentra
+  "Pérez") e índices de prefijo para buscar mientras se escribe. Ranking con bm25.
+- PostgreSQL: índice GIN sobre to_tsvector con la configuración `es_unaccent`
+  (español + unaccent). Ranking con ts_rank.
+- Otros motores: icontains término por término, sin ranking.
+
+Todos los términos se buscan como prefijo y deben aparecer todos: "ana fon" encuentra a
+Ana en una nota de fonoaudiología y "3011" encuentra el DNI 30111222.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import SearchDocument
+
+MAX_TERMS = 8
+# Peso del título frente al cuerpo en el ranking
+TITLE_WEIGHT = 10.0
+SNIPPET_TOKENS = 16
+REBUILD_BATCH_SIZE = 1000
+TITLE_MAX_LENGTH = SearchDocument._meta.get_field('title').max_length
+
+# Postgres: misma expresión en el índice (migración 0002) y en la consulta
+PG_VECTOR = (
+    "setweight(to_tsvector('es_unaccent'::regconfig, d.title), 'A') || "
+    "setweight(to_tsvector('es_unaccent'::regconfig, d.body), 'B')"
+)
+
+
+def patient_name(patient):
+    return f"{patient.first_name} {patient.last_name}"
+
+
+def json_text(value):
+    """Textos de un JSON de resultados (valores string, a cualquier profundidad)."""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from json_text(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from json_text(item)
+    elif isinstance(value, str) and value.strip():
+        yield value.strip()
+
+
+def document_for(instance):
+    """
+    (kind, campos del SearchDocument) para `instance`, o (kind, None) si no hay nada que
+    indexar (p. ej. un turno sin notas: el paciente ya se encuentra por su propio documento).
+    """
+    from appointments.models import Appointment, Session
+    from evaluations.models import Evaluation
+    from patients.models import Patient
+
+    if isinstance(instance, Patient):
+        return 'patient', {
+            'user_id': instance.user_id, 'patient_id': instance.pk,
+            'title': patient_name(instance),
+            'body': ' '.join(filter(None, [instance.dni, instance.email, instance.phone])),
+        }
+    if isinstance(instance, Appointment):
+        if not instance.notes.strip():
+            return 'appointment', None
+        return 'appointment', {
+            'user_id': instance.user_id, 'patient_id': instance.patient_id,
+            'title': f"{patient_name(instance.patient)} · turno {instance.date_time:%d/%m/%Y}",
+            'body': instance.notes,
+        }
+    if isinstance(instance, Session):
+        body = '\n'.join(filter(None, [instance.written_notes.strip(), instance.transcript.strip()]))
+        if not body:
+            return 'session', None
+        appointment = instance.appointment
+        return 'session', {
+            'user_id': appointment.user_id, 'patient_id': appointment.patient_id,
+            'title': f"{patient_name(appointment.patient)} · sesión {appointment.date_time:%d/%m/%Y}",
+            'body': body,
+        }
+    if isinstance(instance, Evaluation):
+        return 'evaluation', {
+            'user_id': instance.user_id, 'patient_id': instance.patient_id,
+            'title': f"{instance.test_template.name} · {patient_name(instance.patient)}",
+            'body': '\n'.join(json_text(instance.results)),
+        }
+    raise TypeError(f'{type(instance).__name__} no es indexable')
+
+
+def _document_fields(instance):
+    kind, fields = document_for(instance)
+    if fields is not None:
+        fields['title'] = fields['title'][:TITLE_MAX_LENGTH]
+    return kind, fields
+
+
+def update_document(instance):
+    kind, fields = _document_fields(instance)
+    if fields is None:
+        remove_document(kind, instance.pk)
+    else:
+        SearchDocument.objects.update_or_create(kind=kind, object_id=instance.pk, defaults=fields)
+
+
+def update_documents(instances):
+    """
+    update_document() para muchos objetos, con una consulta por tipo para borrar y otra
+    para insertar. Para escrituras en lote (bulk_create/bulk_update no disparan señales).
+    """
+    stale, documents = {}, []
+    for instance in instances:
+        kind, fields = _document_fields(instance)
+        stale.setdefault(kind, []).append(instance.pk)
+        if fields is not None:
+            documents.append(SearchDocument(kind=kind, object_id=instance.pk, **fields))
+    for kind, object_ids in stale.items():
+        SearchDocument.objects.filter(kind=kind, object_id__in=object_ids).delete()
+    SearchDocument.objects.bulk_create(documents, batch_size=REBUILD_BATCH_SIZE)
+
+
+def update_patient_documents(patient):
+    """
+    Reindexa los turnos, sesiones y evaluaciones de `patient`: sus títulos llevan el nombre
+    del paciente, así que hay que rehacerlos cuando cambia.
+    """
+    from appointments.models import Appointment, Session
+    from evaluations.models import Evaluation
+
+    update_documents([
+        *Appointment.objects.filter(patient=patient).exclude(notes='').select_related('patient'),
+        *Session.objects.filter(appointment__patient=patient).select_related('appointment__patient'),
+        *Evaluation.objects.filter(patient=patient).select_related('patient', 'test_template'),
+    ])
+
+
+def remove_document(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def query_terms(query):
+    # \w deja afuera comillas, operadores y paréntesis: no hace falta escapar la sintaxis FTS
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def search(user, query, kinds=None, limit=20):
+    """
+    Documentos de `user` que contienen todos los términos de `query` (como prefijo),
+    ordenados por relevancia. Devuelve dicts con kind, id, patient_id, title y snippet.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(user, terms, kinds, limit)
+    if connection.vendor == 'postgresql':
+        return _search_postgres(user, terms, kinds, limit)
+    return _search_fallback(user, terms, kinds, limit)
+
+
+def _kind_filter(kinds, params):
+    if not kinds:
+        return ''
+    params.extend(kinds)
+    return f" AND d.kind IN ({', '.join(['%s'] * len(kinds))})"
+
+
+def _hits(cursor):
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _search_sqlite(user, terms, kinds, limit):
+    params = [' '.join(f'"{term}"*' for term in terms), user.pk]
+    sql = (
+        "SELECT d.kind, d.object_id AS id, d.patient_id, d.title,"
+        f" snippet(search_index, 1, '', '', '…', {SNIPPET_TOKENS}) AS snippet"
+        " FROM search_index JOIN search_searchdocument d ON d.id = search_index.rowid"
+        " WHERE search_index MATCH %s AND d.user_id = %s"
+        + _kind_filter(kinds, params) +
+        f" ORDER BY bm25(search_index, {TITLE_WEIGHT}, 1.0) LIMIT %s"
+    )
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return _hits(cursor)
+
+
+def _search_postgres(user, terms, kinds, limit):
+    params = [' & '.join(f'{term}:*' for term in terms), user.pk]
+    sql = (
+        "SELECT d.kind, d.object_id AS id, d.patient_id, d.title, left(d.body, 200) AS snippet"
+        " FROM search_searchdocument d, to_tsquery('es_unaccent'::regconfig, %s) query"
+        f" WHERE d.user_id = %s AND ({PG_VECTOR}) @@ query"
+        + _kind_filter(kinds, params) +
+        f" ORDER BY ts_rank({PG_VECTOR}, query) DESC LIMIT %s"
+    )
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return _hits(cursor)
+
+
+def _search_fallback(user, terms, kinds, limit):
+    documents = SearchDocument.objects.filter(user=user)
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    return [
+        {'kind': d.kind, 'id': d.object_id, 'patient_id': d.patient_id, 'title': d.title, 'snippet': d.body[:200]}
+        for d in documents.order_by('-updated_at')[:limit]
+    ]
+
+
+def rebuild(users=None):
+    """Regenera todos los documentos (o los de `users`). Devuelve cuántos quedaron."""
+    from appointments.models import Appointment, Session
+    from evaluations.models import Evaluation
+    from patients.models import Patient
+
+    sources = [
+        Patient.objects.all(),
+        Appointment.objects.exclude(notes='').select_related('patient'),
+        Session.objects.select_related('appointment__patient'),
+        Evaluation.objects.select_related('patient', 'test_template'),
+    ]
+    documents = SearchDocument.objects.all()
+    if users is not None:
+        documents = documents.filter(user__in=users)
+        sources = [
+            sources[0].filter(user__in=users), sources[1].filter(user__in=users),
+            sources[2].filter(appointment__user__in=users), sources[3].filter(user__in=users),
+        ]
+    documents.delete()
+
+    total, batch = 0, []
+    for queryset in sources:
+        for instance in queryset.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            kind, fields = _document_fields(instance)
+            if fields is not None:
+                batch.append(SearchDocument(kind=kind, object_id=instance.pk, **fields))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                total += len(SearchDocument.objects.bulk_create(batch))
+                batch = []
+    total += len(SearchDocument.objects.bulk_create(batch))
+    return total
@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from search import index
+
+
+class Command(BaseCommand):
+    help = 'Regenera el índice de búsqueda (después de cargas masivas, fixtures o la primera migración).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames', help='Solo este usuario (repetible).')
+
+    def handle(self, *args, **options):
+        users = None
+        if options['usernames']:
+            users = get_user_model().objects.filter(username__in=options['usernames'])
+        total = index.rebuild(users)
+        self.stdout.write(self.style.SUCCESS(f'{total} documento(s) indexado(s).'))
@@ -0,0 +1,82 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    # Contenido externo: el texto vive solo en search_searchdocument, FTS5 guarda el índice.
+    # remove_diacritics 2: "Pérez" == "perez"; prefix: consultas "ana"* sin recorrer el vocabulario
+    """
+    CREATE VIRTUAL TABLE search_index USING fts5(
+        title, body,
+        content='search_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER search_document_ai AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_index(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_document_ad AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_index(search_index, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_document_au AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_index(search_index, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO search_index(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    "INSERT INTO search_index(search_index) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS search_document_au",
+    "DROP TRIGGER IF EXISTS search_document_ad",
+    "DROP TRIGGER IF EXISTS search_document_ai",
+    "DROP TABLE IF EXISTS search_index",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'es_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION es_unaccent (COPY = spanish);
+            ALTER TEXT SEARCH CONFIGURATION es_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+        END IF;
+    END $$
+    """,
+    # Misma expresión que search.index.PG_VECTOR
+    """
+    CREATE INDEX search_document_fts_idx ON search_searchdocument USING GIN ((
+        setweight(to_tsvector('es_unaccent'::regconfig, title), 'A') ||
+        setweight(to_tsvector('es_unaccent'::regconfig, body), 'B')
+    ))
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS search_document_fts_idx",
+]
+
+
+def run(statements_by_vendor):
+    def operation(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import models
+from django.conf import settings
+from patients.models import Patient
+
+class SearchDocument(models.Model):
+    """
+    Copia del texto buscable de un objeto (paciente, turno, sesión o evaluación).
+    La mantienen las señales de search/signals.py; el índice de texto completo se arma
+    sobre esta tabla en la base de datos (ver search/index.py).
+    """
+    KIND_CHOICES = (
+        ('patient', 'Paciente'),
+        ('appointment', 'Turno'),
+        ('session', 'Sesión'),
+        ('evaluation', 'Evaluación'),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='search_documents')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, null=True, blank=True, related_name='search_documents')
+    title = models.CharField(max_length=300)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='searchdoc_kind_object_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id}: {self.title}"
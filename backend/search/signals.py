@@ -0,0 +1,38 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from appointments.models import Appointment, Session
+from evaluations.models import Evaluation
+from patients.models import Patient
+
+from . import index
+
+KINDS = {Patient: 'patient', Appointment: 'appointment', Session: 'session', Evaluation: 'evaluation'}
+
+
+@receiver(post_save)
+def update_search_document(sender, instance, raw=False, **kwargs):
+    # Los fixtures (raw) se indexan con `manage.py rebuild_search_index`
+    if sender in KINDS and not raw:
+        index.update_document(instance)
+
+
+@receiver(post_delete)
+def remove_search_document(sender, instance, **kwargs):
+    # En un borrado en cascada los objetos relacionados ya pueden no existir: solo se usa la pk
+    if sender in KINDS:
+        index.remove_document(KINDS[sender], instance.pk)
+
+
+@receiver(post_init, sender=Patient)
+def remember_patient_name(sender, instance, **kwargs):
+    instance._search_name = (instance.__dict__.get('first_name'), instance.__dict__.get('last_name'))
+
+
+@receiver(post_save, sender=Patient)
+def update_patient_documents(sender, instance, created=False, raw=False, **kwargs):
+    # Los documentos de turnos, sesiones y evaluaciones llevan el nombre en el título
+    name = (instance.first_name, instance.last_name)
+    if not created and not raw and name != instance._search_name:
+        index.update_patient_documents(instance)
+    instance._search_name = name
@@ -0,0 +1,79 @@
+import datetime
+import io
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from appointments.models import Appointment, Session
+from evaluations.models import TestTemplate, Evaluation
+from patients.models import Patient
+from .models import SearchDocument
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(user=self.user, first_name='José', last_name='Pérez', dni='30111222')
+        appointment = Appointment.objects.create(
+            user=self.user, patient=self.patient, date_time=timezone.make_aware(datetime.datetime(2026, 3, 2, 16)),
+        )
+        self.session = Session.objects.create(appointment=appointment, written_notes='Disfonía leve, trabajar respiración.')
+        template = TestTemplate.objects.create(name='Evaluación vocal', schema={})
+        Evaluation.objects.create(
+            user=self.user, patient=self.patient, test_template=template,
+            results={'voz': {'observaciones': 'Ronquera matutina'}, 'puntaje': 7},
+        )
+
+    def search(self, q, **params):
+        response = self.client.get('/api/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(hit['kind'], hit['id']) for hit in response.data['results']]
+
+    def test_accent_insensitive_prefix_matching(self):
+        self.assertEqual(self.search('jose perez', kind='patient'), [('patient', self.patient.id)])
+        self.assertEqual(self.search('3011'), [('patient', self.patient.id)])
+        self.assertEqual(self.search('disfonia'), [('session', self.session.id)])
+        self.assertEqual([kind for kind, _ in self.search('ronq')], ['evaluation'])
+
+    def test_title_matches_rank_first_and_kind_filter(self):
+        self.assertEqual(self.search('perez')[0], ('patient', self.patient.id))
+        self.assertEqual({kind for kind, _ in self.search('perez', kind='session,evaluation')}, {'session', 'evaluation'})
+        self.assertEqual(self.client.get('/api/search/', {'q': 'x', 'kind': 'otro'}).status_code, 400)
+
+    def test_index_follows_updates_deletes_and_users(self):
+        self.session.written_notes = 'Alta fonoaudiológica'
+        self.session.save()
+        self.assertEqual(self.search('disfonia'), [])
+        self.assertEqual(self.search('"alta" (fono*'), [('session', self.session.id)])
+
+        other = User.objects.create_user(username='otra', password='secret')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.search('perez'), [])
+
+        self.client.force_authenticate(self.user)
+        self.patient.delete()
+        self.assertEqual(self.search('perez'), [])
+        self.assertFalse(SearchDocument.objects.exists())
+
+    def test_renaming_patient_updates_related_titles(self):
+        # Sin cambio de nombre no se tocan los demás documentos
+        with CaptureQueriesContext(connection) as queries:
+            self.patient.dni = '30111223'
+            self.patient.save(update_fields=['dni'])
+        self.assertNotIn('evaluations_evaluation', str(queries.captured_queries))
+        self.patient.last_name = 'Gómez'
+        self.patient.save()
+        self.assertEqual({kind for kind, _ in self.search('gomez')}, {'patient', 'session', 'evaluation'})
+        self.assertEqual(self.search('perez'), [])
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self.search('perez'), [])
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(SearchDocument.objects.count(), 3)
+        self.assertEqual(self.search('disfonia'), [('session', self.session.id)])
@@ -0,0 +1,32 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import index
+from .models import SearchDocument
+
+
+class SearchView(APIView):
+    """
+    Búsqueda unificada en pacientes, notas de turnos y sesiones y resultados de evaluaciones.
+    GET /api/search/?q=perez disfonia&kind=session&kind=evaluation&limit=20
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_LIMIT = 100
+
+    def get(self, request):
+        params = request.query_params
+        kinds = [kind for value in params.getlist('kind') for kind in value.split(',') if kind]
+        valid_kinds = dict(SearchDocument.KIND_CHOICES)
+        if any(kind not in valid_kinds for kind in kinds):
+            raise ValidationError({'kind': f'Valores posibles: {", ".join(valid_kinds)}.'})
+        try:
+            limit = min(int(params.get('limit', 20)), self.MAX_LIMIT)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({'limit': 'Debe ser un entero positivo.'})
+
+        query = params.get('q', '')
+        return Response({'query': query, 'results': index.search(request.user, query, kinds, limit)})
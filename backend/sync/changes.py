@@ -0,0 +1,41 @@
+"""
+Registro de cambios para la sincronización offline (ver sync/models.Change).
+
+Las señales de sync/signals.py anotan cada save()/delete() de los modelos sincronizables.
+Las escrituras que no disparan señales (bulk_create, bulk_update, update()) tienen que
+llamar a record_changes() a mano, igual que con la disponibilidad y el índice de búsqueda.
+
+El token es el id autoincremental, que se asigna al insertar y no al confirmar. Para que
+un cliente nunca avance más allá de un cambio todavía sin confirmar, los cambios de un
+mismo usuario se anotan de a una transacción por vez: record_changes() bloquea la fila
+del usuario hasta el commit. En SQLite no hace falta (las escrituras ya van de a una);
+en Postgres una transacción larga (un lote, una recurrencia) demora las escrituras de
+ese usuario, no las de los demás.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from . import notify
+from .models import Change
+
+BATCH_SIZE = 1000
+
+
+def record_changes(user_id, kind, object_ids, deleted=False):
+    """Anota que cambiaron (o se borraron) `object_ids` de `kind`, con un token nuevo cada uno."""
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    with transaction.atomic(savepoint=False):
+        if connection.features.has_select_for_update:
+            list(get_user_model().objects.select_for_update().filter(pk=user_id).values_list('pk'))
+        # Borrar y volver a insertar (en vez de update) es lo que le da al objeto un id mayor
+        Change.objects.filter(kind=kind, object_id__in=object_ids).delete()
+        Change.objects.bulk_create(
+            [Change(user_id=user_id, kind=kind, object_id=object_id, deleted=deleted) for object_id in object_ids],
+            batch_size=BATCH_SIZE,
+        )
+    # Las conexiones en vivo del usuario releen el feed cuando el cambio ya es visible
+    transaction.on_commit(partial(notify.notify, user_id))
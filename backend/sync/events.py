@@ -0,0 +1,88 @@
+"""
+Canal en vivo (Server-Sent Events) sobre el feed de cambios, para que los dispositivos de
+un mismo consultorio vean los turnos, sesiones y tratamientos que cargan los otros sin
+recargar el calendario. Solo en el modo ASGI (config/asgi_urls.py): con WSGI cada conexión
+abierta ocuparía un hilo.
+
+    GET /api/sync/events/?kinds=appointment,session&since=<token>
+
+Cada evento `changes` trae lo mismo que /api/sync/ (solo los tipos pedidos; por defecto
+EVENT_KINDS) y su id es el token: al reconectar el navegador lo manda en Last-Event-ID y
+no se pierde nada. Sin since ni Last-Event-ID arranca desde ahora.
+
+La conexión espera un aviso de sync/notify.py (los cambios de este proceso llegan al
+instante) o, a lo sumo, SYNC_EVENTS_POLL_SECONDS, y entonces relee el feed; en cada espera
+sin novedades manda un comentario para que los proxies no la corten. Se cierra sola a los
+SYNC_EVENTS_MAX_SECONDS y el cliente reconecta (y se vuelve a validar el token).
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import exceptions
+from rest_framework.utils.encoders import JSONEncoder
+
+from config.asyncapi import authenticated_request, error_response
+from .models import Change
+from .notify import listening
+from .registry import KINDS
+from .views import changes_since, parse_token
+
+EVENT_KINDS = ('appointment', 'session', 'treatment_plan')
+
+
+def parse_kinds(value):
+    if not value:
+        return EVENT_KINDS
+    kinds = tuple(dict.fromkeys(kind.strip() for kind in value.split(',')))
+    if not all(kind in KINDS for kind in kinds):
+        raise exceptions.ValidationError({'kinds': f'Deben ser de: {", ".join(KINDS)}.'})
+    return kinds
+
+
+def format_event(payload):
+    return f"event: changes\nid: {payload['token']}\ndata: {json.dumps(payload, cls=JSONEncoder)}\n\n"
+
+
+async def change_events(request):
+    try:
+        drf_request = await authenticated_request(request)
+        kinds = parse_kinds(request.GET.get('kinds'))
+        # Al reconectar, el último evento recibido manda sobre el since original de la URL
+        since = request.headers.get('Last-Event-ID') or request.GET.get('since')
+        since = parse_token(since, 'since') if since else await latest_token(drf_request.user)
+    except exceptions.APIException as e:
+        return error_response(e, request)
+    response = StreamingHttpResponse(stream(drf_request, since, kinds), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: no juntar los eventos en el buffer
+    return response
+
+
+async def latest_token(user):
+    change = await Change.objects.filter(user=user).order_by('-id').only('id').afirst()
+    return change.id if change else 0
+
+
+async def stream(drf_request, since, kinds):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SYNC_EVENTS_MAX_SECONDS
+    read_feed = sync_to_async(changes_since)
+    # El id sin datos no es un evento, pero fija desde dónde sigue el cliente si se corta ya
+    yield f'retry: {settings.SYNC_EVENTS_RETRY_MS}\nid: {since}\n\n'
+    with listening(drf_request.user.id) as wakeup:
+        while loop.time() < deadline:
+            # Antes de leer: un aviso que llegue durante la lectura no se pierde
+            wakeup.clear()
+            payload = await read_feed(drf_request, since, settings.SYNC_PAGE_SIZE, kinds)
+            if payload['token'] != str(since):
+                since = int(payload['token'])
+                yield format_event(payload)
+                if payload['has_more']:
+                    continue
+            try:
+                await asyncio.wait_for(wakeup.wait(), min(settings.SYNC_EVENTS_POLL_SECONDS, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('patient', 'Paciente'), ('treatment_plan', 'Plan de tratamiento'), ('appointment', 'Turno'), ('session', 'Sesión'), ('evaluation', 'Evaluación')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_changes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'id'], name='syncchange_feed_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='syncchange_kind_object_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ClientObject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(max_length=64)),
+                ('kind', models.CharField(choices=[('patient', 'Paciente'), ('treatment_plan', 'Plan de tratamiento'), ('appointment', 'Turno'), ('session', 'Sesión'), ('evaluation', 'Evaluación')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_client_objects', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'client_id'), name='syncclientobject_user_client_uniq')],
+            },
+        ),
+    ]
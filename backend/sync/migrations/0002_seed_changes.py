@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# (app, modelo, tipo, lookup del dueño)
+SOURCES = [
+    ('patients', 'Patient', 'patient', 'user_id'),
+    ('appointments', 'TreatmentPlan', 'treatment_plan', 'user_id'),
+    ('appointments', 'Appointment', 'appointment', 'user_id'),
+    ('appointments', 'Session', 'session', 'appointment__user_id'),
+    ('evaluations', 'Evaluation', 'evaluation', 'user_id'),
+]
+
+
+def seed(apps, schema_editor):
+    """Un cambio por cada objeto existente: así `since=0` devuelve todo lo anterior al feed."""
+    Change = apps.get_model('sync', 'Change')
+    for app_label, model_name, kind, owner in SOURCES:
+        rows = apps.get_model(app_label, model_name).objects.order_by('pk').values_list('pk', owner)
+        Change.objects.bulk_create(
+            (Change(user_id=user_id, kind=kind, object_id=pk) for pk, user_id in rows.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+        ('patients', '0002_patient_user'),
+        ('appointments', '0007_session_transcript'),
+        ('evaluations', '0006_template_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, migrations.RunPython.noop),
+    ]
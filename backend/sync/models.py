@@ -0,0 +1,54 @@
+from django.db import models
+from django.conf import settings
+
+class Change(models.Model):
+    """
+    Último cambio de cada objeto sincronizable: una fila por objeto, que se reemplaza por
+    otra con id nuevo en cada escritura. El id es el token del feed (/api/sync/?since=):
+    un cliente que vio hasta el id N solo necesita las filas con id > N.
+    """
+    KIND_CHOICES = (
+        ('patient', 'Paciente'),
+        ('treatment_plan', 'Plan de tratamiento'),
+        ('appointment', 'Turno'),
+        ('session', 'Sesión'),
+        ('evaluation', 'Evaluación'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sync_changes')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='syncchange_kind_object_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'id'], name='syncchange_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.get_kind_display()} {self.object_id}{' (borrado)' if self.deleted else ''}"
+
+class ClientObject(models.Model):
+    """
+    Objeto creado desde un cliente offline, por el id temporal que le puso el cliente.
+    Hace idempotente el reenvío de una cola (si se cortó la respuesta, no se duplica)
+    y permite referenciarlo en otros cambios antes de conocer su id real.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sync_client_objects')
+    client_id = models.CharField(max_length=64)
+    kind = models.CharField(max_length=20, choices=Change.KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], name='syncclientobject_user_client_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id} → {self.get_kind_display()} {self.object_id}"
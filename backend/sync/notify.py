@@ -0,0 +1,38 @@
+"""
+Avisos en el mismo proceso de que un usuario tiene cambios nuevos en el feed, para
+despertar a sus conexiones de /api/sync/events/ (ver sync/events.py) sin esperar al
+próximo sondeo. record_changes() avisa cuando la transacción se confirma.
+
+Con varios procesos cada uno solo se entera de lo que escribe él: lo que escribe otro
+llega en el sondeo periódico de la conexión (SYNC_EVENTS_POLL_SECONDS).
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+# user_id -> {(event loop, asyncio.Event)} de cada conexión abierta
+_listeners = {}
+
+
+def notify(user_id):
+    with _lock:
+        listeners = list(_listeners.get(user_id, ()))
+    for loop, event in listeners:
+        # Los save() corren en otro hilo que el event loop de la conexión
+        loop.call_soon_threadsafe(event.set)
+
+
+@contextmanager
+def listening(user_id):
+    """asyncio.Event que se activa con cada notify(user_id) mientras dure el bloque."""
+    listener = (asyncio.get_running_loop(), asyncio.Event())
+    with _lock:
+        _listeners.setdefault(user_id, set()).add(listener)
+    try:
+        yield listener[1]
+    finally:
+        with _lock:
+            _listeners[user_id].discard(listener)
+            if not _listeners[user_id]:
+                del _listeners[user_id]
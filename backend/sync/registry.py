@@ -0,0 +1,42 @@
+"""
+Modelos que se sincronizan con los clientes offline: nombre del tipo, serializer y dueño.
+"""
+from collections import namedtuple
+
+from django.db.models import Count
+
+from appointments.models import Appointment, Session, TreatmentPlan
+from appointments.serializers import AppointmentSerializer, SessionSerializer, TreatmentPlanSerializer
+from evaluations.models import Evaluation
+from evaluations.serializers import EvaluationSerializer
+from patients.models import Patient
+from patients.serializers import PatientSerializer
+
+# owner: lookup hasta el usuario dueño; rows: ajusta la consulta para serializar sin N+1
+SyncKind = namedtuple('SyncKind', 'model serializer_class owner rows')
+
+KINDS = {
+    'patient': SyncKind(Patient, PatientSerializer, 'user', lambda qs: qs),
+    'treatment_plan': SyncKind(TreatmentPlan, TreatmentPlanSerializer, 'user', lambda qs: qs),
+    'appointment': SyncKind(Appointment, AppointmentSerializer, 'user', lambda qs: qs.select_related('patient')),
+    'session': SyncKind(
+        Session, SessionSerializer, 'appointment__user', lambda qs: qs.annotate(evaluations_total=Count('evaluations')),
+    ),
+    'evaluation': SyncKind(Evaluation, EvaluationSerializer, 'user', lambda qs: qs),
+}
+
+MODEL_KINDS = {kind.model: name for name, kind in KINDS.items()}
+
+
+def owner_id(instance):
+    if isinstance(instance, Session):
+        return instance.appointment.user_id
+    return instance.user_id
+
+
+def owned(kind, user):
+    return KINDS[kind].model.objects.filter(**{KINDS[kind].owner: user})
+
+
+def rows(kind, user, object_ids):
+    return KINDS[kind].rows(owned(kind, user).filter(pk__in=object_ids)).order_by('pk')
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+
+from .changes import record_changes
+from .registry import MODEL_KINDS, owner_id
+
+
+def record_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_changes(owner_id(instance), MODEL_KINDS[sender], [instance.pk])
+
+
+def record_delete(sender, instance, origin=None, **kwargs):
+    # Si se borra la cuenta entera no hay a quién avisarle (y el usuario ya no existiría)
+    if not isinstance(origin, get_user_model()):
+        record_changes(owner_id(instance), MODEL_KINDS[sender], [instance.pk], deleted=True)
+
+
+for model in MODEL_KINDS:
+    post_save.connect(record_save, sender=model, dispatch_uid=f'sync_save_{model._meta.label}')
+    post_delete.connect(record_delete, sender=model, dispatch_uid=f'sync_delete_{model._meta.label}')
@@ -0,0 +1,192 @@
+import asyncio
+import datetime
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from appointments.models import Appointment, Session
+from patients.models import Patient
+from . import notify
+from .models import Change
+
+
+class SyncFeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(user=self.user, first_name='Ana', last_name='Pérez', dni='1')
+        self.at = lambda day, hour: timezone.make_aware(datetime.datetime(2026, 3, day, hour))
+        self.appointment = Appointment.objects.create(user=self.user, patient=self.patient, date_time=self.at(2, 16))
+        other = User.objects.create_user(username='otra', password='secret')
+        Patient.objects.create(user=other, first_name='Luis', last_name='Gómez', dni='2')
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_then_delta(self):
+        data = self.sync()
+        self.assertEqual([p['first_name'] for p in data['changes']['patient']['updated']], ['Ana'])
+        self.assertEqual(len(data['changes']['appointment']['updated']), 1)
+
+        self.assertEqual(self.sync(data['token'])['token'], data['token'])
+        self.patient.phone = '1155550000'
+        self.patient.save()
+        session_id = Session.objects.create(appointment=self.appointment).id
+        Session.objects.filter(pk=session_id).delete()
+
+        delta = self.sync(data['token'])
+        self.assertEqual(delta['changes']['patient']['updated'][0]['phone'], '1155550000')
+        self.assertEqual(delta['changes']['appointment']['updated'], [])
+        self.assertEqual(delta['changes']['session'], {'updated': [], 'deleted': [session_id]})
+        # Un objeto figura una sola vez aunque haya cambiado varias
+        self.assertEqual(Change.objects.filter(kind='session').count(), 1)
+
+    def test_pages_and_bulk_writes(self):
+        token = self.sync()['token']
+        response = self.client.post('/api/appointments/bulk/', [
+            {'patient': self.patient.id, 'date_time': self.at(day, 9).isoformat()} for day in range(3, 8)
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+
+        page = self.sync(token, limit=3)
+        self.assertTrue(page['has_more'])
+        rest = self.sync(page['token'], limit=3)
+        self.assertFalse(rest['has_more'])
+        self.assertEqual(len(page['changes']['appointment']['updated']) + len(rest['changes']['appointment']['updated']), 5)
+
+
+class SyncPushTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(user=self.user, first_name='Ana', last_name='Pérez', dni='1')
+        self.token = self.client.get('/api/sync/').data['token']
+
+    def push(self, *changes):
+        response = self.client.post('/api/sync/push/', {'changes': list(changes)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_offline_creates_are_idempotent_and_referenceable(self):
+        changes = [
+            {'kind': 'patient', 'op': 'create', 'client_id': 'tmp-1', 'data': {'first_name': 'Luis', 'last_name': 'Gómez', 'dni': '2'}},
+            {'kind': 'appointment', 'op': 'create', 'client_id': 'tmp-2',
+             'data': {'patient': {'client_id': 'tmp-1'}, 'date_time': '2026-03-02T16:00:00-03:00'}},
+            {'kind': 'appointment', 'op': 'update', 'id': {'client_id': 'tmp-2'}, 'data': {'notes': 'Primera consulta'}},
+        ]
+        first = self.push(*changes)
+        self.assertEqual([r['status'] for r in first], ['applied'] * 3)
+        appointment = Appointment.objects.get(pk=first[1]['id'])
+        self.assertEqual((appointment.patient_id, appointment.notes), (first[0]['id'], 'Primera consulta'))
+
+        again = self.push(*changes[:2])
+        self.assertEqual([r['id'] for r in again], [first[0]['id'], first[1]['id']])
+        self.assertEqual(Patient.objects.count(), 2)
+
+    def test_stale_update_conflicts(self):
+        self.patient.phone = '1155550000'
+        self.patient.save()
+        result, = self.push({'kind': 'patient', 'op': 'update', 'id': self.patient.id, 'base_token': self.token, 'data': {'phone': '0'}})
+        self.assertEqual(result['status'], 'conflict')
+        self.assertEqual(result['current']['phone'], '1155550000')
+
+        appointment = Appointment.objects.create(user=self.user, patient=self.patient, date_time=timezone.now())
+        Session.objects.create(appointment=appointment)
+        token = self.client.get('/api/sync/', {'since': self.token}).data['token']
+        result, = self.push({'kind': 'patient', 'op': 'delete', 'id': self.patient.id, 'base_token': token})
+        self.assertEqual(result['status'], 'applied')
+        # El borrado en cascada deja la baja de cada objeto en el feed
+        deleted = self.client.get('/api/sync/', {'since': token}).data['changes']
+        self.assertEqual([len(deleted[kind]['deleted']) for kind in ('patient', 'appointment', 'session')], [1, 1, 1])
+        # Quien lo editó offline sin ver el borrado recibe el conflicto, sin versión actual
+        result, = self.push({'kind': 'patient', 'op': 'update', 'id': self.patient.id, 'base_token': self.token, 'data': {'phone': '1'}})
+        self.assertEqual((result['status'], result['current']), ('conflict', None))
+
+    def test_rejects_foreign_references(self):
+        other = User.objects.create_user(username='otra', password='secret')
+        foreign = Patient.objects.create(user=other, first_name='Luis', last_name='Gómez', dni='2')
+        result, = self.push({'kind': 'appointment', 'op': 'create', 'data': {'patient': foreign.id, 'date_time': '2026-03-02T16:00:00-03:00'}})
+        self.assertEqual(result['status'], 'invalid')
+        # Con un token viejo tampoco: un conflicto revelaría que el id existe
+        for base_token in ('999999', '0'):
+            result, = self.push({'kind': 'patient', 'op': 'update', 'id': foreign.id, 'base_token': base_token, 'data': {'dni': '3'}})
+            self.assertEqual(result['status'], 'not_found')
+
+
+@override_settings(ROOT_URLCONF='config.asgi_urls')
+class SyncEventsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='fono', password='secret')
+        self.patient = Patient.objects.create(user=self.user, first_name='Ana', last_name='Pérez', dni='1')
+        self.appointment = Appointment.objects.create(
+            user=self.user, patient=self.patient, date_time=timezone.make_aware(datetime.datetime(2026, 3, 2, 16)),
+        )
+        self.client = AsyncClient()
+        self.headers = {'Authorization': f'Token {Token.objects.create(user=self.user).key}'}
+
+    async def open_stream(self, params=None, **headers):
+        response = await self.client.get('/api/sync/events/', params or {}, headers={**self.headers, **headers})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        self.assertTrue((await anext(events)).startswith(b'retry:'))
+        return events
+
+    async def next_event(self, events):
+        lines = (await asyncio.wait_for(anext(events), timeout=2)).decode().splitlines()
+        fields = dict(line.split(': ', 1) for line in lines if line)
+        return fields['id'], json.loads(fields['data'])
+
+    async def disconnect(self, events):
+        # Como hace el servidor ASGI cuando el cliente se va: cancela la lectura en curso
+        reading = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0.05)
+        reading.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reading
+
+    async def test_replays_since_token_and_filters_kinds(self):
+        events = await self.open_stream({'since': 0, 'kinds': 'appointment'})
+        token, payload = await self.next_event(events)
+        self.assertEqual(list(payload['changes']), ['appointment'])
+        self.assertEqual(payload['changes']['appointment']['updated'][0]['id'], self.appointment.id)
+        await self.disconnect(events)
+
+        # Last-Event-ID (reconexión) manda sobre since: no hay nada nuevo que mandar
+        with self.settings(SYNC_EVENTS_POLL_SECONDS=0.1):
+            events = await self.open_stream({'since': 0}, **{'Last-Event-ID': token})
+            self.assertEqual(await anext(events), b': ping\n\n')
+            await self.disconnect(events)
+        self.assertEqual(notify._listeners, {})
+
+    async def test_pushes_changes_as_they_commit(self):
+        events = await self.open_stream()
+
+        def reschedule():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.appointment.status = 'cancelled'
+                self.appointment.save()
+                Session.objects.create(appointment=self.appointment)
+        await sync_to_async(reschedule)()
+
+        _, payload = await self.next_event(events)
+        self.assertEqual(payload['changes']['appointment']['updated'][0]['status'], 'cancelled')
+        self.assertEqual(len(payload['changes']['session']['updated']), 1)
+        self.assertNotIn('patient', payload['changes'])
+        await self.disconnect(events)
+
+    async def test_rejects_bad_requests(self):
+        self.assertEqual((await AsyncClient().get('/api/sync/events/')).status_code, 401)
+        response = await self.client.get('/api/sync/events/', {'kinds': 'appointment,nope'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,220 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from appointments.conflicts import FREE_STATUSES, describe_conflicts, find_conflicts
+from .models import Change, ClientObject
+from .registry import KINDS, MODEL_KINDS, owned, owner_id, rows
+
+OPERATIONS = ('create', 'update', 'delete')
+
+
+def parse_token(value, param):
+    try:
+        token = int(value or 0)
+        if token < 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        raise ValidationError({param: 'Token inválido.'})
+    return token
+
+
+def changes_since(request, since, limit, kinds=KINDS):
+    """
+    Página del feed de request.user después del token `since`, solo con los tipos `kinds`:
+    {"token": ..., "has_more": ..., "changes": {kind: {"updated": [...], "deleted": [...]}}}.
+    """
+    entries = list(
+        Change.objects.filter(user=request.user, id__gt=since, kind__in=list(kinds)).order_by('id')
+        .values_list('id', 'kind', 'object_id', 'deleted')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    changes = {kind: {'updated': [], 'deleted': []} for kind in kinds}
+    updated = {}
+    for _, kind, object_id, deleted in entries:
+        if deleted:
+            changes[kind]['deleted'].append(object_id)
+        else:
+            updated.setdefault(kind, []).append(object_id)
+    # Una consulta por tipo. Si algo cambió después de leer el feed llega su versión nueva:
+    # su próximo cambio tiene un token mayor y se vuelve a mandar. Los cambios de un usuario
+    # se confirman en el orden de sus tokens (ver sync/changes.py), así que ninguno queda
+    # detrás del token que se devuelve
+    context = {'request': request}
+    for kind, object_ids in updated.items():
+        changes[kind]['updated'] = KINDS[kind].serializer_class(
+            rows(kind, request.user, object_ids), many=True, context=context,
+        ).data
+
+    return {
+        'token': str(entries[-1][0] if entries else since),
+        'has_more': has_more,
+        'changes': changes,
+    }
+
+
+class SyncView(APIView):
+    """
+    Feed de cambios para los clientes offline.
+    GET /api/sync/?since=<token>&limit=500
+
+    Devuelve, por tipo, las filas creadas o modificadas (serializadas como en su endpoint)
+    y los ids borrados desde `since`, más el token a usar en la próxima llamada. Sin `since`
+    trae todo. Si `has_more` es true hay que seguir pidiendo con el token nuevo.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since = parse_token(request.query_params.get('since'), 'since')
+        try:
+            limit = min(int(request.query_params.get('limit', settings.SYNC_PAGE_SIZE)), settings.SYNC_PAGE_SIZE)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({'limit': 'Debe ser un entero positivo.'})
+        return Response(changes_since(request, since, limit))
+
+
+class SyncPushView(APIView):
+    """
+    Aplica la cola de escrituras que un cliente acumuló offline, en orden.
+    POST /api/sync/push/
+    {"changes": [
+        {"kind": "patient", "op": "create", "client_id": "tmp-1", "data": {...}},
+        {"kind": "appointment", "op": "create", "client_id": "tmp-2",
+         "data": {"patient": {"client_id": "tmp-1"}, "date_time": "...", ...}},
+        {"kind": "appointment", "op": "update", "id": 7, "base_token": "120", "data": {"notes": "..."}},
+        {"kind": "session", "op": "delete", "id": 3, "base_token": "120"}
+    ]}
+
+    - create con client_id es idempotente: reenviar la cola no duplica nada. Otros cambios
+      pueden referenciar lo creado con {"client_id": ...} en lugar del id.
+    - update/delete llevan el token del último sync en que el cliente vio el objeto: si el
+      servidor lo cambió después, el cambio no se aplica y vuelve 'conflict' con la versión
+      actual ('current', o null si se borró) para que el cliente decida.
+
+    Cada cambio se aplica por separado: un error no frena los siguientes.
+    Estados: applied, conflict, invalid, not_found.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        changes = request.data.get('changes') if isinstance(request.data, dict) else None
+        if not isinstance(changes, list) or not all(isinstance(change, dict) for change in changes):
+            raise ValidationError({'changes': 'Se espera una lista de cambios.'})
+        if len(changes) > settings.BULK_MAX_ITEMS:
+            raise ValidationError({'changes': f'Máximo {settings.BULK_MAX_ITEMS} cambios por envío.'})
+
+        # Lo que ya tocó este mismo envío no choca consigo mismo (dos ediciones offline seguidas)
+        self.touched = set()
+        results = []
+        for change in changes:
+            try:
+                with transaction.atomic():
+                    result = self.apply(change)
+            except serializers.ValidationError as e:
+                result = {'status': 'invalid', 'errors': e.detail}
+            if change.get('client_id') is not None:
+                result['client_id'] = change['client_id']
+            results.append(result)
+        return Response({'results': results})
+
+    def apply(self, change):
+        user = self.request.user
+        kind, op = change.get('kind'), change.get('op')
+        if kind not in KINDS:
+            raise ValidationError({'kind': f'Debe ser uno de: {", ".join(KINDS)}.'})
+        if op not in OPERATIONS:
+            raise ValidationError({'op': f'Debe ser uno de: {", ".join(OPERATIONS)}.'})
+        data = change.get('data') or {}
+        if not isinstance(data, dict):
+            raise ValidationError({'data': 'Se espera un objeto.'})
+        data = {field: self.resolve_reference(value) for field, value in data.items()}
+
+        if op == 'create':
+            client_id = change.get('client_id')
+            if client_id is not None:
+                client_id = str(client_id)
+                existing = ClientObject.objects.filter(user=user, client_id=client_id).first()
+                if existing:
+                    return {'status': 'applied', 'id': existing.object_id, 'replayed': True}
+            instance = self.save(kind, None, data)
+            if client_id is not None:
+                ClientObject.objects.create(user=user, client_id=client_id, kind=kind, object_id=instance.pk)
+            self.touched.add((kind, instance.pk))
+            return {'status': 'applied', 'id': instance.pk}
+
+        object_id = parse_token(self.resolve_reference(change.get('id')), 'id')
+        base_token = parse_token(change.get('base_token'), 'base_token')
+        # El feed es por usuario: un id ajeno no devuelve nada que revele que existe
+        last_change = Change.objects.filter(
+            user=user, kind=kind, object_id=object_id,
+        ).values_list('id', 'deleted').first()
+        instance = owned(kind, user).filter(pk=object_id).first()
+        if instance is None:
+            # Borrado por el servidor después de que el cliente lo vio: el cliente decide
+            if (kind, object_id) not in self.touched and last_change and last_change[1] and last_change[0] > base_token:
+                return {'status': 'conflict', 'id': object_id, 'current': None}
+            return {'status': 'not_found', 'id': object_id}
+        if (kind, object_id) not in self.touched and last_change is not None and last_change[0] > base_token:
+            current = KINDS[kind].serializer_class(
+                rows(kind, user, [object_id]).get(), context={'request': self.request},
+            ).data
+            return {'status': 'conflict', 'id': object_id, 'current': current}
+        if op == 'delete':
+            instance.delete()
+        else:
+            self.save(kind, instance, data)
+        self.touched.add((kind, object_id))
+        return {'status': 'applied', 'id': object_id}
+
+    def resolve_reference(self, value):
+        """{"client_id": "tmp-1"} → id real del objeto creado offline con ese id temporal."""
+        if isinstance(value, dict) and set(value) == {'client_id'}:
+            object_id = ClientObject.objects.filter(
+                user=self.request.user, client_id=str(value['client_id']),
+            ).values_list('object_id', flat=True).first()
+            if object_id is None:
+                raise ValidationError({'data': f'No se conoce el client_id {value["client_id"]}.'})
+            return object_id
+        return value
+
+    def save(self, kind, instance, data):
+        user = self.request.user
+        serializer = KINDS[kind].serializer_class(
+            instance, data=data, partial=instance is not None, context={'request': self.request},
+        )
+        serializer.is_valid(raise_exception=True)
+        # Los serializers aceptan cualquier id: acá se exige que lo referenciado sea del usuario
+        for field, value in serializer.validated_data.items():
+            if type(value) in MODEL_KINDS and owner_id(value) != user.id:
+                raise ValidationError({field: 'No encontrado.'})
+        if kind == 'appointment':
+            self.check_overlap(instance, serializer.validated_data)
+        if 'user' in serializer.fields:
+            return serializer.save(user=user)
+        return serializer.save()
+
+    def check_overlap(self, instance, values):
+        """Mismo control que AppointmentViewSet: un turno offline no pisa la agenda."""
+        def current(field, default=None):
+            return values.get(field, getattr(instance, field, default))
+
+        if current('status', 'scheduled') in FREE_STATUSES:
+            return
+        start = current('date_time')
+        slots = [(start, start + datetime.timedelta(minutes=current('duration_minutes', 60)))]
+        conflicts = find_conflicts(self.request.user, slots, exclude_ids=[instance.id] if instance else ())
+        if conflicts:
+            raise ValidationError({
+                'message': 'El horario se superpone con otro turno.',
+                'conflicts': describe_conflicts(slots, conflicts),
+            })
@@ -44,6 +44,13 @@ function App() {
   }
 
   const handleLogout = () => {
+    // Revoca el token en el servidor (y en su caché de autenticación); si falla igual salimos
+    if (token) {
+      fetch(`${API_BASE_URL}/api/auth/logout/`, {
+        method: 'POST',
+        headers: { 'Authorization': `Token ${token}` }
+      }).catch(() => {})
+    }
     localStorage.removeItem('token')
     setToken(null)
   }
@@ -16,4 +16,88 @@ if (API_BASE_URL.endsWith('/api')) {
 // This allows the app to work on any device in the LAN.
 // const API_BASE_URL = `http://${window.location.hostname}:8000`;
 
+// Los listados de la API vienen paginados por cursor ({ next, previous, results }).
+// Esta función recorre las páginas siguiendo `next` y devuelve todas las filas.
+// Acepta también respuestas sin paginar (arrays), como la ventana del calendario.
+export async function fetchAllPages<T = any>(url: string, headers: HeadersInit): Promise<T[]> {
+    const rows: T[] = [];
+    let nextUrl: string | null = url;
+    while (nextUrl) {
+        const response = await fetch(nextUrl, { headers });
+        if (!response.ok) throw new Error(`Error ${response.status} al cargar ${nextUrl}`);
+        const data = await response.json();
+        if (Array.isArray(data)) return data;
+        rows.push(...data.results);
+        nextUrl = data.next;
+    }
+    return rows;
+}
+
 export default API_BASE_URL;
+
+// Cambios en vivo (Server-Sent Events de /api/sync/events/, solo con el backend en modo ASGI).
+// Se lee con fetch y no con EventSource porque EventSource no permite mandar el header
+// Authorization. Cada evento trae { token, has_more, changes: { kind: { updated, deleted } } }.
+// Si la conexión se corta reconecta desde el último token; si el servidor no tiene el canal
+// (404) no insiste. Devuelve la función para cortar la suscripción.
+export interface ChangeSet<T = any> {
+    updated: T[];
+    deleted: number[];
+}
+
+export function subscribeToChanges(
+    token: string,
+    kinds: string[],
+    onChanges: (changes: Record<string, ChangeSet>) => void,
+    onLive?: (live: boolean) => void,
+): () => void {
+    const controller = new AbortController();
+    let lastToken: string | null = null;
+    let retryMs = 3000;
+
+    const connect = async () => {
+        while (!controller.signal.aborted) {
+            try {
+                const params = new URLSearchParams({ kinds: kinds.join(',') });
+                if (lastToken) params.set('since', lastToken);
+                const response = await fetch(`${API_BASE_URL}/api/sync/events/?${params}`, {
+                    headers: { 'Authorization': `Token ${token}`, 'Accept': 'text/event-stream' },
+                    signal: controller.signal,
+                });
+                if (response.status === 404 || response.status === 401) return;
+                if (!response.ok || !response.body) throw new Error(`Error ${response.status}`);
+                onLive?.(true);
+
+                const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                let buffer = '';
+                for (;;) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += value;
+                    let end;
+                    while ((end = buffer.indexOf('\n\n')) >= 0) {
+                        const block = buffer.slice(0, end);
+                        buffer = buffer.slice(end + 2);
+                        const fields: Record<string, string> = {};
+                        for (const line of block.split('\n')) {
+                            const colon = line.indexOf(': ');
+                            if (colon > 0) fields[line.slice(0, colon)] = line.slice(colon + 2);
+                        }
+                        if (fields.retry) retryMs = Number(fields.retry);
+                        if (fields.id) lastToken = fields.id;
+                        if (fields.event === 'changes') {
+                            onChanges(JSON.parse(fields.data).changes);
+                        }
+                    }
+                }
+            } catch (err) {
+                if (controller.signal.aborted) return;
+                console.error('Se cortó el canal de cambios en vivo', err);
+            }
+            onLive?.(false);
+            await new Promise(resolve => setTimeout(resolve, retryMs));
+        }
+    };
+    connect();
+    return () => controller.abort();
+}
@@ -1,10 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import FullCalendar from '@fullcalendar/react';
 import dayGridPlugin from '@fullcalendar/daygrid';
 import timeGridPlugin from '@fullcalendar/timegrid';
 import interactionPlugin from '@fullcalendar/interaction';
 import esLocale from '@fullcalendar/core/locales/es';
-import API_BASE_URL from '../apiConfig';
+import API_BASE_URL, { fetchAllPages, subscribeToChanges } from '../apiConfig';
 import SessionDashboard from './SessionDashboard';
 import './CalendarView.css';
 
@@ -15,6 +15,27 @@ interface Patient {
     dni: string;
 }
 
+// Map appointments to FullCalendar expected format
+const toCalendarEvent = (app: any) => {
+    // FullCalendar needs end time calculated if not provided
+    const startObj = new Date(app.date_time);
+    const endObj = new Date(startObj.getTime() + app.duration_minutes * 60000);
+
+    let color = '#3b82f6'; // Programado -> Azul
+    if (app.status === 'completed') color = '#10b981'; // Completado -> Verde
+    if (app.status === 'cancelled') color = '#ef4444'; // Cancelado -> Rojo
+
+    return {
+        id: app.id,
+        title: `${app.patient_name}`,
+        start: startObj.toISOString(),
+        end: endObj.toISOString(),
+        backgroundColor: color,
+        borderColor: color,
+        extendedProps: { ...app }
+    };
+};
+
 interface CalendarViewProps {
     token: string;
     onClose?: () => void;
@@ -39,42 +60,33 @@ const CalendarView: React.FC<CalendarViewProps> = ({ token, onClose }) => {
         days_of_week: [] as string[]
     });
 
-    const fetchData = async () => {
+    // Rango visible del calendario (semana / mes); solo pedimos esos turnos
+    const [visibleRange, setVisibleRange] = useState<{ start: string, end: string } | null>(null);
+    const visibleRangeRef = useRef(visibleRange);
+    visibleRangeRef.current = visibleRange;
+
+    // Con el canal en vivo los cambios de otros dispositivos (y los propios) llegan solos
+    const [live, setLive] = useState(false);
+
+    const fetchPatients = async () => {
         try {
-            const headers = { 'Authorization': `Token ${token}` };
+            const pts = await fetchAllPages<Patient>(`${API_BASE_URL}/api/patients/`, { 'Authorization': `Token ${token}` });
+            setPatients(pts);
+        } catch (err) {
+            console.error('Error fetching patients', err);
+        }
+    };
 
-            const [apptsRes, ptsRes] = await Promise.all([
-                fetch(`${API_BASE_URL}/api/appointments/`, { headers }),
-                fetch(`${API_BASE_URL}/api/patients/`, { headers })
-            ]);
+    const fetchData = async (range = visibleRange) => {
+        if (!range) return;
+        try {
+            const headers = { 'Authorization': `Token ${token}` };
+            const params = new URLSearchParams({ start: range.start, end: range.end, view: 'calendar' });
+            const apptsRes = await fetch(`${API_BASE_URL}/api/appointments/?${params}`, { headers });
 
-            if (apptsRes.ok && ptsRes.ok) {
+            if (apptsRes.ok) {
                 const appts = await apptsRes.json();
-                const pts = await ptsRes.json();
-
-                setPatients(pts);
-
-                // Map appointments to FullCalendar expected format
-                const calendarEvents = appts.map((app: any) => {
-                    // FullCalendar needs end time calculated if not provided
-                    const startObj = new Date(app.date_time);
-                    const endObj = new Date(startObj.getTime() + app.duration_minutes * 60000);
-
-                    let color = '#3b82f6'; // Programado -> Azul
-                    if (app.status === 'completed') color = '#10b981'; // Completado -> Verde
-                    if (app.status === 'cancelled') color = '#ef4444'; // Cancelado -> Rojo
-
-                    return {
-                        id: app.id,
-                        title: `${app.patient_name}`,
-                        start: startObj.toISOString(),
-                        end: endObj.toISOString(),
-                        backgroundColor: color,
-                        borderColor: color,
-                        extendedProps: { ...app }
-                    };
-                });
-                setEvents(calendarEvents);
+                setEvents(appts.map(toCalendarEvent));
             }
         } catch (err) {
             console.error('Error fetching calendar data', err);
@@ -84,9 +96,35 @@ const CalendarView: React.FC<CalendarViewProps> = ({ token, onClose }) => {
     };
 
     useEffect(() => {
-        fetchData();
+        fetchPatients();
     }, [token]);
 
+    useEffect(() => {
+        fetchData();
+    }, [token, visibleRange]);
+
+    useEffect(() => subscribeToChanges(token, ['appointment'], (changes) => {
+        const { updated, deleted } = changes.appointment;
+        const range = visibleRangeRef.current;
+        if (!range || (!updated.length && !deleted.length)) return;
+        // Mismo criterio que la ventana del servidor: empieza en [start, end)
+        const start = new Date(range.start).getTime();
+        const end = new Date(range.end).getTime();
+        const gone = new Set<number>([...deleted, ...updated.map((app: any) => app.id)]);
+        const visible = updated.filter((app: any) => {
+            const time = new Date(app.date_time).getTime();
+            return time >= start && time < end;
+        });
+        setEvents(prev => [...prev.filter(event => !gone.has(event.id)), ...visible.map(toCalendarEvent)]);
+    }, setLive), [token]);
+
+    const handleDatesSet = (dateInfo: any) => {
+        const range = { start: dateInfo.start.toISOString(), end: dateInfo.end.toISOString() };
+        if (!visibleRange || visibleRange.start !== range.start || visibleRange.end !== range.end) {
+            setVisibleRange(range);
+        }
+    };
+
     const handleEventClick = (clickInfo: any) => {
         const app = clickInfo.event.extendedProps;
         setSelectedAppointment({ id: app.id, patientName: clickInfo.event.title });
@@ -123,19 +161,23 @@ const CalendarView: React.FC<CalendarViewProps> = ({ token, onClose }) => {
                 body: JSON.stringify(formData)
             });
 
+            if (response.status === 409) {
+                // Algún turno choca con otro ya agendado: el servidor no guardó nada
+                const conflict = await response.json();
+                alert(conflict.message);
+                return;
+            }
             if (!response.ok) throw new Error('Error al generar los turnos');
             const data = await response.json();
             alert(data.message);
             setIsModalOpen(false);
-            fetchData(); // Refresh calendar view
+            if (!live) fetchData(); // Refresh calendar view (en vivo los turnos nuevos llegan por el canal)
 
         } catch (err) {
             alert('Error generando los turnos. Revisá los datos.');
         }
     };
 
-    if (loading) return <div style={{ color: 'white', padding: '20px' }}>Cargando agenda...</div>;
-
     return (
         <div className="calendar-container">
             <div className="calendar-header">
@@ -153,6 +195,7 @@ const CalendarView: React.FC<CalendarViewProps> = ({ token, onClose }) => {
             </div>
 
             <div className="calendar-wrapper">
+                {loading && <div style={{ color: 'white', padding: '20px' }}>Cargando agenda...</div>}
                 <FullCalendar
                     plugins={[dayGridPlugin, timeGridPlugin, interactionPlugin]}
                     initialView="timeGridWeek"
@@ -162,6 +205,7 @@ const CalendarView: React.FC<CalendarViewProps> = ({ token, onClose }) => {
                         right: 'dayGridMonth,timeGridWeek,timeGridDay'
                     }}
                     events={events}
+                    datesSet={handleDatesSet}
                     eventClick={handleEventClick}
                     locale={esLocale}
                     firstDay={1} // Arranca el Lunes
@@ -277,7 +321,8 @@ const CalendarView: React.FC<CalendarViewProps> = ({ token, onClose }) => {
                     patientName={selectedAppointment.patientName}
                     onClose={() => {
                         setSelectedAppointment(null);
-                        fetchData(); // Refrescar los estados "completada / ausente" de los calendarios al cerrar
+                        // Refrescar los estados "completada / ausente" de los calendarios al cerrar (en vivo ya llegaron)
+                        if (!live) fetchData();
                     }}
                 />
             )}
@@ -3,7 +3,7 @@ import Form from '@rjsf/mui';
 import { ThemeProvider, createTheme } from '@mui/material/styles';
 import CssBaseline from '@mui/material/CssBaseline';
 import validator from '@rjsf/validator-ajv8';
-import API_BASE_URL from '../apiConfig';
+import API_BASE_URL, { fetchAllPages } from '../apiConfig';
 import './Evaluations.css';
 
 interface Patient {
@@ -13,10 +13,16 @@ interface Patient {
     dni: string;
 }
 
+// Listados en modo resumen: los schemas se piden por versión y los resultados en el detalle
 interface TestTemplate {
     id: number;
     name: string;
     description: string;
+    current_version: number | null;
+}
+
+interface TemplateVersion {
+    id: number;
     schema: any;
     ui_schema: any;
 }
@@ -25,8 +31,9 @@ interface Evaluation {
     id: number;
     patient: number;
     test_template: number;
+    template_version: number | null;
     date: string;
-    results: any;
+    results?: any;
 }
 
 interface EvaluationsProps {
@@ -55,6 +62,9 @@ const Evaluations: React.FC<EvaluationsProps> = ({ token, defaultPatientId }) =>
     const [selectedPatient, setSelectedPatient] = useState<number | ''>(defaultPatientId || '');
     const [selectedTemplate, setSelectedTemplate] = useState<number | ''>('');
     const [selectedEvaluation, setSelectedEvaluation] = useState<Evaluation | null>(null);
+    // Versión de la plantilla que se muestra: la vigente para un test nuevo,
+    // la que se usó al cargarla para una evaluación existente
+    const [activeVersion, setActiveVersion] = useState<TemplateVersion | null>(null);
     const [viewMode, setViewMode] = useState<'history' | 'new_test' | 'view_test'>('history');
 
     const [loading, setLoading] = useState(true);
@@ -66,17 +76,15 @@ const Evaluations: React.FC<EvaluationsProps> = ({ token, defaultPatientId }) =>
         try {
             const headers = { 'Authorization': `Token ${token}` };
 
-            const [ptsRes, tplRes, evalsRes] = await Promise.all([
-                fetch(`${API_BASE_URL}/api/patients/`, { headers }),
-                fetch(`${API_BASE_URL}/api/test-templates/`, { headers }),
-                fetch(`${API_BASE_URL}/api/evaluations/`, { headers })
+            const [pts, tpls, evals] = await Promise.all([
+                fetchAllPages(`${API_BASE_URL}/api/patients/`, headers),
+                fetchAllPages(`${API_BASE_URL}/api/test-templates/?view=summary`, headers),
+                fetchAllPages(`${API_BASE_URL}/api/evaluations/?view=summary`, headers)
             ]);
 
-            if (!ptsRes.ok || !tplRes.ok || !evalsRes.ok) throw new Error('Error al cargar datos');
-
-            setPatients(await ptsRes.json());
-            setTemplates(await tplRes.json());
-            setEvaluations(await evalsRes.json());
+            setPatients(pts);
+            setTemplates(tpls);
+            setEvaluations(evals);
         } catch (err) {
             setError('No se pudieron cargar los datos de evaluaciones.');
         } finally {
@@ -123,6 +131,37 @@ const Evaluations: React.FC<EvaluationsProps> = ({ token, defaultPatientId }) =>
         }
     };
 
+    const activeVersionId = viewMode === 'view_test'
+        ? (selectedEvaluation?.template_version ?? activeTemplate?.current_version)
+        : activeTemplate?.current_version;
+
+    // Las versiones son inmutables: el navegador las guarda y no las vuelve a pedir
+    useEffect(() => {
+        setActiveVersion(null);
+        if (!activeVersionId) return;
+        fetch(`${API_BASE_URL}/api/test-template-versions/${activeVersionId}/`, {
+            headers: { 'Authorization': `Token ${token}` }
+        })
+            .then(response => response.ok ? response.json() : null)
+            .then(setActiveVersion)
+            .catch(() => setError('No se pudo cargar el formulario del test.'));
+    }, [activeVersionId, token]);
+
+    const openEvaluation = async (ev: Evaluation) => {
+        setSelectedTemplate(ev.test_template);
+        setSelectedEvaluation(null);
+        setViewMode('view_test');
+        try {
+            const response = await fetch(`${API_BASE_URL}/api/evaluations/${ev.id}/`, {
+                headers: { 'Authorization': `Token ${token}` }
+            });
+            if (!response.ok) throw new Error();
+            setSelectedEvaluation(await response.json());
+        } catch (err) {
+            setError('No se pudieron cargar los resultados de la evaluación.');
+        }
+    };
+
     const patientEvaluations = evaluations.filter(ev => ev.patient === selectedPatient);
     const selectedPatientData = patients.find(p => p.id === selectedPatient);
 
@@ -177,11 +216,7 @@ const Evaluations: React.FC<EvaluationsProps> = ({ token, defaultPatientId }) =>
                                         key={ev.id}
                                         className="history-card glass-panel"
                                         style={{ cursor: 'pointer' }}
-                                        onClick={() => {
-                                            setSelectedTemplate(ev.test_template);
-                                            setSelectedEvaluation(ev);
-                                            setViewMode('view_test');
-                                        }}
+                                        onClick={() => openEvaluation(ev)}
                                     >
                                         <h4>{template?.name || 'Test Desconocido'}</h4>
                                         <p><strong>Fecha:</strong> {new Date(ev.date).toLocaleDateString()}</p>
@@ -219,7 +254,7 @@ const Evaluations: React.FC<EvaluationsProps> = ({ token, defaultPatientId }) =>
                         </div>
                     </div>
 
-                    {activeTemplate && (
+                    {activeTemplate && activeVersion && (
                         <div className="eval-form-container card glass-panel">
                             <h3>Test Activo: {activeTemplate.name}</h3>
                             <p className="template-desc">{activeTemplate.description}</p>
@@ -227,8 +262,8 @@ const Evaluations: React.FC<EvaluationsProps> = ({ token, defaultPatientId }) =>
                                 <ThemeProvider theme={darkTheme}>
                                     <CssBaseline />
                                     <Form
-                                        schema={activeTemplate.schema}
-                                        uiSchema={activeTemplate.ui_schema || {}}
+                                        schema={activeVersion.schema}
+                                        uiSchema={activeVersion.ui_schema || {}}
                                         validator={validator}
                                         onSubmit={handleSubmit}
                                         showErrorList={false}
@@ -240,7 +275,7 @@ const Evaluations: React.FC<EvaluationsProps> = ({ token, defaultPatientId }) =>
                 </div>
             )}
 
-            {selectedPatient && viewMode === 'view_test' && selectedEvaluation && activeTemplate && (
+            {selectedPatient && viewMode === 'view_test' && selectedEvaluation && activeTemplate && activeVersion && (
                 <div className="view-test-container">
                     <div style={{ marginBottom: '20px' }}>
                         <button className="btn-secondary" onClick={() => setViewMode('history')}>
@@ -255,8 +290,8 @@ const Evaluations: React.FC<EvaluationsProps> = ({ token, defaultPatientId }) =>
                             <ThemeProvider theme={darkTheme}>
                                 <CssBaseline />
                                 <Form
-                                    schema={activeTemplate.schema}
-                                    uiSchema={{ ...activeTemplate.ui_schema, "ui:readonly": true }}
+                                    schema={activeVersion.schema}
+                                    uiSchema={{ ...activeVersion.ui_schema, "ui:readonly": true }}
                                     formData={selectedEvaluation.results}
                                     validator={validator}
                                     readonly={true}
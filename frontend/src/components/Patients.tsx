@@ -10,8 +10,17 @@ interface Patient {
     email: string;
     phone: string;
     birth_date: string;
+    last_visit: string | null;
+    next_appointment: string | null;
+    sessions_completed: number | null;
+    sessions_missed: number | null;
+    evaluations_count: number | null;
+    has_active_plan: boolean;
 }
 
+// Tope de filas por búsqueda: el directorio no se descarga entero, se busca
+const DIRECTORY_LIMIT = 50;
+
 interface PatientsProps {
     token: string;
     onSelectForEval?: (id: number) => void;
@@ -24,6 +33,12 @@ const Patients: React.FC<PatientsProps> = ({ token, onSelectForEval }) => {
     const [isModalOpen, setIsModalOpen] = useState(false);
     const [editingPatient, setEditingPatient] = useState<Patient | null>(null);
 
+    // Búsqueda, orden y filtros del directorio (los resuelve el servidor con ?view=directory)
+    const [query, setQuery] = useState('');
+    const [sort, setSort] = useState('name');
+    const [activePlan, setActivePlan] = useState('');
+    const [hasMore, setHasMore] = useState(false);
+
     const [formData, setFormData] = useState({
         first_name: '',
         last_name: '',
@@ -33,17 +48,21 @@ const Patients: React.FC<PatientsProps> = ({ token, onSelectForEval }) => {
         birth_date: ''
     });
 
-    const fetchPatients = async () => {
+    const fetchPatients = async (signal?: AbortSignal) => {
         try {
-            const response = await fetch(`${API_BASE_URL}/api/patients/`, {
-                headers: {
-                    'Authorization': `Token ${token}`
-                }
+            const params = new URLSearchParams({ view: 'directory', sort, limit: String(DIRECTORY_LIMIT) });
+            if (query.trim()) params.set('q', query.trim());
+            if (activePlan) params.set('active_plan', activePlan);
+            const response = await fetch(`${API_BASE_URL}/api/patients/?${params}`, {
+                headers: { 'Authorization': `Token ${token}` },
+                signal
             });
-            if (!response.ok) throw new Error('Error al cargar pacientes');
+            if (!response.ok) throw new Error(`Error ${response.status}`);
             const data = await response.json();
-            setPatients(data);
+            setPatients(data.results);
+            setHasMore(data.has_more);
         } catch (err) {
+            if (signal?.aborted) return; // Llegó otra tecla: esta búsqueda ya no importa
             setError('No se pudieron cargar los datos de los pacientes.');
         } finally {
             setLoading(false);
@@ -51,8 +70,14 @@ const Patients: React.FC<PatientsProps> = ({ token, onSelectForEval }) => {
     };
 
     useEffect(() => {
-        fetchPatients();
-    }, [token]);
+        // Espera a que se deje de tipear un momento y cancela la búsqueda anterior
+        const controller = new AbortController();
+        const timer = setTimeout(() => fetchPatients(controller.signal), query ? 200 : 0);
+        return () => {
+            clearTimeout(timer);
+            controller.abort();
+        };
+    }, [token, query, sort, activePlan]);
 
     const handleInputChange = (e: React.ChangeEvent<HTMLInputElement>) => {
         setFormData({ ...formData, [e.target.name]: e.target.value });
@@ -136,9 +161,33 @@ const Patients: React.FC<PatientsProps> = ({ token, onSelectForEval }) => {
                 </button>
             </div>
 
+            <div className="patients-toolbar">
+                <input
+                    type="search"
+                    placeholder="Buscar por apellido, nombre o DNI"
+                    value={query}
+                    onChange={(e) => setQuery(e.target.value)}
+                    autoFocus
+                />
+                <select value={sort} onChange={(e) => setSort(e.target.value)}>
+                    <option value="name">Apellido (A-Z)</option>
+                    <option value="-name">Apellido (Z-A)</option>
+                    <option value="-last_visit">Última visita (reciente)</option>
+                    <option value="last_visit">Última visita (más antigua)</option>
+                    <option value="-created">Alta (reciente)</option>
+                </select>
+                <select value={activePlan} onChange={(e) => setActivePlan(e.target.value)}>
+                    <option value="">Todos</option>
+                    <option value="1">Con tratamiento activo</option>
+                    <option value="0">Sin tratamiento activo</option>
+                </select>
+            </div>
+
             <div className="patients-grid">
                 {patients.length === 0 ? (
-                    <div className="no-patients">No hay pacientes todavía. Agregá uno para empezar.</div>
+                    <div className="no-patients">
+                        {query || activePlan ? 'No hay pacientes que coincidan.' : 'No hay pacientes todavía. Agregá uno para empezar.'}
+                    </div>
                 ) : (
                     patients.map(patient => (
                         <div key={patient.id} className="patient-card">
@@ -151,6 +200,11 @@ const Patients: React.FC<PatientsProps> = ({ token, onSelectForEval }) => {
                                 {patient.email && <p><strong>Email:</strong> {patient.email}</p>}
                                 {patient.phone && <p><strong>Teléfono:</strong> {patient.phone}</p>}
                                 {patient.birth_date && <p><strong>Fecha Nacimiento:</strong> {patient.birth_date}</p>}
+                                {patient.last_visit && <p><strong>Última visita:</strong> {new Date(patient.last_visit).toLocaleDateString()}</p>}
+                                {patient.next_appointment && <p><strong>Próximo turno:</strong> {new Date(patient.next_appointment).toLocaleString([], { dateStyle: 'short', timeStyle: 'short' })}</p>}
+                                {!!(patient.sessions_completed || patient.sessions_missed || patient.evaluations_count) && (
+                                    <p><strong>Sesiones:</strong> {patient.sessions_completed} realizadas, {patient.sessions_missed} ausentes · <strong>Evaluaciones:</strong> {patient.evaluations_count}</p>
+                                )}
                             </div>
                             <div className="patient-actions">
                                 <button className="btn-secondary" onClick={() => openModal(patient)}>Editar</button>
@@ -160,6 +214,7 @@ const Patients: React.FC<PatientsProps> = ({ token, onSelectForEval }) => {
                     ))
                 )}
             </div>
+            {hasMore && <p className="patients-more">Hay más resultados: refiná la búsqueda.</p>}
 
             {isModalOpen && (
                 <div className="modal-overlay">
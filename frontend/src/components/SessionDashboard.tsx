@@ -3,6 +3,9 @@ import API_BASE_URL from '../apiConfig';
 import Evaluations from './Evaluations';
 import './SessionDashboard.css';
 
+// Tamaño de cada tramo de la subida por partes de la nota de voz
+const UPLOAD_CHUNK_SIZE = 1024 * 1024;
+
 interface SessionDashboardProps {
     token: string;
     appointmentId: number;
@@ -32,9 +35,9 @@ const SessionDashboard: React.FC<SessionDashboardProps> = ({ token, appointmentI
             .then(res => res.json())
             .then(data => {
                 setSessionData(data);
-                if (data.voice_note) {
-                    // Adjust url if needed, assuming Django returns absolute or relative path
-                    setAudioUrl(data.voice_note.startsWith('http') ? data.voice_note : `${API_BASE_URL}${data.voice_note}`);
+                if (data.voice_note_url) {
+                    // URL firmada del endpoint de reproducción (soporta Range para adelantar/retroceder)
+                    setAudioUrl(`${API_BASE_URL}${data.voice_note_url}`);
                 }
                 setLoading(false);
             })
@@ -44,6 +47,38 @@ const SessionDashboard: React.FC<SessionDashboardProps> = ({ token, appointmentI
             });
     }, [appointmentId, token]);
 
+    // Sube la grabación en tramos; si se corta la conexión, retoma desde el offset que informa el servidor
+    const uploadVoiceNote = async (blob: Blob) => {
+        const headers = { 'Authorization': `Token ${token}` };
+        const startRes = await fetch(`${API_BASE_URL}/api/sessions/${sessionData.id}/voice-note/uploads/`, {
+            method: 'POST',
+            headers: { ...headers, 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: `session_${sessionData.id}_audio.webm`, size: blob.size })
+        });
+        if (!startRes.ok) throw new Error('No se pudo iniciar la subida del audio');
+        const { upload_id } = await startRes.json();
+        const uploadUrl = `${API_BASE_URL}/api/voice-note-uploads/${upload_id}/`;
+
+        let offset = 0;
+        let retries = 0;
+        while (offset < blob.size) {
+            try {
+                const res = await fetch(uploadUrl, {
+                    method: 'PATCH',
+                    headers: { ...headers, 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': String(offset) },
+                    body: blob.slice(offset, offset + UPLOAD_CHUNK_SIZE)
+                });
+                if (!res.ok && res.status !== 409) throw new Error(`Error ${res.status} subiendo audio`);
+                offset = (await res.json()).offset;
+                retries = 0;
+            } catch (err) {
+                if (++retries > 5) throw err;
+                const status = await fetch(uploadUrl, { headers });
+                if (status.ok) offset = (await status.json()).offset;
+            }
+        }
+    };
+
     const handleSaveSession = async () => {
         if (!sessionData) return;
 
@@ -51,11 +86,11 @@ const SessionDashboard: React.FC<SessionDashboardProps> = ({ token, appointmentI
         formData.append('status', sessionData.status);
         formData.append('written_notes', sessionData.written_notes || '');
 
-        if (audioBlob) {
-            formData.append('voice_note', audioBlob, `session_${sessionData.id}_audio.webm`);
-        }
-
         try {
+            if (audioBlob) {
+                await uploadVoiceNote(audioBlob);
+            }
+
             const res = await fetch(`${API_BASE_URL}/api/sessions/${sessionData.id}/`, {
                 method: 'PATCH',
                 headers: {
@@ -70,6 +105,9 @@ const SessionDashboard: React.FC<SessionDashboardProps> = ({ token, appointmentI
                 const updatedData = await res.json();
                 setSessionData(updatedData);
                 setAudioBlob(null); // Already saved
+                if (updatedData.voice_note_url) {
+                    setAudioUrl(`${API_BASE_URL}${updatedData.voice_note_url}`);
+                }
             } else {
                 alert("Hubo un error al guardar la sesión.");
             }
@@ -170,6 +208,12 @@ const SessionDashboard: React.FC<SessionDashboardProps> = ({ token, appointmentI
                                     {audioBlob && <span className="unsaved-badge">Sin guardar</span>}
                                 </div>
                             )}
+                            {sessionData.transcript_progress != null && sessionData.transcript_progress < 1 && (
+                                <p>Transcribiendo... {Math.round(sessionData.transcript_progress * 100)}%</p>
+                            )}
+                            {sessionData.transcript && (
+                                <p className="transcript">{sessionData.transcript}</p>
+                            )}
                         </div>
 
                         <div className="evaluations-card">
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import API_BASE_URL from '../apiConfig';
+import API_BASE_URL, { fetchAllPages } from '../apiConfig';
 import './TestTemplates.css';
 
 interface TestTemplate {
@@ -44,11 +44,10 @@ const TestTemplates: React.FC<TestTemplatesProps> = ({ token }) => {
 
     const fetchTemplates = async () => {
         try {
-            const response = await fetch(`${API_BASE_URL}/api/test-templates/`, {
-                headers: { 'Authorization': `Token ${token}` }
+            // Resumen: el listado no necesita los schemas; el editor pide el detalle
+            const data = await fetchAllPages(`${API_BASE_URL}/api/test-templates/?view=summary`, {
+                'Authorization': `Token ${token}`
             });
-            if (!response.ok) throw new Error('Error al cargar plantillas');
-            const data = await response.json();
             setTemplates(data);
         } catch (err) {
             setError('No se pudieron cargar las plantillas de evaluación.');
@@ -61,7 +60,18 @@ const TestTemplates: React.FC<TestTemplatesProps> = ({ token }) => {
         fetchTemplates();
     }, [token]);
 
-    const openEditor = (template: TestTemplate | null = null) => {
+    const openEditor = async (summary: TestTemplate | null = null) => {
+        let template = summary;
+        if (summary) {
+            const response = await fetch(`${API_BASE_URL}/api/test-templates/${summary.id}/`, {
+                headers: { 'Authorization': `Token ${token}` }
+            });
+            if (!response.ok) {
+                alert('No se pudo cargar la plantilla.');
+                return;
+            }
+            template = await response.json();
+        }
         if (template) {
             setEditingId(template.id);
             setTemplateName(template.name);
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 
@@ -9,7 +9,27 @@ DB_PATH = os.path.join(BASE_DIR, '..', 'backend', 'db.sqlite3')
 
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Mismo afinado que el backend Django (backend/config/database.py): los dos escriben en el
+# mismo archivo, y con WAL + busy timeout no se bloquean mutuamente
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 20000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -32000,
+    "temp_store": "MEMORY",
+}
+
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False, "timeout": 20})
+
+
+@event.listens_for(engine, "connect")
+def _tune_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -1,19 +1,55 @@
 import sounddevice as sd
 import soundfile as sf
 import threading
+import queue
 import os
 import datetime
+import json
+import math
 import numpy as np
+from integrations.voice_activity import VoiceActivityDetector, to_dbfs
 
 class AudioRecorder:
+    """
+    Graba del micrófono directo a disco.
+
+    El callback de PortAudio copia cada bloque a un buffer circular preasignado y avisa
+    por una cola acotada; un hilo escritor toma los bloques y los agrega al WAV abierto.
+    Así la memoria no crece con la duración, detener es inmediato y ante un corte se
+    pierden a lo sumo unos segundos (el encabezado se actualiza en cada flush).
+
+    Durante la grabación el callback mide RMS y pico de cada bloque (para el vúmetro, ver
+    get_levels()) sin crear arrays nuevos, y el hilo escritor pasa esos niveles por un
+    detector de voz. Al detener, los tramos con voz quedan en `segments` y en un JSON
+    al lado del WAV (`<archivo>.segments.json`).
+    """
+
+    BLOCK_SIZE = 1024          # frames por bloque (~23 ms a 44.1 kHz)
+    RING_BLOCKS = 256          # ~6 s de audio de margen si el disco se demora
+    FLUSH_INTERVAL = 2.0       # segundos entre flush del archivo
+    PEAK_DECAY = 0.9           # caída del pico retenido del vúmetro por bloque
+
     def __init__(self, output_dir):
         self.output_dir = output_dir
         self.recording = False
-        self.audio_data = []
         self.samplerate = 44100
         self.channels = 1
         self.stream = None
         self.filename = None
+        self.frames_written = 0
+        self.dropped_blocks = 0
+        self.level_rms = 0.0
+        self.level_peak = 0.0
+        self.segments = []
+        self.vad = VoiceActivityDetector()
+
+        self._ring = None
+        self._scratch = None
+        self._block_rms = None
+        self._pending = None
+        self._head = 0
+        self._writer = None
+        self._writer_error = None
 
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
@@ -22,24 +58,90 @@ class AudioRecorder:
         """This is called (from a separate thread) for each audio block."""
         if status:
             print(status, flush=True)
-        if self.recording:
-            self.audio_data.append(indata.copy())
+        if not self.recording:
+            return
+        slot = self._head
+        # Hay RING_BLOCKS - 2 lugares en la cola: el slot que está escribiendo el hilo
+        # escritor nunca se pisa aunque la cola esté llena
+        if self._pending.full():
+            self.dropped_blocks += 1
+            return
+        block = self._ring[slot, :frames]
+        block[:] = indata
+
+        # Niveles con operaciones in-place sobre un buffer preasignado: sin arrays nuevos
+        scratch = self._scratch[:frames]
+        np.multiply(block, block, out=scratch)
+        rms = math.sqrt(scratch.sum() / scratch.size)
+        np.abs(block, out=scratch)
+        peak = float(scratch.max())
+        self._block_rms[slot] = rms
+        self.level_rms = rms
+        self.level_peak = max(peak, self.level_peak * self.PEAK_DECAY)
+
+        self._pending.put_nowait((slot, frames))
+        self._head = (slot + 1) % self.RING_BLOCKS
+
+    def _write_loop(self, soundfile):
+        last_flush = datetime.datetime.now()
+        try:
+            while True:
+                item = self._pending.get()
+                if item is None:
+                    break
+                slot, frames = item
+                soundfile.write(self._ring[slot, :frames])
+                self.frames_written += frames
+                self.vad.process(self._block_rms[slot], frames / self.samplerate)
+                now = datetime.datetime.now()
+                if (now - last_flush).total_seconds() >= self.FLUSH_INTERVAL:
+                    soundfile.flush()
+                    last_flush = now
+        except Exception as e:
+            self._writer_error = e
+            self.recording = False
+        finally:
+            soundfile.close()
 
     def start_recording(self):
         if self.recording:
             return
-        
-        self.recording = True
-        self.audio_data = []
-        
+
         # Generar nombre de archivo basado en timestamp
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         self.filename = os.path.join(self.output_dir, f"session_{timestamp}.wav")
-        
+
+        self._ring = np.zeros((self.RING_BLOCKS, self.BLOCK_SIZE, self.channels), dtype='float32')
+        self._scratch = np.empty((self.BLOCK_SIZE, self.channels), dtype='float32')
+        self._block_rms = np.zeros(self.RING_BLOCKS, dtype='float64')
+        self.level_rms = 0.0
+        self.level_peak = 0.0
+        self.segments = []
+        self.vad.reset()
+        self._pending = queue.Queue(maxsize=self.RING_BLOCKS - 2)
+        self._head = 0
+        self._writer_error = None
+        self.frames_written = 0
+        self.dropped_blocks = 0
+
+        try:
+            soundfile = sf.SoundFile(
+                self.filename, mode='w', samplerate=self.samplerate,
+                channels=self.channels, subtype='PCM_16'
+            )
+        except Exception as e:
+            return False, f"Error al crear el archivo de grabación: {e}"
+
+        self._writer = threading.Thread(target=self._write_loop, args=(soundfile,), daemon=True)
+        self._writer.start()
+        self.recording = True
+
         try:
             self.stream = sd.InputStream(
                 samplerate=self.samplerate,
                 channels=self.channels,
+                blocksize=self.BLOCK_SIZE,
+                dtype='float32',
                 callback=self.callback
             )
             self.stream.start()
@@ -47,10 +149,29 @@ class AudioRecorder:
             return True, "Grabando..."
         except Exception as e:
             self.recording = False
+            self._stop_writer()
+            self._remove_file()
             return False, f"Error al iniciar grabación: {e}"
 
+    def _stop_writer(self):
+        if self._writer:
+            # Si el escritor murió por un error de disco la cola puede quedar llena para
+            # siempre: solo se espera lugar mientras siga vivo
+            while self._writer.is_alive():
+                try:
+                    self._pending.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            self._writer.join()
+            self._writer = None
+
+    def _remove_file(self):
+        if self.filename and os.path.exists(self.filename):
+            os.remove(self.filename)
+
     def stop_recording(self):
-        if not self.recording:
+        if not self.recording and not self._writer:
             return None, "No se está grabando."
 
         self.recording = False
@@ -59,17 +180,37 @@ class AudioRecorder:
             self.stream.close()
             self.stream = None
 
-        if not self.audio_data:
+        # Solo quedan por escribir los bloques en cola (segundos como mucho)
+        self._stop_writer()
+
+        if self._writer_error:
+            return None, f"Error al guardar archivo: {self._writer_error}"
+
+        if not self.frames_written:
+            self._remove_file()
             return None, "No se grabó audio."
 
-        # Concatenar y guardar
+        self.segments = self.vad.finish()
         try:
-            audio_array = np.concatenate(self.audio_data, axis=0)
-            sf.write(self.filename, audio_array, self.samplerate)
-            print(f"Grabación guardada en {self.filename}")
-            return self.filename, "Grabación guardada exitosamente."
-        except Exception as e:
-            return None, f"Error al guardar archivo: {e}"
+            with open(self.segments_filename(), 'w') as f:
+                json.dump({'samplerate': self.samplerate, 'speech_segments': self.segments}, f)
+        except OSError as e:
+            print(f"No se pudo guardar la segmentación: {e}", flush=True)
+
+        if self.dropped_blocks:
+            print(f"Se descartaron {self.dropped_blocks} bloques por demora del disco.", flush=True)
+        print(f"Grabación guardada en {self.filename}")
+        return self.filename, "Grabación guardada exitosamente."
+
+    def segments_filename(self):
+        return os.path.splitext(self.filename)[0] + '.segments.json'
+
+    def get_levels(self):
+        """(RMS, pico) del último bloque en dBFS, para el vúmetro."""
+        return to_dbfs(self.level_rms), to_dbfs(self.level_peak)
+
+    def is_speaking(self):
+        return self.vad.speaking
 
     def is_recording(self):
         return self.recording
@@ -0,0 +1,81 @@
+import math
+
+
+def to_dbfs(level):
+    """Nivel lineal (0-1) a dBFS; el silencio absoluto queda en -120 dB."""
+    return 20 * math.log10(level) if level > 1e-6 else -120.0
+
+
+class VoiceActivityDetector:
+    """
+    Detector de voz por energía, bloque a bloque.
+
+    Sigue el piso de ruido (baja rápido, sube lento y solo en silencio) y marca voz cuando
+    el RMS supera el piso por `ratio` durante `attack` segundos. El segmento se cierra
+    después de `hangover` segundos por debajo del umbral, para no cortar entre palabras.
+    Los segmentos quedan en `segments` como (inicio, fin) en segundos.
+    """
+
+    def __init__(self, ratio=3.0, min_level=0.003, attack=0.06, hangover=0.4, min_segment=0.25,
+                 floor_rise=0.005):
+        self.ratio = ratio
+        self.min_level = min_level
+        self.attack = attack
+        self.hangover = hangover
+        self.min_segment = min_segment
+        self.floor_rise = floor_rise
+        self.reset()
+
+    def reset(self):
+        self.noise_floor = None
+        self.position = 0.0
+        self.speaking = False
+        self.segments = []
+        self._above_since = None
+        self._below_since = None
+        self._segment_start = None
+
+    @property
+    def threshold(self):
+        return max((self.noise_floor or 0.0) * self.ratio, self.min_level)
+
+    def process(self, rms, duration):
+        """Procesa un bloque de `duration` segundos con nivel `rms`. Devuelve si hay voz."""
+        start = self.position
+        self.position += duration
+
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        if rms < self.noise_floor:
+            self.noise_floor = rms
+        elif not self.speaking:
+            self.noise_floor += (rms - self.noise_floor) * self.floor_rise
+
+        if rms > self.threshold:
+            self._below_since = None
+            if self._above_since is None:
+                self._above_since = start
+            if not self.speaking and self.position - self._above_since >= self.attack:
+                self.speaking = True
+                self._segment_start = self._above_since
+        else:
+            self._above_since = None
+            if self.speaking:
+                if self._below_since is None:
+                    self._below_since = start
+                if self.position - self._below_since >= self.hangover:
+                    self._close_segment(self._below_since)
+        return self.speaking
+
+    def finish(self):
+        """Cierra el segmento abierto al terminar la grabación y devuelve la lista."""
+        if self.speaking:
+            self._close_segment(self._below_since or self.position)
+        return self.segments
+
+    def _close_segment(self, end):
+        self.speaking = False
+        self._below_since = None
+        if end - self._segment_start >= self.min_segment:
+            self.segments.append((round(self._segment_start, 3), round(end, 3)))
+        self._segment_start = None
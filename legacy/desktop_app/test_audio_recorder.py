@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+
+# El micrófono no se abre en estas pruebas: alcanza con que el módulo importe
+sys.modules.setdefault('sounddevice', types.ModuleType('sounddevice'))
+sys.modules.setdefault('soundfile', types.ModuleType('soundfile'))
+
+from integrations import audio_recorder
+
+
+class FailingSoundFile:
+    """Archivo que se traba (disco lento) y después falla al escribir."""
+
+    def __init__(self, *args, **kwargs):
+        self.release = threading.Event()
+
+    def write(self, data):
+        self.release.wait(5)
+        raise OSError('No queda espacio en el disco')
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeStream:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StopRecordingTests(unittest.TestCase):
+    def test_disk_error_with_full_queue_does_not_hang(self):
+        files = []
+
+        def open_file(*args, **kwargs):
+            files.append(FailingSoundFile())
+            return files[-1]
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(audio_recorder.sf, 'SoundFile', open_file, create=True), \
+                mock.patch.object(audio_recorder.sd, 'InputStream', FakeStream, create=True):
+            recorder = audio_recorder.AudioRecorder(directory)
+            ok, _ = recorder.start_recording()
+            self.assertTrue(ok)
+
+            block = np.full((recorder.BLOCK_SIZE, 1), 0.1, dtype='float32')
+            for _ in range(recorder.RING_BLOCKS):
+                recorder.callback(block, recorder.BLOCK_SIZE, None, None)
+            self.assertTrue(recorder._pending.full())
+            files[0].release.set()
+            recorder._writer.join(5)
+
+            result = {}
+            stopper = threading.Thread(target=lambda: result.update(value=recorder.stop_recording()), daemon=True)
+            stopper.start()
+            stopper.join(5)
+            self.assertFalse(stopper.is_alive(), 'stop_recording() quedó esperando lugar en la cola')
+            filename, message = result['value']
+            self.assertIsNone(filename)
+            self.assertIn('No queda espacio', message)
+
+
+if __name__ == '__main__':
+    unittest.main()
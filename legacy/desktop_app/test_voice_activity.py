@@ -0,0 +1,77 @@
+import unittest
+
+from integrations.voice_activity import VoiceActivityDetector, to_dbfs
+
+BLOCK = 0.02  # segundos por bloque
+NOISE = 0.001
+VOICE = 0.05
+
+
+def blocks(level, seconds):
+    return [level] * round(seconds / BLOCK)
+
+
+def run(levels, **options):
+    vad = VoiceActivityDetector(**options)
+    for level in levels:
+        vad.process(level, BLOCK)
+    return vad.finish()
+
+
+class VoiceActivityDetectorTests(unittest.TestCase):
+    def test_speech_between_silences_is_one_segment(self):
+        levels = blocks(NOISE, 1) + blocks(VOICE, 1) + blocks(NOISE, 1)
+        self.assertEqual(run(levels), [(1.0, 2.0)])
+
+    def test_blip_shorter_than_attack_is_ignored(self):
+        levels = blocks(NOISE, 1) + blocks(VOICE, 0.04) + blocks(NOISE, 1)
+        self.assertEqual(run(levels), [])
+
+    def test_pause_shorter_than_hangover_does_not_split(self):
+        levels = blocks(NOISE, 1) + blocks(VOICE, 0.5) + blocks(NOISE, 0.2) + blocks(VOICE, 0.5) + blocks(NOISE, 1)
+        self.assertEqual(run(levels), [(1.0, 2.2)])
+
+    def test_pause_longer_than_hangover_splits(self):
+        levels = blocks(NOISE, 1) + blocks(VOICE, 0.5) + blocks(NOISE, 0.6) + blocks(VOICE, 0.5) + blocks(NOISE, 1)
+        self.assertEqual(run(levels), [(1.0, 1.5), (2.1, 2.6)])
+
+    def test_segment_shorter_than_min_segment_is_dropped(self):
+        levels = blocks(NOISE, 1) + blocks(VOICE, 0.2) + blocks(NOISE, 1)
+        self.assertEqual(run(levels), [])
+        self.assertEqual(run(levels, min_segment=0.1), [(1.0, 1.2)])
+
+    def test_threshold_follows_noise_floor(self):
+        # Con ruido de fondo alto, un nivel que sería voz en una sala silenciosa no alcanza
+        loud_room = 0.01
+        levels = blocks(loud_room, 1) + blocks(0.02, 1) + blocks(loud_room, 1)
+        self.assertEqual(run(levels), [])
+        levels = blocks(loud_room, 1) + blocks(0.05, 1) + blocks(loud_room, 1)
+        self.assertEqual(run(levels), [(1.0, 2.0)])
+
+    def test_min_level_applies_in_digital_silence(self):
+        levels = blocks(0.0, 1) + blocks(0.002, 1) + blocks(0.0, 1)
+        self.assertEqual(run(levels), [])
+
+    def test_finish_closes_open_segment(self):
+        vad = VoiceActivityDetector()
+        for level in blocks(NOISE, 1) + blocks(VOICE, 1):
+            vad.process(level, BLOCK)
+        self.assertTrue(vad.speaking)
+        self.assertEqual(vad.finish(), [(1.0, 2.0)])
+        self.assertFalse(vad.speaking)
+
+    def test_reset_starts_over(self):
+        vad = VoiceActivityDetector()
+        for level in blocks(NOISE, 1) + blocks(VOICE, 1) + blocks(NOISE, 1):
+            vad.process(level, BLOCK)
+        vad.reset()
+        self.assertEqual((vad.segments, vad.position, vad.noise_floor), ([], 0.0, None))
+
+    def test_to_dbfs(self):
+        self.assertEqual(to_dbfs(1.0), 0.0)
+        self.assertAlmostEqual(to_dbfs(0.1), -20.0)
+        self.assertEqual(to_dbfs(0.0), -120.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
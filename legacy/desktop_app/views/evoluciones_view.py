@@ -4,6 +4,8 @@ from models import Paciente, Evolucion
 from integrations.audio_recorder import AudioRecorder
 import datetime
 import os
+import threading
+import time
 
 # Directorio donde se guardarán los audios (idealmente configurable)
 AUDIO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media", "evoluciones")
@@ -37,6 +39,8 @@ class EvolucionesView(ft.Column):
             on_click=self.toggle_grabacion
         )
         self.archivo_grabado = None # Path del archivo temporal
+        # Vúmetro: pico en escala de -60 dBFS a 0 dBFS
+        self.pb_nivel = ft.ProgressBar(value=0, width=150, visible=False, color="green")
 
         self.dlg_crear = ft.AlertDialog(
             title=ft.Text("Nueva Evolución"),
@@ -46,7 +50,8 @@ class EvolucionesView(ft.Column):
                 ft.Row([
                     self.btn_grabar,
                     self.txt_status_grabacion
-                ], alignment=ft.MainAxisAlignment.START, vertical_alignment=ft.CrossAxisAlignment.CENTER)
+                ], alignment=ft.MainAxisAlignment.START, vertical_alignment=ft.CrossAxisAlignment.CENTER),
+                self.pb_nivel
             ], tight=True),
             actions=[
                 ft.TextButton("Cancelar", on_click=self.cerrar_dialogo),
@@ -79,11 +84,14 @@ class EvolucionesView(ft.Column):
                 self.btn_grabar.tooltip = "Detener Grabación"
                 self.txt_status_grabacion.value = "Grabando..."
                 self.txt_status_grabacion.color = "red"
+                self.pb_nivel.visible = True
+                threading.Thread(target=self.actualizar_vumetro, daemon=True).start()
             else:
                 self.txt_status_grabacion.value = f"Error: {msg}"
         else:
             # Detener
             path, msg = self.recorder.stop_recording()
+            self.pb_nivel.visible = False
             self.btn_grabar.icon = "mic"
             self.btn_grabar.icon_color = "red"
             self.btn_grabar.tooltip = "Iniciar Grabación"
@@ -97,11 +105,24 @@ class EvolucionesView(ft.Column):
         
         self.dlg_crear.update()
 
+    def actualizar_vumetro(self):
+        # Corre en un hilo aparte mientras se graba; ~10 refrescos por segundo
+        while self.recorder.is_recording():
+            _, peak_db = self.recorder.get_levels()
+            self.pb_nivel.value = min(max((peak_db + 60) / 60, 0), 1)
+            self.pb_nivel.color = "red" if peak_db > -1 else ("green" if self.recorder.is_speaking() else "grey")
+            try:
+                self.pb_nivel.update()
+            except Exception:
+                break
+            time.sleep(0.1)
+
     def cerrar_dialogo(self, e):
         # Asegurar que se detenga la grabación si cierra
         if self.recorder.is_recording():
             self.recorder.stop_recording()
             self.btn_grabar.icon = "mic"
+            self.pb_nivel.visible = False
         
         self.dlg_crear.open = False
         self.page.update()